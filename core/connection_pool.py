@@ -0,0 +1,185 @@
+# -*- coding: utf-8 -*-
+"""
+/***************************************************************************
+ VDLTools
+                                 A QGIS plugin for the Ville de Lausanne
+                              -------------------
+        begin                : 2016-10-28
+        git sha              : $Format:%H$
+        copyright            : (C) 2016 Ville de Lausanne
+        author               : Christophe Gusthiot
+        email                : christophe.gusthiot@lausanne.ch
+ ***************************************************************************/
+
+/***************************************************************************
+ *                                                                         *
+ *   This program is free software; you can redistribute it and/or modify  *
+ *   it under the terms of the GNU General Public License as published by  *
+ *   the Free Software Foundation; either version 2 of the License, or     *
+ *   (at your option) any later version.                                   *
+ *                                                                         *
+ ***************************************************************************/
+"""
+
+import threading
+from time import time
+from PyQt4.QtCore import QTimer
+from PyQt4.QtSql import (QSqlDatabase,
+                         QSqlQuery)
+
+
+class ConnectionPool:
+
+    MAX_CONNECTIONS = 4
+    # seconds after which an unused connection is closed
+    IDLE_TIMEOUT = 300.0
+    # seconds after which an unused connection is checked with a query before reuse
+    VALIDATION_DELAY = 30.0
+
+    def __init__(self, maxConnections=MAX_CONNECTIONS, idleTimeout=IDLE_TIMEOUT):
+        """
+        Constructor
+        :param maxConnections: maximum number of opened connections by database
+        :param idleTimeout: seconds after which an unused connection is closed
+        """
+        self.__maxConnections = maxConnections
+        self.__idleTimeout = idleTimeout
+        self.__lock = threading.Lock()
+        self.__connections = {}
+        self.__timers = {}
+        self.__number = 0
+
+    def acquire(self, key, opener):
+        """
+        To get an opened connection, reusing an unused one of the current thread if possible
+        (a connection can only be used in the thread which has created it)
+        :param key: the database key
+        :param opener: called with a new connection name to open a connection, returns it or none
+        :return: the connection, or none if it cannot be opened or if the maximum is reached
+        """
+        self.closeIdle()
+        thread = threading.current_thread().ident
+        name = None
+        with self.__lock:
+            for connectionName, connection in self.__connections.iteritems():
+                if connection['key'] == key and connection['thread'] == thread and not connection['used']:
+                    connection['used'] = True
+                    name = connectionName
+                    break
+            if name is None:
+                opened = [c for c in self.__connections.itervalues() if c['key'] == key]
+                if len(opened) >= self.__maxConnections:
+                    return None
+                self.__number += 1
+                newName = "VDLTools_" + str(self.__number)
+                self.__connections[newName] = {'key': key, 'thread': thread, 'used': True, 'time': time()}
+        if name is not None:
+            if self.__isValid(name):
+                return QSqlDatabase.database(name, False)
+            self.__remove(name)
+            return self.acquire(key, opener)
+        db = opener(newName)
+        if db is None:
+            self.__remove(newName)
+        return db
+
+    def release(self, db):
+        """
+        To give back a connection, to be reused
+        :param db: the connection
+        """
+        with self.__lock:
+            connection = self.__connections.get(db.connectionName())
+            if connection is not None:
+                connection['used'] = False
+                connection['time'] = time()
+        self.__startTimer()
+
+    def __startTimer(self):
+        """
+        To close the unused connections of the current thread after the idle timeout, with a timer of this thread
+        (the thread needs an event loop, as the GUI one or a QThread one)
+        """
+        thread = threading.current_thread().ident
+        timer = self.__timers.get(thread)
+        if timer is None:
+            timer = QTimer()
+            timer.setSingleShot(True)
+            timer.timeout.connect(self.__onTimeout)
+            self.__timers[thread] = timer
+        timer.start(int(self.__idleTimeout * 1000))
+
+    def __onTimeout(self):
+        """
+        When no connection of the current thread has been released for the idle timeout
+        """
+        self.closeIdle()
+        thread = threading.current_thread().ident
+        with self.__lock:
+            remaining = [c for c in self.__connections.itervalues() if c['thread'] == thread and not c['used']]
+        # a timer can fire a little early
+        if len(remaining) > 0:
+            self.__startTimer()
+
+    def closeIdle(self):
+        """
+        To close the connections of the current thread unused for too long
+        """
+        thread = threading.current_thread().ident
+        limit = time() - self.__idleTimeout
+        with self.__lock:
+            names = [name for name, connection in self.__connections.iteritems()
+                     if connection['thread'] == thread and not connection['used'] and connection['time'] <= limit]
+        for name in names:
+            self.__remove(name)
+
+    def closeThread(self):
+        """
+        To close all the connections of the current thread, before it ends
+        """
+        thread = threading.current_thread().ident
+        timer = self.__timers.pop(thread, None)
+        if timer is not None:
+            timer.stop()
+        with self.__lock:
+            names = [name for name, connection in self.__connections.iteritems() if connection['thread'] == thread]
+        for name in names:
+            self.__remove(name)
+
+    def clear(self):
+        """
+        To close all the connections, when no other thread uses them anymore
+        """
+        timer = self.__timers.pop(threading.current_thread().ident, None)
+        if timer is not None:
+            timer.stop()
+        with self.__lock:
+            names = self.__connections.keys()
+        for name in names:
+            self.__remove(name)
+
+    def __isValid(self, name):
+        """
+        To check if an unused connection can be reused, with a query if it has not been used for a while
+        :param name: the connection name
+        :return: true if it can, false otherwise
+        """
+        db = QSqlDatabase.database(name, False)
+        if not db.isOpen():
+            return False
+        if time() - self.__connections[name]['time'] < self.VALIDATION_DELAY:
+            return True
+        return QSqlQuery(db).exec_("SELECT 1")
+
+    def __remove(self, name):
+        """
+        To close a connection and forget it
+        :param name: the connection name
+        """
+        with self.__lock:
+            self.__connections.pop(name, None)
+        db = QSqlDatabase.database(name, False)
+        if db.isValid():
+            db.close()
+        del db
+        QSqlDatabase.removeDatabase(name)
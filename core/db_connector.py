@@ -25,18 +25,80 @@ from PyQt4.QtCore import QSettings
 from PyQt4.QtSql import QSqlDatabase
 from qgis.gui import QgsMessageBar
 from PyQt4.QtCore import QCoreApplication
+from .connection_pool import ConnectionPool
 
 
 class DBConnector:
 
+    __pool = ConnectionPool()
+
     @staticmethod
     def setConnection(dbName, iface):
         """
-        To set a connection to a PstgreSQL database
+        To get a connection to a PstgreSQL database, reused from the pool if possible
+        (to be given back with release)
         :param dbName: the name of the database
         :param iface: the qgs interface
         :return: a QsqlDatabase object, or none
         """
+        db, error = DBConnector.connection(dbName)
+        if db is None:
+            iface.messageBar().pushMessage(error, level=QgsMessageBar.CRITICAL)
+        return db
+
+    @staticmethod
+    def connection(dbName):
+        """
+        To get a connection to a PstgreSQL database, reused from the pool if possible, without using the interface
+        so that it can be called from any thread (to be given back with release, in the same thread)
+        :param dbName: the name of the database
+        :return: a QsqlDatabase object or none, and the error text or none
+        """
+        errors = []
+
+        def opener(connectionName):
+            opened, error = DBConnector.__open(dbName, connectionName)
+            if opened is None:
+                errors.append(error)
+            return opened
+
+        db = DBConnector.__pool.acquire(dbName, opener)
+        if db is not None:
+            return db, None
+        if len(errors) == 0:
+            errors.append(QCoreApplication.translate("VDLTools", "Too many connections for this db"))
+        return None, errors[0]
+
+    @staticmethod
+    def release(db):
+        """
+        To give back a connection to the pool
+        :param db: the QsqlDatabase object
+        """
+        DBConnector.__pool.release(db)
+
+    @staticmethod
+    def closeThread():
+        """
+        To close the pooled connections of the current thread, before it ends
+        """
+        DBConnector.__pool.closeThread()
+
+    @staticmethod
+    def closeAll():
+        """
+        To close all the pooled connections
+        """
+        DBConnector.__pool.clear()
+
+    @staticmethod
+    def __open(dbName, connectionName):
+        """
+        To open a new connection to a PstgreSQL database
+        :param dbName: the name of the database
+        :param connectionName: the name of the new connection
+        :return: a QsqlDatabase object or none, and the error text or none
+        """
         s = QSettings()
         s.beginGroup("PostgreSQL/connections")
         connections = s.childGroups()
@@ -44,7 +106,7 @@ class DBConnector:
         for connection in connections:
             s.beginGroup("PostgreSQL/connections/" + connection)
             if s.value("database", "") == dbName:
-                db = QSqlDatabase.addDatabase('QPSQL')
+                db = QSqlDatabase.addDatabase('QPSQL', connectionName)
                 db.setHostName(s.value("host", ""))
                 db.setDatabaseName(s.value("database", ""))
                 username = s.value("username", "")
@@ -53,19 +115,10 @@ class DBConnector:
                 db.setPassword(password)
                 s.endGroup()
                 if username == "" or password == "":
-                    iface.messageBar().pushMessage(
-                        QCoreApplication.translate("VDLTools", "Need user and password for db"),
-                        level=QgsMessageBar.CRITICAL)
-                    return None
+                    return None, QCoreApplication.translate("VDLTools", "Need user and password for db")
                 ok = db.open()
                 if not ok:
-                    iface.messageBar().pushMessage(
-                        QCoreApplication.translate("VDLTools", "Database Error: ") + db.lastError().text(),
-                        level=QgsMessageBar.CRITICAL)
-                    return None
-                return db
+                    return None, QCoreApplication.translate("VDLTools", "Database Error: ") + db.lastError().text()
+                return db, None
             s.endGroup()
-        iface.messageBar().pushMessage(
-            QCoreApplication.translate("VDLTools", "No connection for this db"),
-            level=QgsMessageBar.CRITICAL)
-        return None
+        return None, QCoreApplication.translate("VDLTools", "No connection for this db")
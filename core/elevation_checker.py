@@ -0,0 +1,198 @@
+# -*- coding: utf-8 -*-
+"""
+/***************************************************************************
+ VDLTools
+                                 A QGIS plugin for the Ville de Lausanne
+                              -------------------
+        begin                : 2016-10-27
+        git sha              : $Format:%H$
+        copyright            : (C) 2016 Ville de Lausanne
+        author               : Christophe Gusthiot
+        email                : christophe.gusthiot@lausanne.ch
+ ***************************************************************************/
+
+/***************************************************************************
+ *                                                                         *
+ *   This program is free software; you can redistribute it and/or modify  *
+ *   it under the terms of the GNU General Public License as published by  *
+ *   the Free Software Foundation; either version 2 of the License, or     *
+ *   (at your option) any later version.                                   *
+ *                                                                         *
+ ***************************************************************************/
+"""
+
+from math import floor
+from PyQt4.QtCore import QVariant
+from qgis.core import (QgsVectorLayer,
+                       QgsField,
+                       QgsFeature,
+                       QgsFeatureRequest,
+                       QgsGeometry,
+                       QgsPoint,
+                       QgsRectangle)
+from .geometry_v2 import GeometryV2
+from .vertex_index import VertexIndex
+from .profile_builder import ProfileBuilder
+
+
+class ElevationChecker:
+
+    # tiles side, in layer units
+    DEFAULT_TILE_SIZE = 500.0
+    # relative elevation tolerance, the same than the profile tool one
+    ELEVATION_TOLERANCE = 0.01
+
+    def __init__(self, lineLayer, pointLayers, tileSize=DEFAULT_TILE_SIZE):
+        """
+        Constructor
+        :param lineLayer: the lines layer
+        :param pointLayers: the points layers to compare with the lines vertices
+        :param tileSize: the tiles side, in layer units
+        """
+        self.__lineLayer = lineLayer
+        self.__pointLayers = pointLayers
+        self.__tileSize = tileSize
+        self.__names = [lineLayer.name()] + [layer.name() for layer in pointLayers]
+
+    def check(self, name="elevation checks"):
+        """
+        To check the elevations of all the lines vertices, tile by tile, with the profile tool rules :
+        a difference between lines sharing a vertex, or else a situation between a line and a point on its vertex
+        (only one tile is in memory at a time, whatever the layer size)
+        :param name: the results layer name
+        :return: memory points layer of the situations and differences
+        """
+        result = QgsVectorLayer("Point?crs=" + self.__lineLayer.crs().authid(), name, "memory")
+        provider = result.dataProvider()
+        provider.addAttributes([QgsField("type", QVariant.String),
+                                QgsField("layer", QVariant.String),
+                                QgsField("fid", QVariant.LongLong),
+                                QgsField("line", QVariant.LongLong),
+                                QgsField("z_line", QVariant.Double),
+                                QgsField("z", QVariant.Double)])
+        result.updateFields()
+        for bounds in self.__tiles():
+            lines, points = self.__readTile(bounds)
+            if len(lines) > 0:
+                self.__addResults(provider, result, self.checkTile(bounds, lines, points))
+        result.updateExtents()
+        return result
+
+    def __tiles(self):
+        """
+        To cut the lines layer extent in tiles
+        :return: tiles bounds generator, as (xMin, yMin, xMax, yMax)
+        """
+        extent = self.__lineLayer.extent()
+        if extent.width() < 0 or extent.height() < 0:
+            return
+        size = self.__tileSize
+        # one more tile, as the tiles don't contain their maximum bounds
+        columns = int(floor(extent.width() / size)) + 1
+        rows = int(floor(extent.height() / size)) + 1
+        for i in xrange(columns):
+            for j in xrange(rows):
+                x = extent.xMinimum() + i * size
+                y = extent.yMinimum() + j * size
+                yield x, y, x + size, y + size
+
+    def __readTile(self, bounds):
+        """
+        To read the lines and points of a tile
+        :param bounds: the tile bounds
+        :return: lines as (fid, xs, ys, zs) and, by points layer, points as (x, y, z, fid)
+        """
+        xMin, yMin, xMax, yMax = bounds
+        request = QgsFeatureRequest()
+        request.setFilterRect(QgsRectangle(xMin, yMin, xMax, yMax))
+        request.setSubsetOfAttributes([])
+        lines = []
+        for feature in self.__lineLayer.getFeatures(request):
+            if feature.geometry() is None:
+                continue
+            coordinates = GeometryV2.asCoordinates(feature.geometry())
+            if coordinates is None or not coordinates.hasZ():
+                continue
+            lines.append((feature.id(), coordinates.xs(), coordinates.ys(), coordinates.zs()))
+        tolerance = ProfileBuilder.POINTS_TOLERANCE
+        request.setFilterRect(QgsRectangle(xMin - tolerance, yMin - tolerance, xMax + tolerance, yMax + tolerance))
+        points = []
+        for layer in self.__pointLayers:
+            layerPoints = []
+            if len(lines) > 0:
+                for feature in layer.getFeatures(request):
+                    if feature.geometry() is None:
+                        continue
+                    point_v2 = GeometryV2.asPointV2(feature.geometry())
+                    if point_v2 is not None:
+                        layerPoints.append((point_v2.x(), point_v2.y(), point_v2.z(), feature.id()))
+            points.append(layerPoints)
+        return lines, points
+
+    @staticmethod
+    def checkTile(bounds, lines, points):
+        """
+        To check the vertices inside a tile, from plain coordinates
+        :param bounds: the tile bounds, the maximum ones excluded
+        :param lines: the lines as (fid, xs, ys, zs)
+        :param points: by points layer, the points as (x, y, z, fid)
+        :return: results as (x, y, type, layer order, fid, line fid, line z, z)
+        """
+        xMin, yMin, xMax, yMax = bounds
+        positions = {}
+        # the lowest line id is the reference, as the first line of a profile
+        for fid, xs, ys, zs in sorted(lines):
+            for i in xrange(len(xs)):
+                x = xs[i]
+                y = ys[i]
+                z = zs[i]
+                if z != z or not (xMin <= x < xMax and yMin <= y < yMax):
+                    continue
+                found = positions.get((x, y))
+                if found is None:
+                    positions[(x, y)] = [(fid, z)]
+                elif found[-1][0] != fid:
+                    found.append((fid, z))
+        indexes = []
+        for layerPoints in points:
+            index = VertexIndex(ProfileBuilder.POINTS_TOLERANCE)
+            for x, y, z, fid in layerPoints:
+                index.add(x, y, (z, fid))
+            indexes.append(index)
+        results = []
+        for (x, y), found in positions.iteritems():
+            fid0, z0 = found[0]
+            tol = ElevationChecker.ELEVATION_TOLERANCE * z0
+            isDifference = False
+            for fid, z in found[1:]:
+                if abs(z - z0) > tol:
+                    isDifference = True
+                    results.append((x, y, "difference", 0, fid, fid0, z0, z))
+            if isDifference:
+                continue
+            for order in xrange(len(indexes)):
+                point = indexes[order].closest(x, y)
+                if point is None:
+                    continue
+                zp, fid = point
+                if zp is None or zp != zp:
+                    zp = 0
+                if abs(zp - z0) > tol:
+                    results.append((x, y, "situation", order + 1, fid, fid0, z0, zp))
+        return results
+
+    def __addResults(self, provider, layer, results):
+        """
+        To add the results of a tile to the memory layer
+        :param provider: the memory layer data provider
+        :param layer: the memory layer
+        :param results: results as (x, y, type, layer order, fid, line fid, line z, z)
+        """
+        features = []
+        for x, y, kind, order, fid, line, zLine, z in results:
+            feature = QgsFeature(layer.pendingFields())
+            feature.setGeometry(QgsGeometry.fromPoint(QgsPoint(x, y)))
+            feature.setAttributes([kind, self.__names[order], fid, line, zLine, z])
+            features.append(feature)
+        if len(features) > 0:
+            provider.addFeatures(features)
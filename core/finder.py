@@ -37,10 +37,21 @@ from qgis.core import (QgsPoint,
                        QgsFeature)
 from math import (sqrt,
                   pow)
+from .index_cache import IndexCache
 
 
 class Finder:
 
+    __indexCache = IndexCache()
+
+    @staticmethod
+    def indexCache():
+        """
+        To get the spatial indexes cache used to find features
+        :return: the indexes cache
+        """
+        return Finder.__indexCache
+
     @staticmethod
     def findClosestFeatureAt(mapPoint, layerConfig, mapTool):
         """
@@ -50,9 +61,9 @@ class Finder:
         :param mapTool: a QgsMapTool instance
         :return: closest feature found or none
         """
-        features = Finder.findFeaturesAt(mapPoint, layerConfig, mapTool)
-        if features is not None and len(features) > 0:
-            return features[0]
+        found = Finder.findClosestFeaturesLayersAt(mapPoint, [layerConfig], mapTool)
+        if len(found) > 0:
+            return found[0][0]
         else:
             return None
 
@@ -63,26 +74,85 @@ class Finder:
         :param mapPoint: the map position
         :param layersConfig: the layers in which we are looking for features
         :param mapTool: a QsMapTool instance
-        :return: closest feature found or none
+        :return: closest feature found with its layer, or none
         """
-        features = []
-        for layerConfig in layersConfig:
-            feats = Finder.findFeaturesAt(mapPoint, layerConfig, mapTool)
-            if feats is not None:
-                for f in feats:
-                    features.append([f, layerConfig.layer])
-        if len(features) > 0:
-            dst = Finder.sqrDistForPoints(mapPoint, features[0][0].geometry().asPoint())
-            f = 0
-            for i in xrange(1,len(features)):
-                d = Finder.sqrDistForPoints(mapPoint, features[i][0].geometry().asPoint())
-                if d < dst:
-                    dst = d
-                    f = i
-            return features[f]
+        found = Finder.findClosestFeaturesLayersAt(mapPoint, layersConfig, mapTool)
+        if len(found) > 0:
+            return found[0]
         else:
             return None
 
+    @staticmethod
+    def findClosestFeaturesLayersAt(mapPoint, layersConfig, mapTool, number=1):
+        """
+        To find the k closest features from a given position in given layers, within the layers tolerances
+        :param mapPoint: the map position
+        :param layersConfig: the layers in which we are looking for features
+        :param mapTool: a QsMapTool instance
+        :param number: the maximum number of features to find
+        :return: list of [feature, layer], sorted from the closest, distances measured to the real geometries
+        """
+        found = []
+        for layerConfig in layersConfig:
+            if layerConfig is None:
+                continue
+            layer = layerConfig.layer
+            layTolerance = Finder.__layerTolerance(mapPoint, layerConfig, mapTool)
+            layPoint = mapTool.toLayerCoordinates(layer, mapPoint)
+            searchRect = Finder.__searchRect(layPoint, layTolerance)
+            layerIndex = Finder.__indexCache.layerIndex(layer)
+            if layerIndex is not None:
+                candidates = layerIndex.geometriesIn(searchRect)
+                features = None
+            else:
+                features = {}
+                for feature in Finder.__requestFeatures(layer, searchRect):
+                    features[feature.id()] = feature
+                candidates = [(fid, feature.geometry()) for fid, feature in features.iteritems()]
+            for fid, geometry in candidates:
+                closest = Finder.closestPoint(geometry, layPoint)
+                if closest is None or closest.sqrDist(layPoint) > layTolerance * layTolerance:
+                    continue
+                dist = mapPoint.sqrDist(mapTool.toMapCoordinates(layer, closest))
+                found.append([dist, fid, layer, features])
+        found.sort(key=lambda f: f[0])
+        found = found[:number]
+        # the index only ranks the candidates, the closest ones are then read with their attributes
+        wanted = {}
+        for dist, fid, layer, features in found:
+            if features is None:
+                wanted.setdefault(layer.id(), (layer, []))[1].append(fid)
+        fetched = {}
+        for layerId, (layer, fids) in wanted.iteritems():
+            fetched[layerId] = Finder.__requestFeaturesByIds(layer, fids)
+        result = []
+        for dist, fid, layer, features in found:
+            if features is None:
+                features = fetched[layer.id()]
+            feature = features.get(fid)
+            if feature is not None:
+                result.append([feature, layer])
+        return result
+
+    @staticmethod
+    def closestPoint(geometry, point):
+        """
+        To find the point of a geometry closest to a given position
+        :param geometry: the geometry
+        :param point: the position, in the geometry coordinates
+        :return: the closest point as QgsPoint (the position itself if inside a polygon), or none
+        """
+        if geometry is None or geometry.isEmpty():
+            return None
+        if geometry.type() == QGis.Point:
+            return geometry.closestVertex(point)[0]
+        if geometry.type() == QGis.Polygon and geometry.contains(point):
+            return QgsPoint(point.x(), point.y())
+        result = geometry.closestSegmentWithContext(point)
+        if result[0] < 0:
+            return None
+        return result[1]
+
     @staticmethod
     def sqrDistForPoints(pt1, pt2):
         """
@@ -130,24 +200,76 @@ class Finder:
         """
         if layerConfig is None:
             return None
+        layTolerance = Finder.__layerTolerance(mapPoint, layerConfig, mapTool)
+        layPoint = mapTool.toLayerCoordinates(layerConfig.layer, mapPoint)
+        searchRect = Finder.__searchRect(layPoint, layTolerance)
+        layerIndex = Finder.__indexCache.layerIndex(layerConfig.layer)
+        if layerIndex is not None:
+            fids = [fid for fid, geometry in layerIndex.geometriesIn(searchRect)]
+            features = Finder.__requestFeaturesByIds(layerConfig.layer, fids)
+            return [features[fid] for fid in fids if fid in features]
+        return Finder.__requestFeatures(layerConfig.layer, searchRect)
+
+    @staticmethod
+    def __layerTolerance(mapPoint, layerConfig, mapTool):
+        """
+        To get the tolerance of a layer config in layer coordinates
+        :param mapPoint: the map position
+        :param layerConfig: the layer config
+        :param mapTool: a QgsMapTool instance
+        :return: the tolerance in layer coordinates
+        """
         tolerance = layerConfig.tolerance
         if layerConfig.unit == QgsTolerance.Pixels:
-            layTolerance = Finder.calcCanvasTolerance(mapTool.toCanvasCoordinates(mapPoint), layerConfig.layer, mapTool, tolerance)
+            return Finder.calcCanvasTolerance(mapTool.toCanvasCoordinates(mapPoint), layerConfig.layer, mapTool,
+                                              tolerance)
         elif layerConfig.unit == QgsTolerance.ProjectUnits:
-            layTolerance = Finder.calcMapTolerance(mapPoint, layerConfig.layer, mapTool, tolerance)
+            return Finder.calcMapTolerance(mapPoint, layerConfig.layer, mapTool, tolerance)
         else:
-            layTolerance = tolerance
-        layPoint = mapTool.toLayerCoordinates(layerConfig.layer, mapPoint)
-        searchRect = QgsRectangle(layPoint.x() - layTolerance, layPoint.y() - layTolerance,
-                                  layPoint.x() + layTolerance, layPoint.y() + layTolerance)
+            return tolerance
+
+    @staticmethod
+    def __searchRect(layPoint, layTolerance):
+        """
+        To get the search rectangle around a position
+        :param layPoint: the position in layer coordinates
+        :param layTolerance: the tolerance in layer coordinates
+        :return: the search rectangle
+        """
+        return QgsRectangle(layPoint.x() - layTolerance, layPoint.y() - layTolerance,
+                            layPoint.x() + layTolerance, layPoint.y() + layTolerance)
+
+    @staticmethod
+    def __requestFeatures(layer, searchRect):
+        """
+        To get from the provider the features intersecting a rectangle
+        :param layer: the layer in which we are looking for features
+        :param searchRect: the rectangle in layer coordinates
+        :return: features found in layer
+        """
         request = QgsFeatureRequest()
         request.setFilterRect(searchRect)
         request.setFlags(QgsFeatureRequest.ExactIntersect)
         features = []
-        for feature in layerConfig.layer.getFeatures(request):
+        for feature in layer.getFeatures(request):
             features.append(QgsFeature(feature))
         return features
 
+    @staticmethod
+    def __requestFeaturesByIds(layer, fids):
+        """
+        To get from the provider, in one request, the features found with the index
+        :param layer: the layer in which we are looking for features
+        :param fids: the features ids
+        :return: dict of features, with their attributes, by feature id
+        """
+        features = {}
+        if len(fids) == 0:
+            return features
+        for feature in layer.getFeatures(QgsFeatureRequest().setFilterFids(set(fids))):
+            features[feature.id()] = QgsFeature(feature)
+        return features
+
     @staticmethod
     def calcCanvasTolerance(pixPoint, layer, mapTool, distance):
         """
@@ -305,40 +427,20 @@ class Finder:
     #     return snapperList, layerList
 
     @staticmethod
-    def snapCurvedIntersections(mapPoint, mapCanvas, mapTool, checkForAFeature=False, featureId=None):
-        snap_layers = []
-        for layer in mapCanvas.layers():
-            types = [0, 1, 2]
-            if isinstance(layer, QgsVectorLayer) and layer.geometryType() in types:
-                noUse, enabled, snappingType, unitType, tolerance, avoidIntersection = QgsProject.instance().snapSettingsForLayer(layer.id())
-                if isinstance(layer, QgsVectorLayer) and enabled:
-                    if snappingType == QgsSnapper.SnapToVertex:
-                        snap_type = QgsPointLocator.Vertex
-                    elif snappingType == QgsSnapper.SnapToSegment:
-                        snap_type = QgsPointLocator.Edge
-                    else:
-                        snap_type = QgsPointLocator.All
-                    snap_layers.append(QgsSnappingUtils.LayerConfig(layer, snap_type, tolerance, unitType))
-
-        features = Finder.findFeaturesLayersAt(mapPoint, snap_layers, mapTool)
-        if len(features) > 1:
-            if len(features) > 2:
-                one = [-1, 9999999]
-                two = [-1, 9999999]
-                for i in xrange(len(features)):
-                    d = Finder.sqrDistForPoints(mapPoint, features[i].geometry().asPoint())
-                    if d > one[1]:
-                        two = one
-                        one[0] = i
-                        one[1] = d
-                    elif d > two[1]:
-                        two[0] = i
-                        two[1] = d
-                feat1 = features[one[0]]
-                feat2 = features[two[0]]
-            else:
-                feat1 = features[0]
-                feat2 = features[1]
+    def snapCurvedIntersections(mapPoint, snappingContext, mapTool, checkForAFeature=False, featureId=None):
+        """
+        To find an intersection between the 2 closest features of the snapped layers
+        :param mapPoint: the map position
+        :param snappingContext: the snapping context giving the snapped layers
+        :param mapTool: a QgsMapTool instance
+        :param checkForAFeature: if one of the 2 features has to be a given one
+        :param featureId: id of the given feature
+        :return: the intersection as QgsPoint or none
+        """
+        found = Finder.findClosestFeaturesLayersAt(mapPoint, snappingContext.layersConfig(), mapTool, 2)
+        if len(found) > 1:
+            feat1 = found[0][0]
+            feat2 = found[1][0]
             if not checkForAFeature or feat1.id() == featureId or feat2.id() == featureId:
                 return Finder.intersect(feat1.geometry(), feat2.geometry(), mapPoint)
             else:
@@ -347,32 +449,12 @@ class Finder:
             return None
 
     @staticmethod
-    def snap(mapPoint, mapCanvas, snapIntersections):
-
-        snap_layers = []
-        for layer in mapCanvas.layers():
-            types = [0, 1, 2]
-            if isinstance(layer, QgsVectorLayer) and layer.geometryType() in types:
-                noUse, enabled, snappingType, unitType, tolerance, avoidIntersection = QgsProject.instance().snapSettingsForLayer(layer.id())
-                if isinstance(layer, QgsVectorLayer) and enabled:
-                    if snappingType == QgsSnapper.SnapToVertex:
-                        snap_type = QgsPointLocator.Vertex
-                    elif snappingType == QgsSnapper.SnapToSegment:
-                        snap_type = QgsPointLocator.Edge
-                    else:
-                        snap_type = QgsPointLocator.All
-                    snap_layers.append(QgsSnappingUtils.LayerConfig(layer, snap_type, tolerance, unitType))
-
-        snap_util = mapCanvas.snappingUtils()
-        old_layers = snap_util.layers()
-        old_mode = snap_util.snapToMapMode()
-        old_inter = snap_util.snapOnIntersections()
-        snap_util.setLayers(snap_layers)
-        snap_util.setSnapToMapMode(QgsSnappingUtils.SnapAdvanced)
-        snap_util.setSnapOnIntersections(snapIntersections)
-        match = snap_util.snapToMap(mapPoint)
-        snap_util.setLayers(old_layers)
-        snap_util.setSnapToMapMode(old_mode)
-        snap_util.setSnapOnIntersections(old_inter)
-
-        return match
+    def snap(mapPoint, snappingContext, snapIntersections):
+        """
+        To snap a position on the snapped layers
+        :param mapPoint: the map position
+        :param snappingContext: the snapping context giving the snapped layers
+        :param snapIntersections: if we want to snap on intersections
+        :return: the snapping match
+        """
+        return snappingContext.snappingUtils(snapIntersections).snapToMap(mapPoint)
@@ -0,0 +1,270 @@
+# -*- coding: utf-8 -*-
+"""
+/***************************************************************************
+ VDLTools
+                                 A QGIS plugin for the Ville de Lausanne
+                              -------------------
+        begin                : 2016-10-19
+        git sha              : $Format:%H$
+        copyright            : (C) 2016 Ville de Lausanne
+        author               : Christophe Gusthiot
+        email                : christophe.gusthiot@lausanne.ch
+ ***************************************************************************/
+
+/***************************************************************************
+ *                                                                         *
+ *   This program is free software; you can redistribute it and/or modify  *
+ *   it under the terms of the GNU General Public License as published by  *
+ *   the Free Software Foundation; either version 2 of the License, or     *
+ *   (at your option) any later version.                                   *
+ *                                                                         *
+ ***************************************************************************/
+"""
+
+from array import array
+from qgis.core import (QgsPointV2,
+                       QgsLineStringV2,
+                       QgsCircularStringV2,
+                       QgsCompoundCurveV2,
+                       QgsCurvePolygonV2,
+                       QgsWKBTypes)
+from .wkb_reader import WkbReader
+
+
+class GeometryCoordinates:
+
+    def __init__(self, geometryType, hasZ, hasM):
+        """
+        Constructor
+        :param geometryType: the geometry type, as WkbReader type
+        :param hasZ: if there are elevations
+        :param hasM: if there are measures
+        """
+        self.__type = geometryType
+        self.__x = array('d')
+        self.__y = array('d')
+        self.__z = array('d') if hasZ else None
+        self.__m = array('d') if hasM else None
+        self.__parts = []
+
+    @staticmethod
+    def fromWkb(wkb):
+        """
+        To create the coordinates of a wkb geometry
+        :param wkb: the geometry as wkb bytes
+        :return: the coordinates, or none if the geometry is not supported
+        """
+        decoded = WkbReader.read(wkb)
+        if decoded is None:
+            return None
+        geometryType, hasZ, hasM, content = decoded
+        coordinates = GeometryCoordinates(geometryType, hasZ, hasM)
+        if geometryType in [WkbReader.POINT, WkbReader.LINE_STRING, WkbReader.CIRCULAR_STRING]:
+            coordinates.appendFlatPart(content, geometryType == WkbReader.CIRCULAR_STRING)
+        elif geometryType in [WkbReader.COMPOUND_CURVE, WkbReader.POLYGON, WkbReader.CURVE_POLYGON]:
+            for part in content:
+                if part[0] not in [WkbReader.LINE_STRING, WkbReader.CIRCULAR_STRING] \
+                        or part[1] != hasZ or part[2] != hasM:
+                    return None
+                coordinates.appendFlatPart(part[3], part[0] == WkbReader.CIRCULAR_STRING)
+        else:
+            return None
+        return coordinates
+
+    def clone(self):
+        """
+        To copy the coordinates
+        :return: the copy
+        """
+        other = GeometryCoordinates(self.__type, self.hasZ(), self.hasM())
+        for i in xrange(self.numParts()):
+            start, end = self.partRange(i)
+            other.appendPart(self.__x[start:end], self.__y[start:end],
+                             self.__z[start:end] if self.__z is not None else None,
+                             self.__m[start:end] if self.__m is not None else None, self.isCurved(i))
+        return other
+
+    def geometryType(self):
+        """
+        To get the geometry type
+        :return: type as WkbReader type
+        """
+        return self.__type
+
+    def hasZ(self):
+        """
+        To check if there are elevations
+        :return: true if there are, false otherwise
+        """
+        return self.__z is not None
+
+    def hasM(self):
+        """
+        To check if there are measures
+        :return: true if there are, false otherwise
+        """
+        return self.__m is not None
+
+    def xs(self):
+        """
+        To get the x coordinates of all the parts
+        :return: x array
+        """
+        return self.__x
+
+    def ys(self):
+        """
+        To get the y coordinates of all the parts
+        :return: y array
+        """
+        return self.__y
+
+    def zs(self):
+        """
+        To get the elevations of all the parts
+        :return: z array, or none
+        """
+        return self.__z
+
+    def ms(self):
+        """
+        To get the measures of all the parts
+        :return: m array, or none
+        """
+        return self.__m
+
+    def numPoints(self):
+        """
+        To get the number of points of all the parts (parts junctions are repeated)
+        :return: number of points
+        """
+        return len(self.__x)
+
+    def numParts(self):
+        """
+        To get the number of parts (compound curves or polygon rings)
+        :return: number of parts
+        """
+        return len(self.__parts)
+
+    def partRange(self, part):
+        """
+        To get the positions of a part points in the arrays
+        :param part: part number
+        :return: start position, and end position (excluded)
+        """
+        return self.__parts[part][0], self.__parts[part][1]
+
+    def isCurved(self, part):
+        """
+        To check if a part is a circular string
+        :param part: part number
+        :return: true if it is, false otherwise
+        """
+        return self.__parts[part][2]
+
+    def appendFlatPart(self, coordinates, curved):
+        """
+        To add a part from a flat coordinates sequence
+        :param coordinates: x, y, (z), (m) of each point one after the other
+        :param curved: if the part is a circular string
+        """
+        dim = 2 + self.hasZ() + self.hasM()
+        self.appendPart(coordinates[0::dim], coordinates[1::dim],
+                        coordinates[2::dim] if self.hasZ() else None,
+                        coordinates[dim-1::dim] if self.hasM() else None, curved)
+
+    def appendPart(self, x, y, z, m, curved):
+        """
+        To add a part from coordinates sequences
+        :param x: x coordinates
+        :param y: y coordinates
+        :param z: elevations, or none
+        :param m: measures, or none
+        :param curved: if the part is a circular string
+        """
+        start = len(self.__x)
+        self.__x.extend(x)
+        self.__y.extend(y)
+        if self.__z is not None:
+            self.__z.extend(z)
+        if self.__m is not None:
+            self.__m.extend(m)
+        self.__parts.append([start, len(self.__x), curved])
+
+    def translate(self, dx, dy):
+        """
+        To translate all the points
+        :param dx: x translation
+        :param dy: y translation
+        """
+        self.__x = array('d', [x + dx for x in self.__x])
+        self.__y = array('d', [y + dy for y in self.__y])
+
+    def pointV2(self, pos):
+        """
+        To create a QgsPointV2 for a position in the arrays
+        :param pos: the position
+        :return: the point as QgsPointV2
+        """
+        return self.__points(pos, pos + 1)[0]
+
+    def curveV2(self, part):
+        """
+        To create the curve of a part
+        :param part: part number
+        :return: the curve as QgsLineStringV2/QgsCircularStringV2, or none
+        """
+        start, end = self.partRange(part)
+        if end - start < 2:
+            return None
+        if self.isCurved(part):
+            curve = QgsCircularStringV2()
+        else:
+            curve = QgsLineStringV2()
+        curve.setPoints(self.__points(start, end))
+        return curve
+
+    def toGeometryV2(self):
+        """
+        To create the geometry back from the coordinates
+        :return: the geometry as QgsPointV2, QgsLineStringV2/QgsCircularStringV2, QgsCompoundCurveV2 or
+        QgsCurvePolygonV2
+        """
+        if self.__type == WkbReader.POINT:
+            return self.pointV2(0)
+        if self.__type in [WkbReader.LINE_STRING, WkbReader.CIRCULAR_STRING]:
+            return self.curveV2(0)
+        if self.__type == WkbReader.COMPOUND_CURVE:
+            compound = QgsCompoundCurveV2()
+            for i in xrange(self.numParts()):
+                compound.addCurve(self.curveV2(i))
+            return compound
+        polygon = QgsCurvePolygonV2()
+        for i in xrange(self.numParts()):
+            if i == 0:
+                polygon.setExteriorRing(self.curveV2(i))
+            else:
+                polygon.addInteriorRing(self.curveV2(i))
+        return polygon
+
+    def __points(self, start, end):
+        """
+        To create QgsPointV2 for positions in the arrays
+        :param start: first position
+        :param end: last position (excluded)
+        :return: QgsPointV2 list
+        """
+        x = self.__x
+        y = self.__y
+        z = self.__z
+        m = self.__m
+        rg = xrange(start, end)
+        if z is not None and m is not None:
+            return [QgsPointV2(QgsWKBTypes.PointZM, x[i], y[i], z[i], m[i]) for i in rg]
+        elif z is not None:
+            return [QgsPointV2(QgsWKBTypes.PointZ, x[i], y[i], z[i]) for i in rg]
+        elif m is not None:
+            return [QgsPointV2(QgsWKBTypes.PointM, x[i], y[i], 0.0, m[i]) for i in rg]
+        else:
+            return [QgsPointV2(x[i], y[i]) for i in rg]
@@ -21,15 +21,21 @@
  ***************************************************************************/
 """
 
-from qgis.core import (QgsPointV2,
-                       QgsCompoundCurveV2,
-                       QgsLineStringV2,
-                       QgsCurvePolygonV2,
-                       QgsCircularStringV2)
+from .wkb_reader import WkbReader
+from .geometry_coordinates import GeometryCoordinates
 
 
 class GeometryV2:
 
+    @staticmethod
+    def asCoordinates(geometry):
+        """
+        To get the feature geometry as flat coordinates arrays
+        :param geometry: the feature geometry
+        :return: the coordinates as GeometryCoordinates, or none
+        """
+        return GeometryCoordinates.fromWkb(geometry.asWkb())
+
     @staticmethod
     def asPolygonV2(geometry):
         """
@@ -38,39 +44,12 @@ class GeometryV2:
         :param geometry: the feature geometry
         :return: the polygon as QgsCurvePolygonV2 , and true if it has curves or false if it hasn't, or none
         """
-        wktPolygon = geometry.exportToWkt()
-        curved = []
-        if  wktPolygon.startswith('PolygonZ'):
-            polygon = wktPolygon.replace('PolygonZ', '')
-        elif wktPolygon.startswith('Polygon'):
-            polygon = wktPolygon.replace('Polygon', '')
-        elif wktPolygon.startswith('CurvePolygonZ'):
-            polygon = wktPolygon.replace('CurvePolygonZ', '')
-        elif wktPolygon.startswith('CurvePolygon'):
-            polygon = wktPolygon.replace('CurvePolygon', '')
-        else:
+        coordinates = GeometryV2.asCoordinates(geometry)
+        if coordinates is None or coordinates.geometryType() not in [WkbReader.POLYGON, WkbReader.CURVE_POLYGON]:
             print "This geometry is not yet implemented"
             return None
-        polygon = polygon.strip()[1:-1]
-        lines = polygon.split('),')
-        polygonV2 = QgsCurvePolygonV2()
-        for i in xrange(0, len(lines)):
-            line = lines[i]
-            if line.startswith('CircularStringZ'):
-                curved.append(True)
-                line = line.replace('CircularStringZ', '')
-            elif line.startswith('CircularString'):
-                curved.append(True)
-                line = line.replace('CircularString', '')
-            else:
-                curved.append(False)
-            line = line.strip()[1:-1]
-
-            if i == 0:
-                polygonV2.setExteriorRing(GeometryV2.__createLine(line.split(','), curved[i]))
-            else:
-                polygonV2.addInteriorRing(GeometryV2.__createLine(line.split(','), curved[i]))
-        return polygonV2, curved
+        curved = [coordinates.isCurved(i) for i in xrange(coordinates.numParts())]
+        return coordinates.toGeometryV2(), curved
 
     @staticmethod
     def asLineV2(geometry):
@@ -81,69 +60,17 @@ class GeometryV2:
         :return: the line as QgsLineStringV2/QgsCircularStringV2 , and true if it has curves or false if it hasn't,
         or none
         """
-        wktLine = geometry.exportToWkt()
-        curved = False
-        if wktLine.startswith('LineStringZ'):
-            line = wktLine.replace('LineStringZ', '')
-        elif wktLine.startswith('LineString'):
-            line = wktLine.replace('LineString', '')
-        elif wktLine.startswith('CircularStringZ'):
-            curved = True
-            line = wktLine.replace('CircularStringZ', '')
-        elif wktLine.startswith('CircularString'):
-            curved = True
-            line = wktLine.replace('CircularString', '')
-        else:
-            if wktLine.startswith('CompoundCurveZ'):
-                compound = wktLine.replace('CompoundCurveZ', '')
-            elif wktLine.startswith('CompoundCurve'):
-                compound = wktLine.replace('CompoundCurve', '')
-            else:
-                print "This geometry is not yet implemented"
-                return None
-            compound = compound.strip()[1:-1]
-            lines = compound.split('),')
-            compoundV2 = QgsCompoundCurveV2()
-            curved = []
-            for i in xrange(0, len(lines)):
-                line = lines[i]
-                if line.startswith('CircularStringZ'):
-                    curved.append(True)
-                    line = line.replace('CircularStringZ', '')
-                elif line.startswith('CircularString'):
-                    curved.append(True)
-                    line = line.replace('CircularString', '')
-                else:
-                    curved.append(False)
-                line = line.strip()[1:-1]
-
-                compoundV2.addCurve(GeometryV2.__createLine(line.split(','), curved[i]))
-            return compoundV2, curved
-
-        line = line.strip()[1:-1]
-        points = line.split(',')
-        return GeometryV2.__createLine(points, curved), curved
-
-    @staticmethod
-    def __createLine(tab, curved):
-        """
-        To create a new line V2 from a list of points coordinates
-        :param tab: list of points coordinates
-        :param curved: true if it has curves, false if it hasn't
-        :return: the new line as QgsLineStringV2/QgsCircularStringV2, or none
-        """
-        if len(tab) < 2:
+        coordinates = GeometryV2.asCoordinates(geometry)
+        if coordinates is None:
+            print "This geometry is not yet implemented"
+            return None
+        if coordinates.geometryType() in [WkbReader.LINE_STRING, WkbReader.CIRCULAR_STRING]:
+            return coordinates.toGeometryV2(), coordinates.isCurved(0)
+        if coordinates.geometryType() != WkbReader.COMPOUND_CURVE:
+            print "This geometry is not yet implemented"
             return None
-        points = []
-        for pt in tab:
-            pt_tab = pt.strip().split()
-            points.append(GeometryV2.__createPoint(pt_tab))
-        if curved:
-            lineV2 = QgsCircularStringV2()
-        else:
-            lineV2 = QgsLineStringV2()
-        lineV2.setPoints(points)
-        return lineV2
+        curved = [coordinates.isCurved(i) for i in xrange(coordinates.numParts())]
+        return coordinates.toGeometryV2(), curved
 
     @staticmethod
     def asPointV2(geometry):
@@ -153,28 +80,8 @@ class GeometryV2:
         :param geometry: the feature geometry
         :return: the point as QgsPointV2, or none
         """
-        wktPoint = geometry.exportToWkt()
-        if wktPoint.startswith('PointZ'):
-            point = wktPoint.replace('PointZ', '')
-        elif wktPoint.startswith('Point'):
-            point = wktPoint.replace('Point', '')
-        else:
+        coordinates = GeometryV2.asCoordinates(geometry)
+        if coordinates is None or coordinates.geometryType() != WkbReader.POINT:
             print "This geometry is not yet implemented"
             return None
-        point = point.strip()[1:-1]
-        pt_tab = point.strip().split()
-        return GeometryV2.__createPoint(pt_tab)
-
-    @staticmethod
-    def __createPoint(tab):
-        """
-        To create a new QGSPointV2 from coordinates
-        :param tab: coordinates
-        :return: QGSPointV2
-        """
-        pointV2 = QgsPointV2(float(tab[0]), float(tab[1]))
-        if len(tab) > 2:
-            pointV2.addZValue(float(tab[2]))
-        if len(tab) > 3:
-            pointV2.addMValue(float(tab[3]))
-        return pointV2
+        return coordinates.pointV2(0)
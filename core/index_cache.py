@@ -0,0 +1,117 @@
+# -*- coding: utf-8 -*-
+"""
+/***************************************************************************
+ VDLTools
+                                 A QGIS plugin for the Ville de Lausanne
+                              -------------------
+        begin                : 2016-10-10
+        git sha              : $Format:%H$
+        copyright            : (C) 2016 Ville de Lausanne
+        author               : Christophe Gusthiot
+        email                : christophe.gusthiot@lausanne.ch
+ ***************************************************************************/
+
+/***************************************************************************
+ *                                                                         *
+ *   This program is free software; you can redistribute it and/or modify  *
+ *   it under the terms of the GNU General Public License as published by  *
+ *   the Free Software Foundation; either version 2 of the License, or     *
+ *   (at your option) any later version.                                   *
+ *                                                                         *
+ ***************************************************************************/
+"""
+
+from collections import OrderedDict
+from .layer_index import LayerIndex
+
+
+class IndexCache:
+
+    # default memory budget for all the indexed layers, in bytes
+    DEFAULT_BUDGET = 256 * 1024 * 1024
+
+    def __init__(self, budget=DEFAULT_BUDGET):
+        """
+        Constructor
+        :param budget: maximum memory used by all the indexes, in bytes
+        """
+        self.__budget = budget
+        self.__indexes = OrderedDict()
+        self.__rejected = set()
+
+    def budget(self):
+        """
+        To get the memory budget
+        :return: budget in bytes
+        """
+        return self.__budget
+
+    def setBudget(self, budget):
+        """
+        To set the memory budget, evicting indexes if needed
+        :param budget: budget in bytes
+        """
+        self.__budget = budget
+        self.__rejected = set()
+        self.__evict(None)
+
+    def size(self):
+        """
+        To get the memory used by all the indexes
+        :return: size in bytes
+        """
+        return sum(index.size() for index in self.__indexes.itervalues())
+
+    def layerIndex(self, layer):
+        """
+        To get the up to date index of a layer, building it if needed
+        :param layer: the vector layer
+        :return: the layer index, or none if the layer doesn't fit in the budget
+        """
+        layerId = layer.id()
+        if layerId in self.__rejected:
+            return None
+        index = self.__indexes.pop(layerId, None)
+        if index is None:
+            index = LayerIndex(layer, self.remove)
+        # re-inserted at the end, as most recently used
+        self.__indexes[layerId] = index
+        if not index.isValid():
+            self.__evict(layerId, self.__budget - layer.featureCount() * LayerIndex.FEATURE_OVERHEAD)
+            if not index.build(self.__budget):
+                self.remove(layerId)
+                self.__rejected.add(layerId)
+                return None
+        self.__evict(layerId)
+        return index
+
+    def remove(self, layerId):
+        """
+        To remove the index of a layer
+        :param layerId: the layer id
+        """
+        index = self.__indexes.pop(layerId, None)
+        if index is not None:
+            index.release()
+
+    def clear(self):
+        """
+        To remove all the indexes
+        """
+        for layerId in list(self.__indexes.keys()):
+            self.remove(layerId)
+        self.__rejected = set()
+
+    def __evict(self, keptId, budget=None):
+        """
+        To remove the least recently used indexes until the memory budget is respected
+        :param keptId: id of a layer whose index must be kept
+        :param budget: the budget to respect, the whole budget if none
+        """
+        if budget is None:
+            budget = self.__budget
+        for layerId in list(self.__indexes.keys()):
+            if self.size() <= budget:
+                return
+            if layerId != keptId:
+                self.remove(layerId)
@@ -0,0 +1,86 @@
+# -*- coding: utf-8 -*-
+"""
+/***************************************************************************
+ VDLTools
+                                 A QGIS plugin for the Ville de Lausanne
+                              -------------------
+        begin                : 2016-11-03
+        git sha              : $Format:%H$
+        copyright            : (C) 2016 Ville de Lausanne
+        author               : Christophe Gusthiot
+        email                : christophe.gusthiot@lausanne.ch
+ ***************************************************************************/
+
+/***************************************************************************
+ *                                                                         *
+ *   This program is free software; you can redistribute it and/or modify  *
+ *   it under the terms of the GNU General Public License as published by  *
+ *   the Free Software Foundation; either version 2 of the License, or     *
+ *   (at your option) any later version.                                   *
+ *                                                                         *
+ ***************************************************************************/
+"""
+
+
+class JobsCache:
+
+    def __init__(self):
+        """
+        Constructor, the cache is empty until its first refresh
+        """
+        self.__key = None
+        self.__jobs = []
+        self.__lastId = None
+
+    def isFor(self, key):
+        """
+        To check if the cache has been filled for a measures table
+        :param key: the (database, config table, measures table) key
+        :return: true if it has been, false otherwise
+        """
+        return self.__lastId is not None and self.__key == key
+
+    def refresh(self, key, jobs, lastId):
+        """
+        To replace the cached jobs after a full listing
+        :param key: the (database, config table, measures table) key
+        :param jobs: all the jobs to import
+        :param lastId: the highest measure id when they were listed
+        """
+        self.__key = key
+        self.__jobs = []
+        self.__lastId = lastId
+        self.add(jobs, lastId)
+
+    def add(self, jobs, lastId):
+        """
+        To add the jobs of the measures inserted since the previous listing
+        :param jobs: the jobs found in the new measures
+        :param lastId: the highest measure id when they were listed
+        """
+        for job in jobs:
+            if job not in self.__jobs:
+                self.__jobs.append(job)
+        self.__lastId = lastId
+
+    def remove(self, job):
+        """
+        To remove a job which has no measures to import anymore
+        :param job: the job
+        """
+        if job in self.__jobs:
+            self.__jobs.remove(job)
+
+    def jobs(self):
+        """
+        To get the cached jobs
+        :return: jobs list
+        """
+        return list(self.__jobs)
+
+    def lastId(self):
+        """
+        To get the highest measure id already read
+        :return: the id, or none if the cache is empty
+        """
+        return self.__lastId
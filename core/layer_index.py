@@ -0,0 +1,200 @@
+# -*- coding: utf-8 -*-
+"""
+/***************************************************************************
+ VDLTools
+                                 A QGIS plugin for the Ville de Lausanne
+                              -------------------
+        begin                : 2016-10-10
+        git sha              : $Format:%H$
+        copyright            : (C) 2016 Ville de Lausanne
+        author               : Christophe Gusthiot
+        email                : christophe.gusthiot@lausanne.ch
+ ***************************************************************************/
+
+/***************************************************************************
+ *                                                                         *
+ *   This program is free software; you can redistribute it and/or modify  *
+ *   it under the terms of the GNU General Public License as published by  *
+ *   the Free Software Foundation; either version 2 of the License, or     *
+ *   (at your option) any later version.                                   *
+ *                                                                         *
+ ***************************************************************************/
+"""
+
+from qgis.core import (QgsSpatialIndex,
+                       QgsFeatureRequest,
+                       QgsFeature,
+                       QgsGeometry)
+
+
+class LayerIndex:
+
+    # approximate memory used by one feature in the R-tree and in the python wrappers, in bytes
+    FEATURE_OVERHEAD = 200
+
+    def __init__(self, layer, onDeleted=None):
+        """
+        Constructor
+        :param layer: the vector layer to index
+        :param onDeleted: called with the layer id when the layer is deleted
+        """
+        self.__layer = layer
+        self.__layerId = layer.id()
+        self.__onDeleted = onDeleted
+        self.__index = None
+        self.__geometries = {}
+        self.__size = 0
+        self.__valid = False
+        self.__layer.featureAdded.connect(self.__featureAdded)
+        self.__layer.featureDeleted.connect(self.__featureDeleted)
+        self.__layer.geometryChanged.connect(self.__geometryChanged)
+        self.__layer.editingStopped.connect(self.invalidate)
+        self.__layer.layerDeleted.connect(self.__layerDeleted)
+
+    def layer(self):
+        """
+        To get the indexed layer
+        :return: indexed layer
+        """
+        return self.__layer
+
+    def isValid(self):
+        """
+        To check if the index is built and up to date
+        :return: true if it is, false otherwise
+        """
+        return self.__valid
+
+    def size(self):
+        """
+        To get the estimated memory used by the index
+        :return: size in bytes
+        """
+        return self.__size
+
+    def build(self, budget):
+        """
+        To (re)build the index from the layer features
+        :param budget: maximum memory the index can use, in bytes
+        :return: true if the index has been built, false if it doesn't fit in the budget
+        """
+        self.__clear()
+        if self.__layer.featureCount() * self.FEATURE_OVERHEAD > budget:
+            return False
+        request = QgsFeatureRequest()
+        request.setSubsetOfAttributes([])
+        for feature in self.__layer.getFeatures(request):
+            self.__insert(feature.id(), feature.geometry())
+            if self.__size > budget:
+                self.__clear()
+                return False
+        self.__valid = True
+        return True
+
+    def invalidate(self):
+        """
+        To force a rebuild of the index at next use (edits rolled back or committed)
+        """
+        self.__clear()
+
+    def release(self):
+        """
+        To free the index and stop listening to the layer
+        """
+        self.__clear()
+        if self.__layer is not None:
+            self.__layer.featureAdded.disconnect(self.__featureAdded)
+            self.__layer.featureDeleted.disconnect(self.__featureDeleted)
+            self.__layer.geometryChanged.disconnect(self.__geometryChanged)
+            self.__layer.editingStopped.disconnect(self.invalidate)
+            self.__layer.layerDeleted.disconnect(self.__layerDeleted)
+            self.__layer = None
+
+    def geometriesIn(self, rect):
+        """
+        To get the indexed geometries intersecting a rectangle, without copying them
+        :param rect: the rectangle in layer coordinates
+        :return: list of (feature id, geometry), geometries must not be modified
+        """
+        geometries = []
+        for fid in self.__index.intersects(rect):
+            geometry = self.__geometries.get(fid)
+            if geometry is not None and geometry.intersects(rect):
+                geometries.append((fid, geometry))
+        return geometries
+
+    def __clear(self):
+        """
+        To empty the index
+        """
+        self.__index = QgsSpatialIndex()
+        self.__geometries = {}
+        self.__size = 0
+        self.__valid = False
+
+    def __insert(self, fid, geometry):
+        """
+        To add a geometry to the index
+        :param fid: feature id
+        :param geometry: feature geometry
+        """
+        if geometry is None or geometry.isEmpty():
+            return
+        geometry = QgsGeometry(geometry)
+        feature = QgsFeature(fid)
+        feature.setGeometry(geometry)
+        self.__index.insertFeature(feature)
+        self.__geometries[fid] = geometry
+        self.__size += geometry.wkbSize() + self.FEATURE_OVERHEAD
+
+    def __remove(self, fid):
+        """
+        To remove a geometry from the index
+        :param fid: feature id
+        """
+        geometry = self.__geometries.pop(fid, None)
+        if geometry is None:
+            return
+        feature = QgsFeature(fid)
+        feature.setGeometry(geometry)
+        self.__index.deleteFeature(feature)
+        self.__size -= geometry.wkbSize() + self.FEATURE_OVERHEAD
+
+    def __featureAdded(self, fid):
+        """
+        When a feature is added to the layer
+        :param fid: added feature id
+        """
+        if not self.__valid:
+            return
+        request = QgsFeatureRequest(fid)
+        request.setSubsetOfAttributes([])
+        for feature in self.__layer.getFeatures(request):
+            self.__insert(fid, feature.geometry())
+
+    def __featureDeleted(self, fid):
+        """
+        When a feature is deleted from the layer
+        :param fid: deleted feature id
+        """
+        if self.__valid:
+            self.__remove(fid)
+
+    def __geometryChanged(self, fid, geometry):
+        """
+        When a feature geometry is changed
+        :param fid: changed feature id
+        :param geometry: new geometry
+        """
+        if self.__valid:
+            self.__remove(fid)
+            self.__insert(fid, geometry)
+
+    def __layerDeleted(self):
+        """
+        When the layer is deleted
+        """
+        self.__clear()
+        self.__layer = None
+        if self.__onDeleted is not None:
+            self.__onDeleted(self.__layerId)
@@ -0,0 +1,261 @@
+# -*- coding: utf-8 -*-
+"""
+/***************************************************************************
+ VDLTools
+                                 A QGIS plugin for the Ville de Lausanne
+                              -------------------
+        begin                : 2016-10-26
+        git sha              : $Format:%H$
+        copyright            : (C) 2016 Ville de Lausanne
+        author               : Christophe Gusthiot
+        email                : christophe.gusthiot@lausanne.ch
+ ***************************************************************************/
+
+/***************************************************************************
+ *                                                                         *
+ *   This program is free software; you can redistribute it and/or modify  *
+ *   it under the terms of the GNU General Public License as published by  *
+ *   the Free Software Foundation; either version 2 of the License, or     *
+ *   (at your option) any later version.                                   *
+ *                                                                         *
+ ***************************************************************************/
+"""
+
+from math import hypot
+from heapq import (heappush,
+                   heappop)
+from qgis.core import QgsFeatureRequest
+
+
+class LineTopology:
+
+    def __init__(self, layer, onDeleted=None):
+        """
+        Constructor, the graph is built at first use
+        :param layer: the lines layer
+        :param onDeleted: called with the layer id when the layer is deleted
+        """
+        self.__layer = layer
+        self.__layerId = layer.id()
+        self.__onDeleted = onDeleted
+        self.__nodes = {}
+        self.__edges = {}
+        self.__valid = False
+        self.__layer.featureAdded.connect(self.__featureAdded)
+        self.__layer.featureDeleted.connect(self.__featureDeleted)
+        self.__layer.geometryChanged.connect(self.__geometryChanged)
+        self.__layer.editingStopped.connect(self.invalidate)
+        self.__layer.layerDeleted.connect(self.__layerDeleted)
+
+    def layer(self):
+        """
+        To get the lines layer
+        :return: lines layer
+        """
+        return self.__layer
+
+    def invalidate(self):
+        """
+        To force a rebuild of the graph at next use (edits rolled back or committed)
+        """
+        self.__clear()
+
+    def release(self):
+        """
+        To free the graph and stop listening to the layer
+        """
+        self.__clear()
+        if self.__layer is not None:
+            self.__layer.featureAdded.disconnect(self.__featureAdded)
+            self.__layer.featureDeleted.disconnect(self.__featureDeleted)
+            self.__layer.geometryChanged.disconnect(self.__geometryChanged)
+            self.__layer.editingStopped.disconnect(self.invalidate)
+            self.__layer.layerDeleted.disconnect(self.__layerDeleted)
+            self.__layer = None
+
+    def endpoints(self, fid):
+        """
+        To get the end nodes of a line
+        :param fid: the line feature id
+        :return: first and last vertices as (x, y) nodes, or none
+        """
+        self.__build()
+        edge = self.__edges.get(fid)
+        if edge is None:
+            return None
+        return edge[0], edge[1]
+
+    def linesAt(self, node):
+        """
+        To get the lines starting or ending at a node
+        :param node: the (x, y) node
+        :return: feature ids list
+        """
+        self.__build()
+        return list(self.__nodes.get(node, []))
+
+    def neighbours(self, fid):
+        """
+        To get the lines connected to a line by one of its ends
+        :param fid: the line feature id
+        :return: feature ids list
+        """
+        self.__build()
+        edge = self.__edges.get(fid)
+        if edge is None:
+            return []
+        neighbours = []
+        for node in set(edge[:2]):
+            for other in self.__nodes[node]:
+                if other != fid and other not in neighbours:
+                    neighbours.append(other)
+        return neighbours
+
+    def path(self, node, fid, excluded=(), maxLength=None):
+        """
+        To find the shortest chain of lines from a node to a line
+        :param node: the starting (x, y) node
+        :param fid: the line feature id to reach, last one of the chain
+        :param excluded: feature ids of the lines that cannot be used
+        :param maxLength: the maximum length of the lines connecting the node to the line to reach, which bounds the
+        searched area, or none to search all the connected lines
+        :return: list of (feature id, direction) with direction true if the line is followed from its first vertex,
+        the node reached at the end of the chain, and the chain length, or none if there is no such chain
+        """
+        self.__build()
+        target = self.__edges.get(fid)
+        if target is None or node not in self.__nodes or fid in excluded:
+            return None
+        # a line is never shorter than the straight distance between its ends, so this estimation keeps the
+        # search exact while directing it toward the target (A*)
+        def remaining(vertex):
+            return min(hypot(vertex[0] - target[0][0], vertex[1] - target[0][1]),
+                       hypot(vertex[0] - target[1][0], vertex[1] - target[1][1]))
+        distances = {node: 0.0}
+        previous = {}
+        if maxLength is None:
+            maxLength = float('inf')
+        heap = [(remaining(node), 0.0, node)]
+        while heap:
+            estimation, distance, current = heappop(heap)
+            if estimation > maxLength:
+                return None
+            if distance > distances[current]:
+                continue
+            if current == target[0] or current == target[1]:
+                edges = []
+                vertex = current
+                while vertex != node:
+                    edge, start = previous[vertex]
+                    edges.append((edge, self.__edges[edge][0] == start))
+                    vertex = start
+                edges.reverse()
+                if current == target[0]:
+                    edges.append((fid, True))
+                    return edges, target[1], distance + target[2]
+                edges.append((fid, False))
+                return edges, target[0], distance + target[2]
+            for edge in self.__nodes[current]:
+                if edge in excluded or edge == fid:
+                    continue
+                start, end, length = self.__edges[edge]
+                if start == current:
+                    neighbour = end
+                else:
+                    neighbour = start
+                if distance + length < distances.get(neighbour, float('inf')):
+                    distances[neighbour] = distance + length
+                    previous[neighbour] = (edge, current)
+                    heappush(heap, (distance + length + remaining(neighbour), distance + length, neighbour))
+        return None
+
+    def __build(self):
+        """
+        To build the graph from the layer features, if it is not up to date
+        """
+        if self.__valid or self.__layer is None:
+            return
+        request = QgsFeatureRequest()
+        request.setSubsetOfAttributes([])
+        for feature in self.__layer.getFeatures(request):
+            self.__insert(feature.id(), feature.geometry())
+        self.__valid = True
+
+    def __clear(self):
+        """
+        To empty the graph
+        """
+        self.__nodes = {}
+        self.__edges = {}
+        self.__valid = False
+
+    def __insert(self, fid, geometry):
+        """
+        To add a line to the graph
+        :param fid: feature id
+        :param geometry: feature geometry
+        """
+        if geometry is None or geometry.isEmpty():
+            return
+        line = geometry.asPolyline()
+        if len(line) < 2:
+            return
+        start = (line[0].x(), line[0].y())
+        end = (line[-1].x(), line[-1].y())
+        self.__edges[fid] = (start, end, geometry.length())
+        self.__nodes.setdefault(start, []).append(fid)
+        if end != start:
+            self.__nodes.setdefault(end, []).append(fid)
+
+    def __remove(self, fid):
+        """
+        To remove a line from the graph
+        :param fid: feature id
+        """
+        edge = self.__edges.pop(fid, None)
+        if edge is None:
+            return
+        for node in set(edge[:2]):
+            edges = self.__nodes[node]
+            edges.remove(fid)
+            if len(edges) == 0:
+                del self.__nodes[node]
+
+    def __featureAdded(self, fid):
+        """
+        When a feature is added to the layer
+        :param fid: added feature id
+        """
+        if not self.__valid:
+            return
+        request = QgsFeatureRequest(fid)
+        request.setSubsetOfAttributes([])
+        for feature in self.__layer.getFeatures(request):
+            self.__insert(fid, feature.geometry())
+
+    def __featureDeleted(self, fid):
+        """
+        When a feature is deleted from the layer
+        :param fid: deleted feature id
+        """
+        if self.__valid:
+            self.__remove(fid)
+
+    def __geometryChanged(self, fid, geometry):
+        """
+        When a feature geometry is changed
+        :param fid: changed feature id
+        :param geometry: new geometry
+        """
+        if self.__valid:
+            self.__remove(fid)
+            self.__insert(fid, geometry)
+
+    def __layerDeleted(self):
+        """
+        When the layer is deleted
+        """
+        self.__clear()
+        self.__layer = None
+        if self.__onDeleted is not None:
+            self.__onDeleted(self.__layerId)
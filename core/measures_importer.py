@@ -0,0 +1,120 @@
+# -*- coding: utf-8 -*-
+"""
+/***************************************************************************
+ VDLTools
+                                 A QGIS plugin for the Ville de Lausanne
+                              -------------------
+        begin                : 2016-10-28
+        git sha              : $Format:%H$
+        copyright            : (C) 2016 Ville de Lausanne
+        author               : Christophe Gusthiot
+        email                : christophe.gusthiot@lausanne.ch
+ ***************************************************************************/
+
+/***************************************************************************
+ *                                                                         *
+ *   This program is free software; you can redistribute it and/or modify  *
+ *   it under the terms of the GNU General Public License as published by  *
+ *   the Free Software Foundation; either version 2 of the License, or     *
+ *   (at your option) any later version.                                   *
+ *                                                                         *
+ ***************************************************************************/
+"""
+
+
+class MeasuresImporter:
+
+    DEFAULT_BATCH_SIZE = 1000
+    # geometry column of the measures source table and of the target tables
+    GEOMETRY = "geometry"
+    # 'traitement' status of the measures, before and after their import
+    TO_IMPORT = u'non-traité'
+    IMPORTED = u'traité'
+
+    def __init__(self, queries, sourceTable, batchSize=DEFAULT_BATCH_SIZE):
+        """
+        Constructor
+        :param queries: the measures queries of the opened database connection
+        :param sourceTable: the measures table, with 'id', 'job', 'code' and geometry columns
+        :param batchSize: the number of measures read and copied at once
+        """
+        self.__queries = queries
+        self.__sourceTable = sourceTable
+        self.__batchSize = batchSize
+        self.__error = None
+
+    def lastError(self):
+        """
+        To get the error of the last failed import
+        :return: error text, or none
+        """
+        return self.__error
+
+    def importJob(self, job, progress=None, cancelled=None):
+        """
+        To copy the measures of a job still to import into their target tables, page by page of ids,
+        so only one page is in memory whatever the job size, and then to mark them as imported with a single update,
+        all in one transaction
+        :param job: the job
+        :param progress: called with the number of processed measures and the total number
+        :param cancelled: called between two pages, the import is rolled back if it returns true
+        :return: dict of inserted measures by target table, or none if it failed (see lastError)
+        or has been cancelled (lastError is then none)
+        """
+        self.__error = None
+        targets = self.__queries.targets(self.__sourceTable)
+        total = self.__queries.count(self.__sourceTable, job, self.TO_IMPORT)
+        if targets is None or total is None:
+            self.__error = self.__queries.lastError()
+            return None
+        db = self.__queries.db()
+        if not db.transaction():
+            self.__error = db.lastError().text()
+            return None
+        inserted = {}
+        done = 0
+        lastId = None
+        while True:
+            if cancelled is not None and cancelled():
+                db.rollback()
+                return None
+            measures = self.__queries.page(self.__sourceTable, job, self.TO_IMPORT, lastId, self.__batchSize)
+            if measures is None:
+                return self.__fail()
+            if len(measures) == 0:
+                break
+            firstId = measures[0][0]
+            lastId = measures[-1][0]
+            codes = []
+            for iden, code in measures:
+                if code not in codes:
+                    codes.append(code)
+            for code in codes:
+                target = targets.get(code)
+                if target is None:
+                    continue
+                number = self.__queries.copy(self.__sourceTable, target, self.GEOMETRY, job, self.TO_IMPORT, code,
+                                             firstId, lastId)
+                if number is None:
+                    return self.__fail()
+                inserted[target] = inserted.get(target, 0) + number
+            done += len(measures)
+            if progress is not None:
+                progress(done, total)
+        if lastId is not None and self.__queries.setStatus(self.__sourceTable, job, self.TO_IMPORT, self.IMPORTED,
+                                                           lastId) is None:
+            return self.__fail()
+        if not db.commit():
+            self.__error = db.lastError().text()
+            db.rollback()
+            return None
+        return inserted
+
+    def __fail(self):
+        """
+        To cancel the import transaction after a failed query
+        :return: none
+        """
+        self.__error = self.__queries.lastError()
+        self.__queries.db().rollback()
+        return None
@@ -0,0 +1,236 @@
+# -*- coding: utf-8 -*-
+"""
+/***************************************************************************
+ VDLTools
+                                 A QGIS plugin for the Ville de Lausanne
+                              -------------------
+        begin                : 2016-10-31
+        git sha              : $Format:%H$
+        copyright            : (C) 2016 Ville de Lausanne
+        author               : Christophe Gusthiot
+        email                : christophe.gusthiot@lausanne.ch
+ ***************************************************************************/
+
+/***************************************************************************
+ *                                                                         *
+ *   This program is free software; you can redistribute it and/or modify  *
+ *   it under the terms of the GNU General Public License as published by  *
+ *   the Free Software Foundation; either version 2 of the License, or     *
+ *   (at your option) any later version.                                   *
+ *                                                                         *
+ ***************************************************************************/
+"""
+
+from PyQt4.QtSql import QSqlQuery
+
+
+class MeasuresQueries:
+
+    def __init__(self, db, configTable):
+        """
+        Constructor
+        :param db: the opened database connection
+        :param configTable: the config table, giving for a 'source' table the 'target' table of each measure 'code'
+        """
+        self.__db = db
+        self.__configTable = configTable
+        self.__queries = {}
+        self.__error = None
+
+    def db(self):
+        """
+        To get the database connection
+        :return: the connection
+        """
+        return self.__db
+
+    def configTable(self):
+        """
+        To get the config table
+        :return: the config table
+        """
+        return self.__configTable
+
+    def lastError(self):
+        """
+        To get the error of the last failed query
+        :return: error text, or none
+        """
+        return self.__error
+
+    def __execute(self, key, sql, values):
+        """
+        To execute a statement, prepared at its first use and then reused with new bound values
+        (the tables names cannot be bound, they are part of the key)
+        :param key: the statement key
+        :param sql: the statement, with '?' placeholders
+        :param values: the values to bind
+        :return: the executed query, or none if it failed
+        """
+        query = self.__queries.get(key)
+        if query is None:
+            query = QSqlQuery(self.__db)
+            query.setForwardOnly(True)
+            if not query.prepare(sql):
+                self.__error = query.lastError().text()
+                return None
+            self.__queries[key] = query
+        for pos in xrange(len(values)):
+            query.bindValue(pos, values[pos])
+        if not query.exec_():
+            self.__error = query.lastError().text()
+            return None
+        self.__error = None
+        return query
+
+    def sources(self):
+        """
+        To get the measures tables referenced in the config table
+        :return: tables list, or none if it failed
+        """
+        query = self.__execute('sources', """SELECT DISTINCT source FROM """ + self.__configTable +
+                               """ WHERE source IS NOT NULL""", [])
+        if query is None:
+            return None
+        sources = []
+        while query.next():
+            sources.append(query.value(0))
+        return sources
+
+    def jobs(self, sourceTable, status):
+        """
+        To get the jobs having measures with a given status
+        :param sourceTable: the measures table
+        :param status: the 'traitement' status
+        :return: jobs list, or none if it failed
+        """
+        query = self.__execute(('jobs', sourceTable), """SELECT DISTINCT job FROM """ + sourceTable +
+                               """ WHERE traitement = ?""", [status])
+        if query is None:
+            return None
+        jobs = []
+        while query.next():
+            jobs.append(query.value(0))
+        return jobs
+
+    def jobsBetween(self, sourceTable, status, afterId, lastId):
+        """
+        To get the jobs having measures with a given status, in an ids range, so only the measures added since a
+        previous listing are read
+        :param sourceTable: the measures table
+        :param status: the 'traitement' status
+        :param afterId: the last id already read
+        :param lastId: the last id of the range
+        :return: jobs list, or none if it failed
+        """
+        query = self.__execute(('jobsBetween', sourceTable), """SELECT DISTINCT job FROM """ + sourceTable +
+                               """ WHERE traitement = ? AND id > ? AND id <= ?""", [status, afterId, lastId])
+        if query is None:
+            return None
+        jobs = []
+        while query.next():
+            jobs.append(query.value(0))
+        return jobs
+
+    def lastId(self, sourceTable):
+        """
+        To get the highest measure id, read from the primary key index
+        :param sourceTable: the measures table
+        :return: the highest id, 0 for an empty table, or none if it failed
+        """
+        query = self.__execute(('lastId', sourceTable), """SELECT coalesce(max(id), 0) FROM """ + sourceTable, [])
+        if query is None or not query.next():
+            return None
+        return int(query.value(0))
+
+    def targets(self, sourceTable):
+        """
+        To get the target tables of the measures codes
+        :param sourceTable: the measures table
+        :return: dict of target table by code, or none if it failed
+        """
+        query = self.__execute('targets', """SELECT code, target FROM """ + self.__configTable +
+                               """ WHERE source = ? AND code IS NOT NULL AND target IS NOT NULL""", [sourceTable])
+        if query is None:
+            return None
+        targets = {}
+        while query.next():
+            targets[query.value(0)] = query.value(1)
+        return targets
+
+    def count(self, sourceTable, job, status):
+        """
+        To count the measures of a job with a given status
+        :param sourceTable: the measures table
+        :param job: the job
+        :param status: the 'traitement' status
+        :return: the number of measures, or none if it failed
+        """
+        query = self.__execute(('count', sourceTable), """SELECT count(*) FROM """ + sourceTable +
+                               """ WHERE job = ? AND traitement = ?""", [job, status])
+        if query is None or not query.next():
+            return None
+        return int(query.value(0))
+
+    def page(self, sourceTable, job, status, lastId, size):
+        """
+        To get a page of the measures of a job with a given status, ordered by id
+        :param sourceTable: the measures table
+        :param job: the job
+        :param status: the 'traitement' status
+        :param lastId: the last id of the previous page, or none for the first page
+        :param size: the maximum number of measures
+        :return: list of (id, code), or none if it failed
+        """
+        if lastId is None:
+            query = self.__execute(('first', sourceTable), """SELECT id, code FROM """ + sourceTable +
+                                   """ WHERE job = ? AND traitement = ? ORDER BY id LIMIT ?""", [job, status, size])
+        else:
+            query = self.__execute(('page', sourceTable), """SELECT id, code FROM """ + sourceTable +
+                                   """ WHERE job = ? AND traitement = ? AND id > ? ORDER BY id LIMIT ?""",
+                                   [job, status, lastId, size])
+        if query is None:
+            return None
+        measures = []
+        while query.next():
+            measures.append((int(query.value(0)), query.value(1)))
+        return measures
+
+    def copy(self, sourceTable, targetTable, geometry, job, status, code, firstId, lastId):
+        """
+        To copy the geometries of the measures of a job with a status and a code, in an ids range, into a target table
+        :param sourceTable: the measures table
+        :param targetTable: the target table
+        :param geometry: the geometry column name, in both tables
+        :param job: the job
+        :param status: the 'traitement' status
+        :param code: the measures code
+        :param firstId: the first id of the range
+        :param lastId: the last id of the range
+        :return: the number of copied measures, or none if it failed
+        """
+        query = self.__execute(('copy', sourceTable, targetTable, geometry),
+                               """INSERT INTO """ + targetTable + """ (""" + geometry + """) SELECT """ + geometry +
+                               """ FROM """ + sourceTable +
+                               """ WHERE job = ? AND traitement = ? AND code = ? AND id >= ? AND id <= ?""",
+                               [job, status, code, firstId, lastId])
+        if query is None:
+            return None
+        return query.numRowsAffected()
+
+    def setStatus(self, sourceTable, job, status, newStatus, lastId):
+        """
+        To change the status of the measures of a job at once, up to an id
+        :param sourceTable: the measures table
+        :param job: the job
+        :param status: the current 'traitement' status of the measures to change
+        :param newStatus: the new 'traitement' status
+        :param lastId: the highest id of the measures to change
+        :return: the number of changed measures, or none if it failed
+        """
+        query = self.__execute(('setStatus', sourceTable), """UPDATE """ + sourceTable +
+                               """ SET traitement = ? WHERE job = ? AND traitement = ? AND id <= ?""",
+                               [newStatus, job, status, lastId])
+        if query is None:
+            return None
+        return query.numRowsAffected()
@@ -0,0 +1,220 @@
+# -*- coding: utf-8 -*-
+"""
+/***************************************************************************
+ VDLTools
+                                 A QGIS plugin for the Ville de Lausanne
+                              -------------------
+        begin                : 2016-11-02
+        git sha              : $Format:%H$
+        copyright            : (C) 2016 Ville de Lausanne
+        author               : Christophe Gusthiot
+        email                : christophe.gusthiot@lausanne.ch
+ ***************************************************************************/
+
+/***************************************************************************
+ *                                                                         *
+ *   This program is free software; you can redistribute it and/or modify  *
+ *   it under the terms of the GNU General Public License as published by  *
+ *   the Free Software Foundation; either version 2 of the License, or     *
+ *   (at your option) any later version.                                   *
+ *                                                                         *
+ ***************************************************************************/
+"""
+
+from PyQt4.QtCore import (QObject,
+                          QCoreApplication,
+                          pyqtSignal,
+                          pyqtSlot)
+from .db_connector import DBConnector
+from .jobs_cache import JobsCache
+from .measures_importer import MeasuresImporter
+from .measures_queries import MeasuresQueries
+
+
+class MeasuresWorker(QObject):
+
+    # number of ids read again below the highest id already read, for the measures of transactions having taken
+    # their ids before it but committed after it was read
+    ID_OVERLAP = 10000
+
+    # emitted from the GUI thread, to run the queries in the worker thread
+    jobsRequested = pyqtSignal(str, str, bool)
+    importRequested = pyqtSignal(str)
+    shutdownRequested = pyqtSignal()
+    # emitted from the worker thread, received in the GUI thread
+    jobsListed = pyqtSignal(list, bool)
+    progressed = pyqtSignal(int, int)
+    imported = pyqtSignal(dict)
+    cancelled = pyqtSignal()
+    failed = pyqtSignal(str)
+
+    def __init__(self):
+        """
+        Constructor, the worker has then to be moved to its thread
+        """
+        QObject.__init__(self)
+        self.__db = None
+        self.__queries = None
+        self.__dbName = None
+        self.__configTable = None
+        self.__sourceTable = ""
+        self.__jobsCache = JobsCache()
+        self.__cancelled = False
+        self.jobsRequested.connect(self.listJobs)
+        self.importRequested.connect(self.importJob)
+        self.shutdownRequested.connect(self.shutdown)
+
+    def requestJobs(self, dbName, configTable, refresh=False):
+        """
+        To ask from the GUI thread for the jobs to be imported, answered by jobsListed or failed
+        :param dbName: the name of the database
+        :param configTable: the config table, giving the source and the target tables
+        :param refresh: if the whole measures table has to be read again, instead of the measures added since
+        the previous listing
+        """
+        self.jobsRequested.emit(dbName, configTable, refresh)
+
+    def requestImport(self, job):
+        """
+        To ask from the GUI thread for a job import, answered by imported, cancelled or failed, with progressed
+        meanwhile
+        :param job: the job to import
+        """
+        self.__cancelled = False
+        self.importRequested.emit(job)
+
+    def requestShutdown(self):
+        """
+        To ask from the GUI thread for the worker to close its connections and stop its thread, after the running
+        request
+        """
+        self.shutdownRequested.emit()
+
+    def cancel(self):
+        """
+        To cancel the running import, from the GUI thread
+        """
+        self.__cancelled = True
+
+    def __isCancelled(self):
+        """
+        To check if the running import has been cancelled
+        :return: true if it has been cancelled, false otherwise
+        """
+        return self.__cancelled
+
+    @pyqtSlot(str, str, bool)
+    def listJobs(self, dbName, configTable, refresh):
+        """
+        To list the jobs to be imported, in the worker thread
+        :param dbName: the name of the database
+        :param configTable: the config table, giving the source and the target tables
+        :param refresh: if the whole measures table has to be read again
+        """
+        self.__dbName = dbName
+        self.__configTable = configTable
+        if not self.__connect():
+            return
+        sources = self.__queries.sources()
+        jobs = None
+        several = False
+        self.__sourceTable = ""
+        if sources is not None:
+            for source in sources:
+                if self.__sourceTable == "":
+                    self.__sourceTable = source
+                elif self.__sourceTable != source:
+                    several = True
+            jobs = self.__listJobs(refresh)
+        if jobs is None:
+            self.__queryFailed()
+            return
+        self.__release()
+        self.jobsListed.emit(jobs, several)
+
+    def __listJobs(self, refresh):
+        """
+        To list the jobs from the cache, only reading the measures added since the highest id already read (and the
+        ID_OVERLAP ones before it), or the whole table for a refresh or another table
+        (as the ids are not given in commit order, the measures of a transaction committed after the highest id was
+        read, with ids more than ID_OVERLAP below it, need a refresh, as a status changed elsewhere on measures
+        already read)
+        :param refresh: if the whole measures table has to be read again
+        :return: jobs list, or none if a query failed
+        """
+        lastId = self.__queries.lastId(self.__sourceTable)
+        if lastId is None:
+            return None
+        key = (self.__dbName, self.__configTable, self.__sourceTable)
+        if refresh or not self.__jobsCache.isFor(key):
+            jobs = self.__queries.jobs(self.__sourceTable, MeasuresImporter.TO_IMPORT)
+            if jobs is None:
+                return None
+            self.__jobsCache.refresh(key, jobs, lastId)
+        else:
+            jobs = self.__queries.jobsBetween(self.__sourceTable, MeasuresImporter.TO_IMPORT,
+                                              self.__jobsCache.lastId() - self.ID_OVERLAP, lastId)
+            if jobs is None:
+                return None
+            self.__jobsCache.add(jobs, lastId)
+        return self.__jobsCache.jobs()
+
+    @pyqtSlot(str)
+    def importJob(self, job):
+        """
+        To import a job listed before, in the worker thread
+        :param job: the job to import
+        """
+        if not self.__connect():
+            return
+        importer = MeasuresImporter(self.__queries, self.__sourceTable)
+        inserted = importer.importJob(job, self.progressed.emit, self.__isCancelled)
+        self.__release()
+        if inserted is not None:
+            self.__jobsCache.remove(job)
+            self.imported.emit(inserted)
+        elif importer.lastError() is None:
+            self.cancelled.emit()
+        else:
+            self.failed.emit(QCoreApplication.translate("VDLTools", "Database Error: ") + importer.lastError())
+
+    @pyqtSlot()
+    def shutdown(self):
+        """
+        To close the connections of this thread, which cannot be closed from another one, and stop the thread
+        """
+        self.__queries = None
+        self.__release()
+        DBConnector.closeThread()
+        self.thread().quit()
+
+    def __release(self):
+        """
+        To give back the connection to the pool, which will give it again to this thread for the next query
+        """
+        if self.__db is not None:
+            DBConnector.release(self.__db)
+            self.__db = None
+
+    def __connect(self):
+        """
+        To get a connection from this thread, and its prepared queries, kept from one request to the next
+        :return: true if connected, false otherwise (failed has been emitted)
+        """
+        self.__db, error = DBConnector.connection(self.__dbName)
+        if self.__db is None:
+            self.failed.emit(error)
+            return False
+        if self.__queries is None or not self.__queries.db().isOpen() \
+                or self.__queries.db().connectionName() != self.__db.connectionName() \
+                or self.__queries.configTable() != self.__configTable:
+            self.__queries = MeasuresQueries(self.__db, self.__configTable)
+        return True
+
+    def __queryFailed(self):
+        """
+        To report a failed query and give back the connection
+        """
+        error = self.__queries.lastError()
+        self.__release()
+        self.failed.emit(QCoreApplication.translate("VDLTools", "Database Error: ") + error)
@@ -0,0 +1,115 @@
+# -*- coding: utf-8 -*-
+"""
+/***************************************************************************
+ VDLTools
+                                 A QGIS plugin for the Ville de Lausanne
+                              -------------------
+        begin                : 2016-10-14
+        git sha              : $Format:%H$
+        copyright            : (C) 2016 Ville de Lausanne
+        author               : Christophe Gusthiot
+        email                : christophe.gusthiot@lausanne.ch
+ ***************************************************************************/
+
+/***************************************************************************
+ *                                                                         *
+ *   This program is free software; you can redistribute it and/or modify  *
+ *   it under the terms of the GNU General Public License as published by  *
+ *   the Free Software Foundation; either version 2 of the License, or     *
+ *   (at your option) any later version.                                   *
+ *                                                                         *
+ ***************************************************************************/
+"""
+
+from time import time
+from PyQt4.QtCore import (QTimer,
+                          QPoint,
+                          QSettings)
+from qgis.core import QgsPoint
+
+
+class MoveThrottle:
+
+    # default number of handled mouse moves per second
+    DEFAULT_RATE = 25
+    # default distance, in pixels, the cursor has to move before a new position is handled
+    DEFAULT_DEAD_ZONE = 2
+
+    def __init__(self, mapCanvas, handler):
+        """
+        Constructor
+        :param mapCanvas: the map canvas on which the mouse moves
+        :param handler: called with the map position of the last coalesced move
+        """
+        self.__handler = handler
+        self.__interval = 0
+        self.setRate(int(QSettings().value("VDLTools/moveRate", self.DEFAULT_RATE)))
+        self.__deadZone = int(QSettings().value("VDLTools/moveDeadZone", self.DEFAULT_DEAD_ZONE))
+        self.__timer = QTimer()
+        self.__timer.setSingleShot(True)
+        self.__timer.timeout.connect(self.__process)
+        self.__pending = None
+        self.__lastPos = None
+        self.__lastTime = 0
+        mapCanvas.extentsChanged.connect(self.reset)
+
+    def setRate(self, rate):
+        """
+        To set the maximum number of handled moves per second
+        :param rate: moves per second, 0 to handle every move
+        """
+        if rate > 0:
+            self.__interval = 1.0 / rate
+        else:
+            self.__interval = 0
+
+    def push(self, event):
+        """
+        To add a mouse move, replacing the one not yet handled
+        :param event: mouse event
+        """
+        pos = QPoint(event.pos())
+        if self.__lastPos is not None and (pos - self.__lastPos).manhattanLength() <= self.__deadZone:
+            # back to the handled position, the waiting one is stale
+            self.cancel()
+            return
+        self.__pending = (pos, QgsPoint(event.mapPoint()))
+        wait = self.__lastTime + self.__interval - time()
+        if wait <= 0:
+            self.__process()
+        elif not self.__timer.isActive():
+            self.__timer.start(int(wait * 1000) + 1)
+
+    def flush(self):
+        """
+        To handle the waiting move now (before a click), and to handle the next one whatever its position
+        """
+        self.__process()
+        self.__lastPos = None
+
+    def cancel(self):
+        """
+        To drop the waiting move
+        """
+        self.__timer.stop()
+        self.__pending = None
+
+    def reset(self):
+        """
+        To drop the waiting move and forget the last handled position
+        """
+        self.cancel()
+        self.__lastPos = None
+
+    def __process(self):
+        """
+        To handle the waiting move
+        """
+        self.__timer.stop()
+        if self.__pending is None:
+            return
+        pos, mapPoint = self.__pending
+        self.__pending = None
+        self.__lastPos = pos
+        self.__lastTime = time()
+        self.__handler(mapPoint)
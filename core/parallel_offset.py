@@ -0,0 +1,134 @@
+# -*- coding: utf-8 -*-
+"""
+/***************************************************************************
+ VDLTools
+                                 A QGIS plugin for the Ville de Lausanne
+                              -------------------
+        begin                : 2016-10-20
+        git sha              : $Format:%H$
+        copyright            : (C) 2016 Ville de Lausanne
+        author               : Christophe Gusthiot
+        email                : christophe.gusthiot@lausanne.ch
+ ***************************************************************************/
+
+/***************************************************************************
+ *                                                                         *
+ *   This program is free software; you can redistribute it and/or modify  *
+ *   it under the terms of the GNU General Public License as published by  *
+ *   the Free Software Foundation; either version 2 of the License, or     *
+ *   (at your option) any later version.                                   *
+ *                                                                         *
+ ***************************************************************************/
+"""
+
+import numpy
+from qgis.core import QgsPointV2
+from .circle import Circle
+from .wkb_reader import WkbReader
+from .geometry_coordinates import GeometryCoordinates
+
+
+class ParallelOffset:
+
+    def __init__(self, coordinates):
+        """
+        Constructor, to calculate once the offset direction of every vertex
+        :param coordinates: coordinates of the line or polygon to offset, as GeometryCoordinates
+        """
+        self.__coordinates = coordinates
+        self.__directions = []
+        isPolygon = coordinates.geometryType() in [WkbReader.POLYGON, WkbReader.CURVE_POLYGON]
+        x = numpy.frombuffer(coordinates.xs(), dtype=numpy.float64)
+        y = numpy.frombuffer(coordinates.ys(), dtype=numpy.float64)
+        for part in xrange(coordinates.numParts()):
+            start, end = coordinates.partRange(part)
+            if isPolygon:
+                self.__directions.append(self.__ringDirections(x[start:end], y[start:end]))
+            elif coordinates.isCurved(part):
+                self.__directions.append(self.__arcDirections(x[start:end], y[start:end]))
+            else:
+                self.__directions.append(self.__lineDirections(x[start:end], y[start:end]))
+
+    def numParts(self):
+        """
+        To get the number of parts to offset
+        :return: number of parts
+        """
+        return self.__coordinates.numParts()
+
+    def offset(self, distances):
+        """
+        To create the parallel geometry
+        :param distances: offset distance of each part
+        :return: coordinates of the parallel geometry (with same elevations, without measures)
+        """
+        coordinates = self.__coordinates
+        x = numpy.frombuffer(coordinates.xs(), dtype=numpy.float64)
+        y = numpy.frombuffer(coordinates.ys(), dtype=numpy.float64)
+        zs = coordinates.zs()
+        parallel = GeometryCoordinates(coordinates.geometryType(), True, False)
+        for part in xrange(coordinates.numParts()):
+            start, end = coordinates.partRange(part)
+            cosines, sines, divisors = self.__directions[part]
+            dist = float(distances[part]) / divisors
+            if zs is not None:
+                z = zs[start:end]
+            else:
+                z = [0.0] * (end - start)
+            parallel.appendPart((x[start:end] + cosines * dist).tolist(), (y[start:end] + sines * dist).tolist(),
+                                z, None, coordinates.isCurved(part))
+        return parallel
+
+    @staticmethod
+    def __lineDirections(x, y):
+        """
+        To calculate the offset directions of an open line vertices, on the bisector of the adjacent segments
+        :param x: x coordinates array
+        :param y: y coordinates array
+        :return: cosines, sines and distance divisors arrays
+        """
+        segments = numpy.arctan2(numpy.diff(y), numpy.diff(x))
+        angles = numpy.empty(len(x))
+        divisors = numpy.ones(len(x))
+        angles[0] = segments[0] + numpy.pi / 2
+        angles[-1] = segments[-1] + numpy.pi / 2
+        angles[1:-1] = (numpy.pi + segments[:-1] + segments[1:]) / 2
+        divisors[1:-1] = numpy.sin((numpy.pi + segments[:-1] - segments[1:]) / 2)
+        return numpy.cos(angles), numpy.sin(angles), divisors
+
+    @staticmethod
+    def __ringDirections(x, y):
+        """
+        To calculate the offset directions of a closed ring vertices, on the bisector of the adjacent segments
+        :param x: x coordinates array
+        :param y: y coordinates array
+        :return: cosines, sines and distance divisors arrays
+        """
+        segments = numpy.arctan2(numpy.diff(y), numpy.diff(x))
+        before = numpy.concatenate((segments[-1:], segments))
+        after = numpy.concatenate((segments, segments[:1]))
+        angles = (numpy.pi + before + after) / 2
+        divisors = numpy.sin((numpy.pi + before - after) / 2)
+        return numpy.cos(angles), numpy.sin(angles), divisors
+
+    @staticmethod
+    def __arcDirections(x, y):
+        """
+        To calculate the offset directions of a circular string vertices, on the radius of their arc
+        (a vertex shared by two arcs follows the second one)
+        :param x: x coordinates array
+        :param y: y coordinates array
+        :return: cosines, sines and distance divisors arrays
+        """
+        num = len(x)
+        centersX = numpy.empty(num)
+        centersY = numpy.empty(num)
+        for arc in xrange(max(1, (num - 1) / 2)):
+            first = 2 * arc
+            circle = Circle(QgsPointV2(x[first], y[first]), QgsPointV2(x[first + 1], y[first + 1]),
+                            QgsPointV2(x[first + 2], y[first + 2]))
+            center = circle.center()
+            centersX[first:first + 3] = center.x()
+            centersY[first:first + 3] = center.y()
+        angles = numpy.arctan2(y - centersY, x - centersX)
+        return numpy.cos(angles), numpy.sin(angles), numpy.ones(num)
@@ -0,0 +1,183 @@
+# -*- coding: utf-8 -*-
+"""
+/***************************************************************************
+ VDLTools
+                                 A QGIS plugin for the Ville de Lausanne
+                              -------------------
+        begin                : 2016-10-24
+        git sha              : $Format:%H$
+        copyright            : (C) 2016 Ville de Lausanne
+        author               : Christophe Gusthiot
+        email                : christophe.gusthiot@lausanne.ch
+ ***************************************************************************/
+
+/***************************************************************************
+ *                                                                         *
+ *   This program is free software; you can redistribute it and/or modify  *
+ *   it under the terms of the GNU General Public License as published by  *
+ *   the Free Software Foundation; either version 2 of the License, or     *
+ *   (at your option) any later version.                                   *
+ *                                                                         *
+ ***************************************************************************/
+"""
+
+import numpy
+
+
+class Profile:
+
+    def __init__(self, x, y, z, numLines):
+        """
+        Constructor
+        :param x: x coordinates of the profile vertices
+        :param y: y coordinates of the profile vertices
+        :param z: elevations matrix (one row per vertex, one column per line then per points layer), with none
+        where there is no elevation
+        :param numLines: number of selected connected lines
+        """
+        self.__x = numpy.array(x, dtype=numpy.float64)
+        self.__y = numpy.array(y, dtype=numpy.float64)
+        self.__numLines = numLines
+        self.__lengths = numpy.zeros(len(self.__x))
+        if len(self.__x) > 1:
+            numpy.cumsum(numpy.hypot(numpy.diff(self.__x), numpy.diff(self.__y)), out=self.__lengths[1:])
+        values = numpy.array([[numpy.nan if v is None else v for v in row] for row in z], dtype=numpy.float64)
+        self.__z = numpy.ma.masked_invalid(values.reshape(len(self.__x), -1))
+        self.__z.mask = numpy.ma.getmaskarray(self.__z)
+
+    @staticmethod
+    def fromPoints(points, numLines):
+        """
+        To create the profile from vertices dictionaries
+        :param points: vertices as {'x', 'y', 'z': elevations list} dictionaries
+        :param numLines: number of selected connected lines
+        :return: the profile
+        """
+        return Profile([point['x'] for point in points], [point['y'] for point in points],
+                       [point['z'] for point in points], numLines)
+
+    def numPoints(self):
+        """
+        To get the number of vertices
+        :return: number of vertices
+        """
+        return len(self.__x)
+
+    def numLines(self):
+        """
+        To get the number of selected connected lines
+        :return: number of lines
+        """
+        return self.__numLines
+
+    def numColumns(self):
+        """
+        To get the number of elevation columns (lines then points layers)
+        :return: number of columns
+        """
+        return self.__z.shape[1]
+
+    def x(self):
+        """
+        To get the x coordinates of the vertices
+        :return: x array
+        """
+        return self.__x
+
+    def y(self):
+        """
+        To get the y coordinates of the vertices
+        :return: y array
+        """
+        return self.__y
+
+    def lengths(self):
+        """
+        To get the cumulative distance along the profile at each vertex
+        :return: distances array
+        """
+        return self.__lengths
+
+    def length(self):
+        """
+        To get the profile length
+        :return: the length
+        """
+        if len(self.__lengths) == 0:
+            return 0
+        return self.__lengths[-1]
+
+    def z(self):
+        """
+        To get the elevations matrix
+        :return: masked elevations array, masked where there is no elevation
+        """
+        return self.__z
+
+    def lineCounts(self):
+        """
+        To get the number of lines having an elevation at each vertex
+        :return: counts array
+        """
+        return (~self.__z.mask[:, :self.__numLines]).sum(axis=1)
+
+    def minimum(self):
+        """
+        To get the lowest elevation
+        :return: lowest elevation, or none
+        """
+        if self.__z.count() == 0:
+            return None
+        return float(self.__z.min())
+
+    def maximum(self):
+        """
+        To get the highest elevation
+        :return: highest elevation, or none
+        """
+        if self.__z.count() == 0:
+            return None
+        return float(self.__z.max())
+
+    def segments(self, column):
+        """
+        To get the continuous parts of an elevation column
+        :param column: column number
+        :return: list of (distances, elevations) arrays
+        """
+        values = self.__z[:, column]
+        return [(self.__lengths[s], values.data[s]) for s in numpy.ma.clump_unmasked(values)]
+
+    def series(self, column):
+        """
+        To get an elevation column with its distances
+        :param column: column number
+        :return: distances array, and masked elevations array
+        """
+        return self.__lengths, self.__z[:, column]
+
+    def checks(self):
+        """
+        To compare the elevations of the lines between them, and with the points ones
+        :return: situations (elevation differences between line and points) as {'point', 'layer', 'vertex'}
+        dictionaries, and differences (elevation differences between lines) as {'point', 'v1', 'v2'} dictionaries
+        """
+        numLines = self.__numLines
+        missing = self.__z.mask
+        values = self.__z.filled(numpy.nan)
+        rows = numpy.arange(self.numPoints())
+        lineDefined = ~missing[:, :numLines]
+        counts = self.lineCounts()
+        z0 = values[rows, lineDefined.argmax(axis=1)]
+        z1 = values[rows, numLines - 1 - lineDefined[:, ::-1].argmax(axis=1)]
+        tol = 0.01 * z0
+        with numpy.errstate(invalid='ignore'):
+            isDifference = (counts == 2) & (numpy.abs(z1 - z0) > tol)
+            isChecked = (counts == 1) | ((counts == 2) & ~isDifference)
+            isSituation = ~missing[:, numLines:] & (numpy.abs(values[:, numLines:] - z0[:, None]) > tol[:, None])
+        isSituation &= isChecked[:, None]
+        differences = [{'point': int(p), 'v1': float(z0[p]), 'v2': float(z1[p])}
+                       for p in numpy.flatnonzero(isDifference)]
+        situations = [{'point': int(p), 'layer': int(i) + 1, 'vertex': float(z0[p])}
+                      for p, i in numpy.argwhere(isSituation)]
+        return situations, differences
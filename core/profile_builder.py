@@ -0,0 +1,224 @@
+# -*- coding: utf-8 -*-
+"""
+/***************************************************************************
+ VDLTools
+                                 A QGIS plugin for the Ville de Lausanne
+                              -------------------
+        begin                : 2016-10-25
+        git sha              : $Format:%H$
+        copyright            : (C) 2016 Ville de Lausanne
+        author               : Christophe Gusthiot
+        email                : christophe.gusthiot@lausanne.ch
+ ***************************************************************************/
+
+/***************************************************************************
+ *                                                                         *
+ *   This program is free software; you can redistribute it and/or modify  *
+ *   it under the terms of the GNU General Public License as published by  *
+ *   the Free Software Foundation; either version 2 of the License, or     *
+ *   (at your option) any later version.                                   *
+ *                                                                         *
+ ***************************************************************************/
+"""
+
+from qgis.core import (QgsRectangle,
+                       QgsFeature,
+                       QgsFeatureRequest)
+from .geometry_v2 import GeometryV2
+from .vertex_index import VertexIndex
+from .profile import Profile
+
+
+class ProfileBuilder:
+
+    POINTS_TOLERANCE = 0.03
+
+    def __init__(self, features, directions, tolerance=POINTS_TOLERANCE):
+        """
+        Constructor, to merge the vertices of connected lines
+        :param features: the lines features, in chain order (none for a missing one)
+        :param directions: for each line, true if it is followed from its first vertex, false otherwise
+        :param tolerance: the search tolerance for the points around the vertices
+        """
+        self.__tolerance = tolerance
+        self.__numLines = len(features)
+        self.__points = []
+        self.__starts = []
+        self.__indexes = {}
+        self.__features = []
+        positions = {}
+        for num in xrange(self.__numLines):
+            self.__starts.append(max(0, len(self.__points)-1))
+            if features[num] is None:
+                continue
+            coordinates = GeometryV2.asCoordinates(features[num].geometry())
+            xs = coordinates.xs()
+            ys = coordinates.ys()
+            zs = coordinates.zs()
+            if directions[num]:
+                rg = xrange(coordinates.numPoints())
+            else:
+                rg = xrange(coordinates.numPoints()-1, -1, -1)
+            for i in rg:
+                x = xs[i]
+                y = ys[i]
+                pos = positions.get((x, y))
+                if pos is not None:
+                    self.__points[pos]['z'][num] = zs[i]
+                else:
+                    z = [None] * self.__numLines
+                    z[num] = zs[i]
+                    positions[(x, y)] = len(self.__points)
+                    self.__points.append({'x': x, 'y': y, 'z': z})
+
+    @staticmethod
+    def chainDirections(features):
+        """
+        To find in which direction each line of a chain has to be followed
+        :param features: the lines features, in chain order
+        :return: directions list (true if followed from the first vertex), or none if the lines are not connected
+        """
+        ends = []
+        for feature in features:
+            coordinates = GeometryV2.asCoordinates(feature.geometry())
+            if coordinates is None or coordinates.numPoints() == 0:
+                return None
+            last = coordinates.numPoints()-1
+            ends.append(((coordinates.xs()[0], coordinates.ys()[0]),
+                         (coordinates.xs()[last], coordinates.ys()[last])))
+        if len(ends) < 2:
+            return [True] * len(ends)
+        if ends[0][1] in ends[1]:
+            directions = [True]
+            vertex = ends[0][1]
+        elif ends[0][0] in ends[1]:
+            directions = [False]
+            vertex = ends[0][0]
+        else:
+            return None
+        for start, end in ends[1:]:
+            if start == vertex:
+                directions.append(True)
+                vertex = end
+            elif end == vertex:
+                directions.append(False)
+                vertex = start
+            else:
+                return None
+        return directions
+
+    def numLines(self):
+        """
+        To get the number of connected lines
+        :return: number of lines
+        """
+        return self.__numLines
+
+    def points(self):
+        """
+        To get the merged vertices
+        :return: vertices as {'x', 'y', 'z': elevations list} dictionaries
+        """
+        return self.__points
+
+    def starts(self):
+        """
+        To get the position of the first vertex of each line in the merged vertices
+        :return: positions list
+        """
+        return self.__starts
+
+    def features(self):
+        """
+        To get the points matched to the vertices
+        :return: for each vertex, the list of matched points features (or none) by layer
+        """
+        return self.__features
+
+    def __indexPoints(self, layers):
+        """
+        To fetch once the points of each layer around the profile vertices, and to index them by position
+        :param layers: the points layers not yet indexed
+        """
+        if len(self.__points) == 0:
+            for layer in layers:
+                self.__indexes[layer.id()] = VertexIndex(self.__tolerance)
+            return
+        tolerance = self.__tolerance
+        xs = [point['x'] for point in self.__points]
+        ys = [point['y'] for point in self.__points]
+        request = QgsFeatureRequest()
+        request.setFilterRect(QgsRectangle(min(xs) - tolerance, min(ys) - tolerance,
+                                           max(xs) + tolerance, max(ys) + tolerance))
+        request.setSubsetOfAttributes([])
+        for layer in layers:
+            index = VertexIndex(tolerance)
+            for feature in layer.getFeatures(request):
+                if feature.geometry() is None:
+                    continue
+                point = feature.geometry().asPoint()
+                index.add(point.x(), point.y(), QgsFeature(feature))
+            self.__indexes[layer.id()] = index
+
+    def __layersIndexes(self, layers):
+        """
+        To get the points indexes of layers, indexing the missing ones
+        :param layers: the points layers
+        :return: indexes list
+        """
+        self.__indexPoints([layer for layer in layers if layer.id() not in self.__indexes])
+        return [self.__indexes[layer.id()] for layer in layers]
+
+    def pointLayers(self, layers):
+        """
+        To find the points layers having points on the profile vertices
+        :param layers: the available points layers
+        :return: layers list, ordered by first matched vertex
+        """
+        indexes = self.__layersIndexes(layers)
+        firsts = []
+        for order in xrange(len(layers)):
+            for pos in xrange(len(self.__points)):
+                if indexes[order].closest(self.__points[pos]['x'], self.__points[pos]['y']) is not None:
+                    firsts.append([pos, order])
+                    break
+        firsts.sort()
+        return [layers[order] for pos, order in firsts]
+
+    def setLayers(self, layers):
+        """
+        To match the points of the chosen layers to the profile vertices, and add their elevations
+        :param layers: the chosen points layers
+        :return: for each vertex, the list of matched points features (or none) by layer
+        """
+        indexes = self.__layersIndexes(layers)
+        self.__features = []
+        for points in self.__points:
+            feat = []
+            x = points['x']
+            y = points['y']
+            z = points['z']
+            del z[self.__numLines:]
+            for index in indexes:
+                point = index.closest(x, y)
+                feat.append(point)
+                if point is None:
+                    z.append(None)
+                else:
+                    point_v2 = GeometryV2.asPointV2(point.geometry())
+                    zp = point_v2.z()
+                    if zp is None or zp != zp:
+                        z.append(0)
+                    else:
+                        z.append(zp)
+            self.__features.append(feat)
+        return self.__features
+
+    def profile(self):
+        """
+        To get the columnar profile of the merged vertices and matched points
+        :return: the profile, or none if there is no vertex
+        """
+        if len(self.__points) == 0:
+            return None
+        return Profile.fromPoints(self.__points, self.__numLines)
@@ -0,0 +1,216 @@
+# -*- coding: utf-8 -*-
+"""
+/***************************************************************************
+ VDLTools
+                                 A QGIS plugin for the Ville de Lausanne
+                              -------------------
+        begin                : 2016-10-25
+        git sha              : $Format:%H$
+        copyright            : (C) 2016 Ville de Lausanne
+        author               : Christophe Gusthiot
+        email                : christophe.gusthiot@lausanne.ch
+ ***************************************************************************/
+
+/***************************************************************************
+ *                                                                         *
+ *   This program is free software; you can redistribute it and/or modify  *
+ *   it under the terms of the GNU General Public License as published by  *
+ *   the Free Software Foundation; either version 2 of the License, or     *
+ *   (at your option) any later version.                                   *
+ *                                                                         *
+ ***************************************************************************/
+"""
+
+import os
+import csv
+from PyQt4.QtCore import QCoreApplication
+from qgis.core import (QgsFeature,
+                       QgsFeatureRequest,
+                       QGis,
+                       QgsWKBTypes)
+from matplotlib.figure import Figure
+from matplotlib.backends.backend_agg import FigureCanvasAgg
+from .profile_builder import ProfileBuilder
+
+
+class ProfileExporter:
+
+    FORMATS = ['pdf', 'png', 'svg', 'csv']
+    # same colors order than the profile dock widget
+    COLORS = ['#ff0000', '#00ff00', '#0000ff', '#00ffff', '#ff00ff', '#ffff00']
+    FIGURE_SIZE = (11.69, 8.27)
+    SUMMARY = 'profiles.csv'
+
+    def __init__(self, lineLayer, pointLayers, directory, formats=None):
+        """
+        Constructor
+        :param lineLayer: the lines layer, with elevations
+        :param pointLayers: the points layers to compare with the lines, with elevations
+        :param directory: the output directory
+        :param formats: the files formats to write, among FORMATS, all of them if none
+        """
+        if QGis.fromOldWkbType(lineLayer.wkbType()) != QgsWKBTypes.LineStringZ:
+            raise ValueError("the lines layer " + lineLayer.name().encode('utf-8') + " has no elevations")
+        for layer in pointLayers:
+            if QGis.fromOldWkbType(layer.wkbType()) != QgsWKBTypes.PointZ:
+                raise ValueError("the points layer " + layer.name().encode('utf-8') + " has no elevations")
+        self.__lineLayer = lineLayer
+        self.__pointLayers = pointLayers
+        self.__directory = directory
+        if formats is None:
+            formats = self.FORMATS
+        self.__formats = [extension for extension in formats if extension in self.FORMATS]
+        self.__names = [lineLayer.name()] + [layer.name() for layer in pointLayers]
+        self.__distanceLabel = QCoreApplication.translate("VDLTools","Distance [m]")
+        self.__elevationLabel = QCoreApplication.translate("VDLTools","Elevation [m]")
+
+    def export(self, chains, names=None):
+        """
+        To compute the profiles of lines chains, and write their files, one chain after the other
+        (neither the layers nor matplotlib can be shared between threads, and drawing holds the GIL)
+        :param chains: lists of lines features ids, each one in chain order
+        :param names: the files names (without extension) of each chain, 'profile_<number>' if none
+        :return: reports list, as {'name', 'fids', 'length', 'situations', 'differences', 'files', 'error'}
+        dictionaries, a failed chain having its error and no files
+        """
+        if not os.path.isdir(self.__directory):
+            os.makedirs(self.__directory)
+        reports = []
+        for num in xrange(len(chains)):
+            if names is not None:
+                name = names[num]
+            else:
+                name = 'profile_%d' % num
+            report = {'name': name, 'fids': list(chains[num]), 'length': None, 'situations': [],
+                      'differences': [], 'files': [], 'error': None}
+            reports.append(report)
+            try:
+                profile = self.__calculateProfile(report)
+                if profile is not None:
+                    report['files'] = self.__writeProfile(name, report['fids'], profile)
+            except Exception, e:
+                report['error'] = str(e)
+        self.__writeSummary(reports)
+        return reports
+
+    def __calculateProfile(self, report):
+        """
+        To calculate the profile of a lines chain, with the same vertices and points matching than the profile tool
+        :param report: the chain report, completed with the checks results or the error
+        :return: the profile, or none
+        """
+        fids = report['fids']
+        found = {}
+        for feature in self.__lineLayer.getFeatures(QgsFeatureRequest().setFilterFids(set(fids))):
+            found[feature.id()] = QgsFeature(feature)
+        missing = [fid for fid in fids if fid not in found]
+        if len(missing) > 0:
+            report['error'] = "missing features " + " ".join(str(fid) for fid in missing)
+            return None
+        features = [found[fid] for fid in fids]
+        directions = ProfileBuilder.chainDirections(features)
+        if directions is None:
+            report['error'] = "lines are not connected"
+            return None
+        builder = ProfileBuilder(features, directions)
+        builder.setLayers(self.__pointLayers)
+        profile = builder.profile()
+        if profile is None:
+            report['error'] = "no vertex"
+            return None
+        report['length'] = profile.length()
+        report['situations'], report['differences'] = profile.checks()
+        return profile
+
+    def __writeProfile(self, name, fids, profile):
+        """
+        To write the files of a profile
+        :param name: the files name, without extension
+        :param fids: the lines features ids
+        :param profile: the profile
+        :return: written files paths
+        """
+        path = os.path.join(self.__directory, name)
+        files = []
+        plotted = [extension for extension in self.__formats if extension != 'csv']
+        if len(plotted) > 0:
+            figure = self.__drawProfile(name, profile)
+            for extension in plotted:
+                figure.savefig(path + '.' + extension, format=extension)
+                files.append(path + '.' + extension)
+        if 'csv' in self.__formats:
+            with open(path + '.csv', 'wb') as csvFile:
+                self.__writeCsv(csvFile, fids, profile)
+            files.append(path + '.csv')
+        return files
+
+    def __drawProfile(self, name, profile):
+        """
+        To draw a profile on its own figure, without any widget
+        :param name: the profile title
+        :param profile: the profile
+        :return: the figure
+        """
+        figure = Figure(self.FIGURE_SIZE)
+        FigureCanvasAgg(figure)
+        axes = figure.add_subplot(111)
+        numLines = profile.numLines()
+        for i in xrange(profile.numColumns()):
+            if i < numLines:
+                v = 0
+            else:
+                v = i - numLines + 1
+            color = self.COLORS[v % len(self.COLORS)]
+            if i == 0 or i > (numLines-1):
+                label = self.__names[v]
+            else:
+                label = '_nolegend_'
+            xx, yy = profile.series(i)
+            if i < numLines:
+                axes.plot(xx, yy, linewidth=3, color=color, label=label)
+            else:
+                axes.plot(xx, yy, marker='o', markersize=5, linestyle='None', color=color, label=label)
+        axes.set_title(name)
+        axes.set_xlabel(self.__distanceLabel)
+        axes.set_ylabel(self.__elevationLabel)
+        axes.grid(True, color='grey', linestyle=':')
+        axes.legend(loc='best', fontsize='small', numpoints=1)
+        return figure
+
+    def __writeCsv(self, csvFile, fids, profile):
+        """
+        To write the vertices of a profile, with one elevation column per line then per points layer
+        :param csvFile: the file object
+        :param fids: the lines features ids
+        :param profile: the profile
+        """
+        numLines = profile.numLines()
+        header = ['distance', 'x', 'y']
+        for i in xrange(profile.numColumns()):
+            if i < numLines:
+                header.append(self.__names[0] + ' ' + str(fids[i]))
+            else:
+                header.append(self.__names[i - numLines + 1])
+        lengths = profile.lengths().tolist()
+        xs = profile.x().tolist()
+        ys = profile.y().tolist()
+        values = profile.z().data.tolist()
+        mask = profile.z().mask.tolist()
+        writer = csv.writer(csvFile)
+        writer.writerow([title.encode('utf-8') for title in header])
+        for row in xrange(profile.numPoints()):
+            writer.writerow([lengths[row], xs[row], ys[row]] +
+                            ['' if masked else value for value, masked in zip(values[row], mask[row])])
+
+    def __writeSummary(self, reports):
+        """
+        To write one line by chain with its checks results or its error
+        :param reports: the chains reports
+        """
+        with open(os.path.join(self.__directory, self.SUMMARY), 'wb') as csvFile:
+            writer = csv.writer(csvFile)
+            writer.writerow(['name', 'fids', 'length', 'situations', 'differences', 'error'])
+            for report in reports:
+                writer.writerow([report['name'].encode('utf-8'), " ".join(str(fid) for fid in report['fids']),
+                                 report['length'], len(report['situations']), len(report['differences']),
+                                 (report['error'] or '').encode('utf-8')])
@@ -0,0 +1,95 @@
+# -*- coding: utf-8 -*-
+"""
+/***************************************************************************
+ VDLTools
+                                 A QGIS plugin for the Ville de Lausanne
+                              -------------------
+        begin                : 2016-10-12
+        git sha              : $Format:%H$
+        copyright            : (C) 2016 Ville de Lausanne
+        author               : Christophe Gusthiot
+        email                : christophe.gusthiot@lausanne.ch
+ ***************************************************************************/
+
+/***************************************************************************
+ *                                                                         *
+ *   This program is free software; you can redistribute it and/or modify  *
+ *   it under the terms of the GNU General Public License as published by  *
+ *   the Free Software Foundation; either version 2 of the License, or     *
+ *   (at your option) any later version.                                   *
+ *                                                                         *
+ ***************************************************************************/
+"""
+
+from qgis.core import (QgsProject,
+                       QgsSnapper,
+                       QgsPointLocator,
+                       QgsSnappingUtils,
+                       QgsVectorLayer)
+from qgis.gui import QgsMapCanvasSnappingUtils
+
+
+class SnappingContext:
+
+    def __init__(self, mapCanvas):
+        """
+        Constructor
+        :param mapCanvas: the map canvas on which we snap
+        """
+        self.__canvas = mapCanvas
+        self.__snappingUtils = QgsMapCanvasSnappingUtils(mapCanvas)
+        self.__snappingUtils.setSnapToMapMode(QgsSnappingUtils.SnapAdvanced)
+        self.__snapOnIntersections = None
+        self.__layersConfig = None
+        self.__canvas.layersChanged.connect(self.invalidate)
+        QgsProject.instance().snapSettingsChanged.connect(self.invalidate)
+
+    def release(self):
+        """
+        To stop listening to the canvas and project changes
+        """
+        self.__canvas.layersChanged.disconnect(self.invalidate)
+        QgsProject.instance().snapSettingsChanged.disconnect(self.invalidate)
+        self.__layersConfig = None
+
+    def invalidate(self):
+        """
+        To rebuild the snapping layers configuration at next use
+        """
+        self.__layersConfig = None
+
+    def layersConfig(self):
+        """
+        To get the snapping configuration of the canvas vector layers
+        :return: list of QgsSnappingUtils.LayerConfig for the layers with snapping enabled
+        """
+        if self.__layersConfig is None:
+            self.__layersConfig = []
+            types = [0, 1, 2]
+            for layer in self.__canvas.layers():
+                if isinstance(layer, QgsVectorLayer) and layer.geometryType() in types:
+                    noUse, enabled, snappingType, unitType, tolerance, avoidIntersection = \
+                        QgsProject.instance().snapSettingsForLayer(layer.id())
+                    if enabled:
+                        if snappingType == QgsSnapper.SnapToVertex:
+                            snap_type = QgsPointLocator.Vertex
+                        elif snappingType == QgsSnapper.SnapToSegment:
+                            snap_type = QgsPointLocator.Edge
+                        else:
+                            snap_type = QgsPointLocator.All
+                        self.__layersConfig.append(QgsSnappingUtils.LayerConfig(layer, snap_type, tolerance,
+                                                                                unitType))
+            self.__snappingUtils.setLayers(self.__layersConfig)
+        return self.__layersConfig
+
+    def snappingUtils(self, snapOnIntersections):
+        """
+        To get the snapping utils configured for the canvas layers
+        :param snapOnIntersections: if we want to snap on intersections
+        :return: the QgsSnappingUtils instance owned by this context
+        """
+        self.layersConfig()
+        if snapOnIntersections != self.__snapOnIntersections:
+            self.__snapOnIntersections = snapOnIntersections
+            self.__snappingUtils.setSnapOnIntersections(snapOnIntersections)
+        return self.__snappingUtils
@@ -0,0 +1,61 @@
+# -*- coding: utf-8 -*-
+"""
+/***************************************************************************
+ VDLTools
+                                 A QGIS plugin for the Ville de Lausanne
+                              -------------------
+        begin                : 2016-10-26
+        git sha              : $Format:%H$
+        copyright            : (C) 2016 Ville de Lausanne
+        author               : Christophe Gusthiot
+        email                : christophe.gusthiot@lausanne.ch
+ ***************************************************************************/
+
+/***************************************************************************
+ *                                                                         *
+ *   This program is free software; you can redistribute it and/or modify  *
+ *   it under the terms of the GNU General Public License as published by  *
+ *   the Free Software Foundation; either version 2 of the License, or     *
+ *   (at your option) any later version.                                   *
+ *                                                                         *
+ ***************************************************************************/
+"""
+
+from .line_topology import LineTopology
+
+
+class TopologyCache:
+
+    def __init__(self):
+        """
+        Constructor
+        """
+        self.__topologies = {}
+
+    def layerTopology(self, layer):
+        """
+        To get the topology of a lines layer, created if needed and built at first query
+        :param layer: the lines layer
+        :return: the layer topology
+        """
+        topology = self.__topologies.get(layer.id())
+        if topology is None:
+            topology = LineTopology(layer, self.remove)
+            self.__topologies[layer.id()] = topology
+        return topology
+
+    def remove(self, layerId):
+        """
+        To remove the topology of a layer
+        :param layerId: the layer id
+        """
+        topology = self.__topologies.pop(layerId, None)
+        if topology is not None:
+            topology.release()
+
+    def clear(self):
+        """
+        To remove all the topologies
+        """
+        for layerId in list(self.__topologies.keys()):
+            self.remove(layerId)
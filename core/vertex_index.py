@@ -0,0 +1,89 @@
+# -*- coding: utf-8 -*-
+"""
+/***************************************************************************
+ VDLTools
+                                 A QGIS plugin for the Ville de Lausanne
+                              -------------------
+        begin                : 2016-10-21
+        git sha              : $Format:%H$
+        copyright            : (C) 2016 Ville de Lausanne
+        author               : Christophe Gusthiot
+        email                : christophe.gusthiot@lausanne.ch
+ ***************************************************************************/
+
+/***************************************************************************
+ *                                                                         *
+ *   This program is free software; you can redistribute it and/or modify  *
+ *   it under the terms of the GNU General Public License as published by  *
+ *   the Free Software Foundation; either version 2 of the License, or     *
+ *   (at your option) any later version.                                   *
+ *                                                                         *
+ ***************************************************************************/
+"""
+
+from math import floor
+
+
+class VertexIndex:
+
+    def __init__(self, tolerance):
+        """
+        Constructor
+        :param tolerance: the search tolerance, also used as buckets size
+        """
+        self.__tolerance = tolerance
+        self.__buckets = {}
+        self.__size = 0
+
+    def __len__(self):
+        """
+        To get the number of indexed positions
+        :return: the number of positions
+        """
+        return self.__size
+
+    def __key(self, x, y):
+        """
+        To get the bucket key of a position
+        :param x: x coordinate
+        :param y: y coordinate
+        :return: the bucket key
+        """
+        return int(floor(x / self.__tolerance)), int(floor(y / self.__tolerance))
+
+    def add(self, x, y, item):
+        """
+        To index an item at a position
+        :param x: x coordinate
+        :param y: y coordinate
+        :param item: the item
+        """
+        key = self.__key(x, y)
+        bucket = self.__buckets.get(key)
+        if bucket is None:
+            self.__buckets[key] = [(x, y, item)]
+        else:
+            bucket.append((x, y, item))
+        self.__size += 1
+
+    def closest(self, x, y):
+        """
+        To find the closest item from a position, within the tolerance
+        :param x: x coordinate
+        :param y: y coordinate
+        :return: the closest item, or none
+        """
+        kx, ky = self.__key(x, y)
+        found = None
+        found_dist = self.__tolerance * self.__tolerance
+        for i in xrange(kx - 1, kx + 2):
+            for j in xrange(ky - 1, ky + 2):
+                bucket = self.__buckets.get((i, j))
+                if bucket is None:
+                    continue
+                for px, py, item in bucket:
+                    dist = (px - x) * (px - x) + (py - y) * (py - y)
+                    if dist < found_dist or (found is None and dist == found_dist):
+                        found = item
+                        found_dist = dist
+        return found
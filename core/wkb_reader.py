@@ -0,0 +1,128 @@
+# -*- coding: utf-8 -*-
+"""
+/***************************************************************************
+ VDLTools
+                                 A QGIS plugin for the Ville de Lausanne
+                              -------------------
+        begin                : 2016-10-17
+        git sha              : $Format:%H$
+        copyright            : (C) 2016 Ville de Lausanne
+        author               : Christophe Gusthiot
+        email                : christophe.gusthiot@lausanne.ch
+ ***************************************************************************/
+
+/***************************************************************************
+ *                                                                         *
+ *   This program is free software; you can redistribute it and/or modify  *
+ *   it under the terms of the GNU General Public License as published by  *
+ *   the Free Software Foundation; either version 2 of the License, or     *
+ *   (at your option) any later version.                                   *
+ *                                                                         *
+ ***************************************************************************/
+"""
+
+from struct import unpack_from
+
+
+class WkbReader:
+
+    POINT = 1
+    LINE_STRING = 2
+    POLYGON = 3
+    CIRCULAR_STRING = 8
+    COMPOUND_CURVE = 9
+    CURVE_POLYGON = 10
+
+    def __init__(self, wkb):
+        """
+        Constructor
+        :param wkb: the geometry as wkb bytes
+        """
+        self.__wkb = bytes(wkb)
+        self.__pos = 0
+
+    @staticmethod
+    def read(wkb):
+        """
+        To decode a wkb geometry
+        :param wkb: the geometry as wkb bytes (iso or ewkb, with or without z and m)
+        :return: the geometry as [type, hasZ, hasM, content], or none if it is not supported.
+        For a point the content is the coordinates tuple, for a line the flat coordinates tuple,
+        for others the list of decoded parts (polygon rings are decoded as lines)
+        """
+        if wkb is None or len(wkb) < 5:
+            return None
+        return WkbReader(wkb).__readGeometry()
+
+    def __readHeader(self):
+        """
+        To read the byte order and the type of a geometry
+        :return: byte order, base type, has z, has m
+        """
+        if unpack_from('B', self.__wkb, self.__pos)[0] == 1:
+            order = '<'
+        else:
+            order = '>'
+        wkbType = unpack_from(order + 'I', self.__wkb, self.__pos + 1)[0]
+        self.__pos += 5
+        hasZ = bool(wkbType & 0x80000000)
+        hasM = bool(wkbType & 0x40000000)
+        if wkbType & 0x20000000:
+            # ewkb srid
+            self.__pos += 4
+        wkbType &= 0x0fffffff
+        if wkbType >= 1000:
+            dims = wkbType // 1000
+            hasZ = hasZ or dims in (1, 3)
+            hasM = hasM or dims in (2, 3)
+            wkbType %= 1000
+        return order, wkbType, hasZ, hasM
+
+    def __readCount(self, order):
+        """
+        To read a number of elements
+        :param order: byte order
+        :return: the number
+        """
+        num = unpack_from(order + 'I', self.__wkb, self.__pos)[0]
+        self.__pos += 4
+        return num
+
+    def __readCoordinates(self, order, num, dim):
+        """
+        To read a sequence of coordinates in one go
+        :param order: byte order
+        :param num: number of points
+        :param dim: number of coordinates by point
+        :return: flat coordinates tuple
+        """
+        coordinates = unpack_from('%s%dd' % (order, num * dim), self.__wkb, self.__pos)
+        self.__pos += 8 * num * dim
+        return coordinates
+
+    def __readGeometry(self):
+        """
+        To read a geometry and its parts
+        :return: the geometry as [type, hasZ, hasM, content], or none
+        """
+        order, wkbType, hasZ, hasM = self.__readHeader()
+        dim = 2 + hasZ + hasM
+        if wkbType == self.POINT:
+            content = self.__readCoordinates(order, 1, dim)
+        elif wkbType in [self.LINE_STRING, self.CIRCULAR_STRING]:
+            content = self.__readCoordinates(order, self.__readCount(order), dim)
+        elif wkbType == self.POLYGON:
+            content = []
+            for i in xrange(self.__readCount(order)):
+                ring = self.__readCoordinates(order, self.__readCount(order), dim)
+                content.append([self.LINE_STRING, hasZ, hasM, ring])
+        elif wkbType in [self.COMPOUND_CURVE, self.CURVE_POLYGON]:
+            content = []
+            for i in xrange(self.__readCount(order)):
+                part = self.__readGeometry()
+                if part is None:
+                    return None
+                content.append(part)
+        else:
+            return None
+        return [wkbType, hasZ, hasM, content]
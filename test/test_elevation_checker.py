@@ -0,0 +1,53 @@
+# coding=utf-8
+"""Elevation checker tile rules test.
+
+.. note:: This program is free software; you can redistribute it and/or modify
+     it under the terms of the GNU General Public License as published by
+     the Free Software Foundation; either version 2 of the License, or
+     (at your option) any later version.
+
+"""
+
+__author__ = 'christophe.gusthiot@lausanne.ch'
+__date__ = '2016-11-04'
+__copyright__ = 'Copyright 2016, Christophe Gusthiot'
+
+import unittest
+
+from core.elevation_checker import ElevationChecker
+
+from utilities import get_qgis_app
+QGIS_APP = get_qgis_app()
+
+BOUNDS = (0.0, 0.0, 10.0, 10.0)
+
+
+class ElevationCheckerTest(unittest.TestCase):
+    """Test the elevation checks of a tile."""
+
+    def test_tile_bounds(self):
+        """Test the vertices on the maximum bounds belong to the next tile."""
+        lines = [(1, [0.0, 10.0, 5.0], [5.0, 5.0, 10.0], [100.0, 100.0, 100.0])]
+        points = [[(0.0, 5.0, 50.0, 11), (10.0, 5.0, 50.0, 12), (5.0, 10.0, 50.0, 13)]]
+        results = ElevationChecker.checkTile(BOUNDS, lines, points)
+        self.assertEqual(results, [(0.0, 5.0, "situation", 1, 11, 1, 100.0, 50.0)])
+
+    def test_difference_before_situation(self):
+        """Test a vertex with a difference between lines is not compared with the points."""
+        lines = [(2, [5.0, 8.0], [5.0, 8.0], [110.0, 110.0]), (1, [1.0, 5.0], [1.0, 5.0], [100.0, 100.0])]
+        points = [[(5.0, 5.0, 120.0, 21), (8.01, 8.0, 110.5, 22)]]
+        results = ElevationChecker.checkTile(BOUNDS, lines, points)
+        self.assertEqual(results, [(5.0, 5.0, "difference", 0, 2, 1, 100.0, 110.0)])
+
+    def test_tolerances(self):
+        """Test the elevations within 1% and the points out of the points tolerance are accepted."""
+        lines = [(1, [2.0, 4.0], [2.0, 4.0], [100.0, 100.0]), (2, [4.0, 6.0], [4.0, 6.0], [100.5, 100.5])]
+        points = [[(2.0, 2.0, 100.9, 31), (6.5, 6.0, 50.0, 32)], [(2.02, 2.0, 90.0, 41)]]
+        results = ElevationChecker.checkTile(BOUNDS, lines, points)
+        self.assertEqual(results, [(2.0, 2.0, "situation", 2, 41, 1, 100.0, 90.0)])
+
+
+if __name__ == "__main__":
+    suite = unittest.makeSuite(ElevationCheckerTest)
+    runner = unittest.TextTestRunner(verbosity=2)
+    runner.run(suite)
@@ -0,0 +1,170 @@
+# coding=utf-8
+"""Measures queries and import test, against a SQLite stand-in database.
+
+.. note:: This program is free software; you can redistribute it and/or modify
+     it under the terms of the GNU General Public License as published by
+     the Free Software Foundation; either version 2 of the License, or
+     (at your option) any later version.
+
+"""
+
+__author__ = 'christophe.gusthiot@lausanne.ch'
+__date__ = '2016-10-31'
+__copyright__ = 'Copyright 2016, Christophe Gusthiot'
+
+import unittest
+
+from PyQt4.QtSql import QSqlDatabase, QSqlQuery
+
+from core.measures_queries import MeasuresQueries
+from core.measures_importer import MeasuresImporter
+
+from utilities import get_qgis_app
+QGIS_APP = get_qgis_app()
+
+CONNECTION = 'test_measures'
+
+
+class MeasuresQueriesTest(unittest.TestCase):
+    """Test measures queries and import work."""
+
+    def setUp(self):
+        """Runs before each test."""
+        self.db = QSqlDatabase.addDatabase('QSQLITE', CONNECTION)
+        self.db.setDatabaseName(':memory:')
+        self.assertTrue(self.db.open())
+        self.execute("CREATE TABLE config (source TEXT, code TEXT, target TEXT)")
+        self.execute("CREATE TABLE measures (id INTEGER PRIMARY KEY, job TEXT, code TEXT, geometry BLOB, "
+                     "traitement TEXT)")
+        self.execute("CREATE TABLE target_a (geometry BLOB)")
+        self.execute("CREATE TABLE target_b (geometry BLOB)")
+        self.execute("INSERT INTO config VALUES ('measures', 'A', 'target_a')")
+        self.execute("INSERT INTO config VALUES ('measures', 'B', 'target_b')")
+        self.execute("INSERT INTO config VALUES ('measures', 'C', NULL)")
+        measures = [(1, "job'1", 'A'), (2, "job'1", 'B'), (3, 'job2', 'A'), (4, "job'1", 'A'), (5, "job'1", 'C'),
+                    (6, "job'1", 'B'), (7, 'job3', 'A')]
+        for iden, job, code in measures:
+            query = QSqlQuery(self.db)
+            query.prepare("INSERT INTO measures VALUES (?, ?, ?, ?, ?)")
+            query.addBindValue(iden)
+            query.addBindValue(job)
+            query.addBindValue(code)
+            query.addBindValue('geometry ' + str(iden))
+            query.addBindValue(u'traité' if job == 'job3' else u'non-traité')
+            self.assertTrue(query.exec_())
+        self.queries = MeasuresQueries(self.db, 'config')
+
+    def tearDown(self):
+        """Runs after each test."""
+        self.queries = None
+        self.db.close()
+        self.db = None
+        QSqlDatabase.removeDatabase(CONNECTION)
+
+    def execute(self, sql):
+        """Execute a statement on the test database."""
+        query = QSqlQuery(self.db)
+        self.assertTrue(query.exec_(sql), query.lastError().text())
+        return query
+
+    def rows(self, table):
+        """Count the rows of a table."""
+        query = self.execute("SELECT count(*) FROM " + table)
+        query.next()
+        return int(query.value(0))
+
+    def test_sources(self):
+        """Test the measures tables are read from the config table."""
+        self.assertEqual(self.queries.sources(), ['measures'])
+
+    def test_jobs(self):
+        """Test the jobs are filtered by status, with a quote in a job name."""
+        self.assertEqual(sorted(self.queries.jobs('measures', u'non-traité')), ["job'1", 'job2'])
+        self.assertEqual(self.queries.jobs('measures', u'traité'), ['job3'])
+        # the prepared statement is reused
+        self.assertEqual(sorted(self.queries.jobs('measures', u'non-traité')), ["job'1", 'job2'])
+
+    def test_jobs_between(self):
+        """Test the jobs are listed in an ids range."""
+        self.assertEqual(sorted(self.queries.jobsBetween('measures', u'non-traité', 2, 4)), ["job'1", 'job2'])
+        self.assertEqual(self.queries.jobsBetween('measures', u'non-traité', 4, 7), ["job'1"])
+        self.assertEqual(self.queries.jobsBetween('measures', u'non-traité', 7, 7), [])
+
+    def test_last_id(self):
+        """Test the highest id is read, 0 for an empty table."""
+        self.assertEqual(self.queries.lastId('measures'), 7)
+        self.execute("DELETE FROM measures")
+        self.assertEqual(self.queries.lastId('measures'), 0)
+
+    def test_set_status(self):
+        """Test the status of the measures of a job is changed up to an id."""
+        self.assertEqual(self.queries.setStatus('measures', "job'1", u'non-traité', u'traité', 4), 3)
+        self.assertEqual(self.queries.jobsBetween('measures', u'non-traité', 0, 4), ['job2'])
+        self.assertEqual(self.queries.jobsBetween('measures', u'non-traité', 4, 7), ["job'1"])
+
+    def test_targets(self):
+        """Test the codes without target are ignored."""
+        self.assertEqual(self.queries.targets('measures'), {'A': 'target_a', 'B': 'target_b'})
+
+    def test_count(self):
+        """Test the measures of a job are counted."""
+        self.assertEqual(self.queries.count('measures', "job'1", u'non-traité'), 5)
+        self.assertEqual(self.queries.count("measures", "job'1' OR '1'='1", u'non-traité'), 0)
+        self.assertEqual(self.queries.count('measures', 'job3', u'non-traité'), 0)
+
+    def test_page(self):
+        """Test the measures of a job are paged by id."""
+        self.assertEqual(self.queries.page('measures', "job'1", u'non-traité', None, 2), [(1, 'A'), (2, 'B')])
+        self.assertEqual(self.queries.page('measures', "job'1", u'non-traité', 2, 2), [(4, 'A'), (5, 'C')])
+        self.assertEqual(self.queries.page('measures', "job'1", u'non-traité', 5, 2), [(6, 'B')])
+        self.assertEqual(self.queries.page('measures', "job'1", u'non-traité', 6, 2), [])
+
+    def test_import_job(self):
+        """Test a job is copied into its target tables, batch by batch, and marked as imported."""
+        progress = []
+        importer = MeasuresImporter(self.queries, 'measures', 2)
+        inserted = importer.importJob("job'1", lambda done, total: progress.append((done, total)))
+        self.assertEqual(inserted, {'target_a': 2, 'target_b': 2})
+        self.assertEqual(progress, [(2, 5), (4, 5), (5, 5)])
+        self.assertEqual(self.rows('target_a'), 2)
+        self.assertEqual(self.rows('target_b'), 2)
+        self.assertEqual(self.queries.jobs('measures', u'non-traité'), ['job2'])
+
+    def test_import_partly_imported(self):
+        """Test only the measures of a job still to import are copied again."""
+        self.execute(u"UPDATE measures SET traitement = 'traité' WHERE id IN (1, 2)")
+        progress = []
+        importer = MeasuresImporter(self.queries, 'measures', 2)
+        inserted = importer.importJob("job'1", lambda done, total: progress.append((done, total)))
+        self.assertEqual(inserted, {'target_a': 1, 'target_b': 1})
+        self.assertEqual(progress, [(2, 3), (3, 3)])
+        self.assertEqual(self.rows('target_a'), 1)
+        self.assertEqual(self.rows('target_b'), 1)
+        self.assertEqual(self.queries.count('measures', "job'1", u'non-traité'), 0)
+
+    def test_import_rollback(self):
+        """Test a failed import leaves the target tables and the measures status unchanged."""
+        self.execute("DROP TABLE target_b")
+        importer = MeasuresImporter(self.queries, 'measures', 2)
+        self.assertIsNone(importer.importJob("job'1"))
+        self.assertIsNotNone(importer.lastError())
+        self.assertEqual(self.rows('target_a'), 0)
+        self.assertEqual(self.queries.count('measures', "job'1", u'non-traité'), 5)
+        self.assertEqual(sorted(self.queries.jobs('measures', u'non-traité')), ["job'1", 'job2'])
+
+    def test_import_cancel(self):
+        """Test a cancelled import is rolled back without error."""
+        progress = []
+        importer = MeasuresImporter(self.queries, 'measures', 2)
+        inserted = importer.importJob("job'1", lambda done, total: progress.append((done, total)),
+                                      lambda: len(progress) > 0)
+        self.assertIsNone(inserted)
+        self.assertIsNone(importer.lastError())
+        self.assertEqual(progress, [(2, 5)])
+        self.assertEqual(self.rows('target_a'), 0)
+
+
+if __name__ == "__main__":
+    suite = unittest.makeSuite(MeasuresQueriesTest)
+    runner = unittest.TextTestRunner(verbosity=2)
+    runner.run(suite)
@@ -0,0 +1,133 @@
+# coding=utf-8
+"""Parallel offset test, against the former per-vertex formulas.
+
+.. note:: This program is free software; you can redistribute it and/or modify
+     it under the terms of the GNU General Public License as published by
+     the Free Software Foundation; either version 2 of the License, or
+     (at your option) any later version.
+
+"""
+
+__author__ = 'christophe.gusthiot@lausanne.ch'
+__date__ = '2016-11-05'
+__copyright__ = 'Copyright 2016, Christophe Gusthiot'
+
+import unittest
+from math import (pi,
+                  cos,
+                  sin,
+                  atan2)
+
+from qgis.core import QgsPointV2
+
+from core.parallel_offset import ParallelOffset
+from core.geometry_coordinates import GeometryCoordinates
+from core.wkb_reader import WkbReader
+from core.circle import Circle
+
+from utilities import get_qgis_app
+QGIS_APP = get_qgis_app()
+
+
+def segmentsAngles(xs, ys):
+    """Former angle of each segment."""
+    return [atan2(ys[pos + 1] - ys[pos], xs[pos + 1] - xs[pos]) for pos in xrange(len(xs) - 1)]
+
+
+def appendOffset(xs, ys, angles, distances):
+    """Former points at given distances and azimuts."""
+    return ([xs[i] + cos(angles[i]) * distances[i] for i in xrange(len(angles))],
+            [ys[i] + sin(angles[i]) * distances[i] for i in xrange(len(angles))])
+
+
+def oldLine(xs, ys, distance):
+    """Former DuplicateTool.__newLine formulas."""
+    segments = segmentsAngles(xs, ys)
+    last = len(xs) - 1
+    angles = []
+    distances = []
+    for pos in xrange(last + 1):
+        if pos == 0:
+            angles.append(segments[0] + pi / 2)
+            distances.append(distance)
+        elif pos == last:
+            angles.append(segments[last - 1] + pi / 2)
+            distances.append(distance)
+        else:
+            angle1 = segments[pos - 1]
+            angle2 = segments[pos]
+            angles.append(float(pi + angle1 + angle2) / 2)
+            distances.append(float(distance) / sin(float(pi + angle1 - angle2) / 2))
+    return appendOffset(xs, ys, angles, distances)
+
+
+def oldRing(xs, ys, distance):
+    """Former DuplicateTool.__newPolygonCurve formulas."""
+    segments = segmentsAngles(xs, ys)
+    last = len(xs) - 1
+    angles = []
+    distances = []
+    for pos in xrange(last + 1):
+        if pos == 0:
+            angle1 = segments[last - 1]
+        else:
+            angle1 = segments[pos - 1]
+        if pos == last:
+            angle2 = segments[0]
+        else:
+            angle2 = segments[pos]
+        angles.append(float(pi + angle1 + angle2) / 2)
+        distances.append(float(distance) / sin(float(pi + angle1 - angle2) / 2))
+    return appendOffset(xs, ys, angles, distances)
+
+
+def oldArc(xs, ys, distance):
+    """Former DuplicateTool.__newArc formulas."""
+    circle = Circle(QgsPointV2(xs[0], ys[0]), QgsPointV2(xs[1], ys[1]), QgsPointV2(xs[2], ys[2]))
+    angles = [circle.angle1(), circle.angle2(), circle.angle3()]
+    return appendOffset(xs, ys, angles, [distance] * 3)
+
+
+class ParallelOffsetTest(unittest.TestCase):
+    """Test the vectorized offsets give the same coordinates than the former ones."""
+
+    def check(self, geometryType, parts, distances, old):
+        """Offset the parts at the distances, and compare each part with the former formulas."""
+        coordinates = GeometryCoordinates(geometryType, True, False)
+        for xs, ys, curved in parts:
+            coordinates.appendPart(xs, ys, [400.0] * len(xs), None, curved)
+        parallel = ParallelOffset(coordinates).offset(distances)
+        self.assertEqual(parallel.numParts(), len(parts))
+        for part in xrange(len(parts)):
+            xs, ys, curved = parts[part]
+            start, end = parallel.partRange(part)
+            self.assertEqual(parallel.isCurved(part), curved)
+            self.assertEqual(list(parallel.zs()[start:end]), [400.0] * len(xs))
+            oldXs, oldYs = old(xs, ys, distances[part])
+            for new, former in zip(list(parallel.xs()[start:end]) + list(parallel.ys()[start:end]), oldXs + oldYs):
+                self.assertEqual(new, former)
+
+    def test_open_line(self):
+        """Test an open line, with left and right turns."""
+        parts = [([2530000.0, 2530010.0, 2530015.0, 2530030.0, 2530031.0],
+                  [1150000.0, 1150002.0, 1150012.0, 1150009.0, 1149990.0], False)]
+        self.check(WkbReader.LINE_STRING, parts, [5.0], oldLine)
+        self.check(WkbReader.LINE_STRING, parts, [-2.5], oldLine)
+
+    def test_closed_ring(self):
+        """Test a polygon, with an interior ring offset the other way."""
+        parts = [([0.0, 10.0, 12.0, 3.0, 0.0], [0.0, 1.0, 9.0, 11.0, 0.0], False),
+                 ([4.0, 6.0, 5.0, 4.0], [4.0, 4.0, 6.0, 4.0], False)]
+        self.check(WkbReader.POLYGON, parts, [1.5, -1.5], oldRing)
+
+    def test_circular_string(self):
+        """Test a circular string, made of one arc."""
+        parts = [([0.0, 7.0, 10.0], [0.0, 7.0, 0.0], True)]
+        self.check(WkbReader.CIRCULAR_STRING, parts, [2.0], oldArc)
+        self.check(WkbReader.CIRCULAR_STRING, parts, [-2.0], oldArc)
+
+
+if __name__ == "__main__":
+    suite = unittest.makeSuite(ParallelOffsetTest)
+    runner = unittest.TextTestRunner(verbosity=2)
+    runner.run(suite)
@@ -0,0 +1,103 @@
+# coding=utf-8
+"""Batch profile export test, against memory layers.
+
+.. note:: This program is free software; you can redistribute it and/or modify
+     it under the terms of the GNU General Public License as published by
+     the Free Software Foundation; either version 2 of the License, or
+     (at your option) any later version.
+
+"""
+
+__author__ = 'christophe.gusthiot@lausanne.ch'
+__date__ = '2016-11-05'
+__copyright__ = 'Copyright 2016, Christophe Gusthiot'
+
+import os
+import csv
+import shutil
+import tempfile
+import unittest
+
+from qgis.core import (QgsVectorLayer,
+                       QgsFeature,
+                       QgsGeometry)
+
+from core.profile_exporter import ProfileExporter
+
+from utilities import get_qgis_app
+QGIS_APP = get_qgis_app()
+
+
+def memoryLayer(uri, name, wkts):
+    """Create a memory layer with a feature for each wkt."""
+    layer = QgsVectorLayer(uri + "?crs=epsg:2056", name, "memory")
+    features = []
+    for wkt in wkts:
+        feature = QgsFeature()
+        feature.setGeometry(QgsGeometry.fromWkt(wkt))
+        features.append(feature)
+    layer.dataProvider().addFeatures(features)
+    return layer
+
+
+class ProfileExporterTest(unittest.TestCase):
+    """Test batch profiles export works."""
+
+    def setUp(self):
+        """Runs before each test."""
+        self.directory = tempfile.mkdtemp()
+        self.lines = memoryLayer("LineStringZ", "lines", ["LineStringZ(0 0 400, 10 0 401)",
+                                                          "LineStringZ(20 0 402, 10 0 401)",
+                                                          "LineStringZ(0 10 400, 10 10 400)"])
+        self.points = memoryLayer("PointZ", "points", ["PointZ(10 0 410)", "PointZ(10 10 400)"])
+
+    def tearDown(self):
+        """Runs after each test."""
+        shutil.rmtree(self.directory)
+
+    def test_export(self):
+        """Test two chains are exported, with their checks and a summary."""
+        exporter = ProfileExporter(self.lines, [self.points], self.directory, ['csv', 'png'])
+        fids = [feature.id() for feature in self.lines.getFeatures()]
+        reports = exporter.export([fids[:2], fids[2:]], [u'chain_1', u'chain_2'])
+        self.assertEqual(len(reports), 2)
+        self.assertEqual([report['error'] for report in reports], [None, None])
+        self.assertAlmostEqual(reports[0]['length'], 20.0)
+        self.assertAlmostEqual(reports[1]['length'], 10.0)
+        self.assertEqual(reports[0]['situations'], [{'point': 1, 'layer': 1, 'vertex': 401.0}])
+        self.assertEqual(reports[0]['differences'], [])
+        self.assertEqual(reports[1]['situations'], [])
+        for report in reports:
+            self.assertEqual(len(report['files']), 2)
+            for path in report['files']:
+                self.assertTrue(os.path.isfile(path))
+        with open(os.path.join(self.directory, 'chain_1.csv'), 'rb') as csvFile:
+            rows = list(csv.reader(csvFile))
+        self.assertEqual(len(rows), 4)
+        self.assertEqual([float(value) for value in rows[2][3:]], [401.0, 401.0, 410.0])
+        with open(os.path.join(self.directory, ProfileExporter.SUMMARY), 'rb') as csvFile:
+            summary = list(csv.reader(csvFile))
+        self.assertEqual(len(summary), 3)
+        self.assertEqual(summary[1][3:5], ['1', '0'])
+
+    def test_failed_chain(self):
+        """Test a failed chain is reported without stopping the others."""
+        exporter = ProfileExporter(self.lines, [self.points], self.directory, ['csv'])
+        fids = [feature.id() for feature in self.lines.getFeatures()]
+        reports = exporter.export([[fids[0], fids[2]], [9999], fids[2:]], [u'not_connected', u'missing', u'ch\xe9min'])
+        self.assertEqual(reports[0]['error'], "lines are not connected")
+        self.assertEqual(reports[1]['error'], "missing features 9999")
+        self.assertIsNone(reports[2]['error'])
+        self.assertEqual(reports[2]['files'], [os.path.join(self.directory, u'ch\xe9min.csv')])
+        self.assertTrue(os.path.isfile(os.path.join(self.directory, ProfileExporter.SUMMARY)))
+
+    def test_flat_layer(self):
+        """Test a lines layer without elevations is refused."""
+        lines = memoryLayer("LineString", "flat", ["LineString(0 0, 10 0)"])
+        self.assertRaises(ValueError, ProfileExporter, lines, [self.points], self.directory)
+
+
+if __name__ == "__main__":
+    suite = unittest.makeSuite(ProfileExporterTest)
+    runner = unittest.TextTestRunner(verbosity=2)
+    runner.run(suite)
@@ -0,0 +1,134 @@
+# -*- coding: utf-8 -*-
+"""
+/***************************************************************************
+ VDLTools
+                                 A QGIS plugin for the Ville de Lausanne
+                              -------------------
+        begin                : 2016-11-04
+        git sha              : $Format:%H$
+        copyright            : (C) 2016 Ville de Lausanne
+        author               : Christophe Gusthiot
+        email                : christophe.gusthiot@lausanne.ch
+ ***************************************************************************/
+
+/***************************************************************************
+ *                                                                         *
+ *   This program is free software; you can redistribute it and/or modify  *
+ *   it under the terms of the GNU General Public License as published by  *
+ *   the Free Software Foundation; either version 2 of the License, or     *
+ *   (at your option) any later version.                                   *
+ *                                                                         *
+ ***************************************************************************/
+"""
+
+from qgis.gui import QgsMessageBar
+from qgis.core import (QgsMapLayer,
+                       QgsMapLayerRegistry,
+                       QGis,
+                       QgsWKBTypes)
+from ..core.elevation_checker import ElevationChecker
+from ..ui.profile_layers_dialog import ProfileLayersDialog
+from PyQt4.QtCore import (Qt,
+                          QCoreApplication)
+from PyQt4.QtGui import QApplication
+
+
+class CheckElevations:
+
+    def __init__(self, iface):
+        """
+        Constructor
+        :param iface: interface
+        """
+        self.__iface = iface
+        self.__icon_path = ':/plugins/VDLTools/icons/profile_icon.png'
+        self.__text = QCoreApplication.translate("VDLTools","Check elevations")
+        self.__lineLayer = None
+        self.__layDlg = None
+
+    def icon_path(self):
+        """
+        To get the icon path
+        :return: icon path
+        """
+        return self.__icon_path
+
+    def text(self):
+        """
+        To get the menu text
+        :return: menu text
+        """
+        return self.__text
+
+    def start(self):
+        """
+        To start the check of the selected lines layer
+        """
+        layer = self.__iface.activeLayer()
+        if layer is None or layer.type() != QgsMapLayer.VectorLayer \
+                or QGis.fromOldWkbType(layer.wkbType()) != QgsWKBTypes.LineStringZ:
+            self.__iface.messageBar().pushMessage(
+                QCoreApplication.translate("VDLTools","Error"),
+                QCoreApplication.translate("VDLTools","No 3D lines layer selected !!"),
+                level=QgsMessageBar.CRITICAL)
+            return
+        self.__lineLayer = layer
+        pointLayers = self.__getPointLayers()
+        if len(pointLayers) > 0:
+            self.__layDlg = ProfileLayersDialog(pointLayers)
+            self.__layDlg.okButton().clicked.connect(self.__onLayOk)
+            self.__layDlg.cancelButton().clicked.connect(self.__onLayCancel)
+            self.__layDlg.show()
+        else:
+            self.__check([])
+
+    def __getPointLayers(self):
+        """
+        To get all points layers that can be used
+        :return: layers list
+        """
+        layerList = []
+        for layer in self.__iface.mapCanvas().layers():
+            if layer.type() == QgsMapLayer.VectorLayer and QGis.fromOldWkbType(layer.wkbType()) == QgsWKBTypes.PointZ:
+                layerList.append(layer)
+        return layerList
+
+    def __onLayOk(self):
+        """
+        When the Ok button in Profile Layers Dialog is pushed
+        """
+        self.__layDlg.close()
+        layers = self.__layDlg.getLayers()
+        self.__closeDialog()
+        self.__check(layers)
+
+    def __onLayCancel(self):
+        """
+        When the Cancel button in Profile Layers Dialog is pushed
+        """
+        self.__layDlg.close()
+        self.__closeDialog()
+
+    def __closeDialog(self):
+        """
+        To disconnect the Profile Layers Dialog
+        """
+        self.__layDlg.okButton().clicked.disconnect(self.__onLayOk)
+        self.__layDlg.cancelButton().clicked.disconnect(self.__onLayCancel)
+        self.__layDlg = None
+
+    def __check(self, pointLayers):
+        """
+        To check the lines layer with the chosen points layers, and add the results layer to the map
+        :param pointLayers: the points layers
+        """
+        name = self.__lineLayer.name() + " " + QCoreApplication.translate("VDLTools","elevation checks")
+        QApplication.setOverrideCursor(Qt.WaitCursor)
+        try:
+            result = ElevationChecker(self.__lineLayer, pointLayers).check(name)
+        finally:
+            QApplication.restoreOverrideCursor()
+        QgsMapLayerRegistry.instance().addMapLayer(result)
+        self.__iface.messageBar().pushMessage(
+            QCoreApplication.translate("VDLTools","Elevation problems found : ") + str(result.featureCount()),
+            level=QgsMessageBar.INFO)
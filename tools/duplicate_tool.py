@@ -20,8 +20,7 @@
  *                                                                         *
  ***************************************************************************/
 """
-from math import (pi,
-                  cos,
+from math import (cos,
                   sin)
 from PyQt4.QtCore import (Qt,
                           QCoreApplication)
@@ -31,10 +30,6 @@ from qgis.core import (QgsPointV2,
                        QgsSnappingUtils,
                        QgsPointLocator,
                        QgsProject,
-                       QgsLineStringV2,
-                       QgsCompoundCurveV2,
-                       QgsCircularStringV2,
-                       QgsCurvePolygonV2,
                        QgsDataSourceURI,
                        QGis,
                        QgsGeometry,
@@ -45,8 +40,9 @@ from qgis.gui import (QgsMapTool,
                       QgsMessageBar)
 from ..ui.duplicate_distance_dialog import DuplicateDistanceDialog
 from ..core.finder import Finder
+from ..core.move_throttle import MoveThrottle
 from ..core.geometry_v2 import GeometryV2
-from ..core.circle import Circle
+from ..core.parallel_offset import ParallelOffset
 
 
 class DuplicateTool(QgsMapTool):
@@ -59,6 +55,7 @@ class DuplicateTool(QgsMapTool):
         QgsMapTool.__init__(self, iface.mapCanvas())
         self.__iface = iface
         self.__canvas = iface.mapCanvas()
+        self.__moveThrottle = MoveThrottle(self.__canvas, self.__moved)
         self.__icon_path = ':/plugins/VDLTools/icons/duplicate_icon.png'
         self.__text = QCoreApplication.translate("VDLTools","Duplicate a feature")
         self.setCursor(Qt.ArrowCursor)
@@ -66,6 +63,7 @@ class DuplicateTool(QgsMapTool):
         self.__layer = None
         self.__lastFeatureId = None
         self.__selectedFeature = None
+        self.__parallelOffset = None
         self.__rubberBand = None
         self.__newFeature = None
         self.__layerConfig = None
@@ -104,6 +102,7 @@ class DuplicateTool(QgsMapTool):
         """
         When the action is deselected
         """
+        self.__moveThrottle.cancel()
         self.__canvas.layersChanged.disconnect(self.__updateList)
         QgsProject.instance().snapSettingsChanged.disconnect(self.__updateList)
         QgsMapTool.deactivate(self)
@@ -238,105 +237,33 @@ class DuplicateTool(QgsMapTool):
         To create the preview (rubberBand) of the duplicate line at a certain distance
         :param distance: the given distance
         """
-        self.__rubberBand = QgsRubberBand(self.__canvas, QGis.Line)
-        line_v2, curved = GeometryV2.asLineV2(self.__selectedFeature.geometry())
-        if isinstance(curved, (list, tuple)):
-            self.__newFeature = QgsCompoundCurveV2()
-            for pos in xrange(line_v2.nCurves()):
-                if curved[pos]:
-                    curve_v2 = self.__newArc(line_v2.curveAt(pos), distance)
-                else:
-                    curve_v2 = self.__newLine(line_v2.curveAt(pos), distance)
-                self.__newFeature.addCurve(curve_v2)
-                if pos == 0:
-                    self.__rubberBand.setToGeometry(QgsGeometry(curve_v2.curveToLine()), None)
-                else:
-                    self.__rubberBand.addGeometry(QgsGeometry(curve_v2.curveToLine()), None)
-        else:
-            if curved:
-                self.__newFeature = self.__newArc(line_v2, distance)
-            else:
-                self.__newFeature = self.__newLine(line_v2, distance)
-            self.__rubberBand.setToGeometry(QgsGeometry(self.__newFeature.curveToLine()), None)
-
-    def __newArc(self, arc_v2, distance):
-        curve_v2 = QgsCircularStringV2()
-        points = []
-        circle = Circle(arc_v2.pointN(0), arc_v2.pointN(1), arc_v2.pointN(2))
-        points.append(self.newPoint(circle.angle1(), arc_v2.pointN(0), distance))
-        points.append(self.newPoint(circle.angle2(), arc_v2.pointN(1), distance))
-        points.append(self.newPoint(circle.angle3(), arc_v2.pointN(2), distance))
-        curve_v2.setPoints(points)
-        return curve_v2
-
-    def __newLine(self, line_v2, distance):
-        curve_v2 = QgsLineStringV2()
-        points = []
-        for pos in xrange(line_v2.numPoints()):
-            if pos == 0:
-                angle = Circle.angle(line_v2.pointN(pos), line_v2.pointN(pos + 1)) + pi / 2
-                dist = distance
-            elif pos == (line_v2.numPoints() - 1):
-                angle = Circle.angle(line_v2.pointN(pos - 1), line_v2.pointN(pos)) + pi / 2
-                dist = distance
-            else:
-                angle1 = Circle.angle(line_v2.pointN(pos - 1), line_v2.pointN(pos))
-                angle2 = Circle.angle(line_v2.pointN(pos), line_v2.pointN(pos + 1))
-                angle = float(pi + angle1 + angle2) / 2
-                dist = float(distance) / sin(float(pi + angle1 - angle2) / 2)
-            points.append(self.newPoint(angle, line_v2.pointN(pos), dist))
-        curve_v2.setPoints(points)
-        return curve_v2
+        self.__duplicatePreview(self.__parallelOffset.offset([distance] * self.__parallelOffset.numParts()))
 
     def __polygonPreview(self, distance):
         """
         To create the preview (rubberBand) of the duplicate polygon at a certain distance
         :param distance: the given distance
         """
-        self.__rubberBand = QgsRubberBand(self.__canvas, QGis.Line)
-        polygon_v2, curved = GeometryV2.asPolygonV2(self.__selectedFeature.geometry())
-        self.__newFeature = QgsCurvePolygonV2()
-        line_v2 = self.__newPolygonCurve(polygon_v2.exteriorRing(), distance, curved[0])
-        self.__newFeature.setExteriorRing(line_v2)
-        self.__rubberBand.setToGeometry(QgsGeometry(line_v2.curveToLine()), None)
-        for num in xrange(polygon_v2.numInteriorRings()):
-            if self.__dstDlg.isInverted():
+        distances = []
+        for pos in xrange(self.__parallelOffset.numParts()):
+            if pos > 0 and self.__dstDlg.isInverted():
                 distance = -distance
-            line_v2 = self.__newPolygonCurve(polygon_v2.interiorRing(num), distance, curved[num+1])
-            self.__newFeature.addInteriorRing(line_v2)
-            self.__rubberBand.addGeometry(QgsGeometry(line_v2.curveToLine()), None)
+            distances.append(distance)
+        self.__duplicatePreview(self.__parallelOffset.offset(distances))
 
-    def __newPolygonCurve(self, curve_v2, distance, curved):
+    def __duplicatePreview(self, duplicate):
         """
-        To create a duplicate curve for a polygon curves
-        :param curve_v2: curve to duplicate
-        :param distance: distance where to
-        :param curved: if the line is curved
-        :return: new duplicate curve
+        To create the duplicate geometry and its preview (rubberBand)
+        :param duplicate: coordinates of the duplicate
         """
-        if curved:
-            new_line_v2 = QgsCircularStringV2()
-        else:
-            new_line_v2 = QgsLineStringV2()
-        points = []
-
-        for pos in xrange(curve_v2.numPoints()):
+        self.__newFeature = duplicate.toGeometryV2()
+        self.__rubberBand = QgsRubberBand(self.__canvas, QGis.Line)
+        for pos in xrange(duplicate.numParts()):
+            curve_v2 = duplicate.curveV2(pos)
             if pos == 0:
-                pos1 = curve_v2.numPoints() - 2
+                self.__rubberBand.setToGeometry(QgsGeometry(curve_v2.curveToLine()), None)
             else:
-                pos1 = pos - 1
-            pos2 = pos
-            if pos == (curve_v2.numPoints() - 1):
-                pos3 = 1
-            else:
-                pos3 = pos + 1
-            angle1 = Circle.angle(curve_v2.pointN(pos1), curve_v2.pointN(pos2))
-            angle2 = Circle.angle(curve_v2.pointN(pos),curve_v2.pointN(pos3))
-            angle = float(pi + angle1 + angle2) / 2
-            dist = float(distance) / sin(float(pi + angle1 - angle2) / 2)
-            points.append(self.newPoint(angle, curve_v2.pointN(pos), dist))
-        new_line_v2.setPoints(points)
-        return new_line_v2
+                self.__rubberBand.addGeometry(QgsGeometry(curve_v2.curveToLine()), None)
 
     def __onDstOk(self):
         """
@@ -384,8 +311,15 @@ class DuplicateTool(QgsMapTool):
         When the mouse is moved
         :param event: mouse event
         """
+        self.__moveThrottle.push(event)
+
+    def __moved(self, mapPoint):
+        """
+        When the mouse has moved, at most at the throttle rate
+        :param mapPoint: map position of the mouse
+        """
         if not self.__isEditing:
-            f = Finder.findClosestFeatureAt(event.mapPoint(), self.__layerConfig, self)
+            f = Finder.findClosestFeatureAt(mapPoint, self.__layerConfig, self)
             if f is not None and self.__lastFeatureId != f.id():
                 self.__lastFeatureId = f.id()
                 self.__layer.setSelectedFeatures([f.id()])
@@ -398,6 +332,7 @@ class DuplicateTool(QgsMapTool):
         When the mouse is clicked
         :param event: mouse event
         """
+        self.__moveThrottle.flush()
         found_features = self.__layer.selectedFeatures()
         if len(found_features) > 0:
             if len(found_features) < 1:
@@ -405,6 +340,7 @@ class DuplicateTool(QgsMapTool):
                                                       level=QgsMessageBar.INFO)
                 return
             self.__selectedFeature = found_features[0]
+            self.__parallelOffset = ParallelOffset(GeometryV2.asCoordinates(self.__selectedFeature.geometry()))
             self.__isEditing = 1
             if (self.__layer.geometryType() == QGis.Polygon)\
                     and (len(self.__selectedFeature.geometry().asPolygon()) > 1):
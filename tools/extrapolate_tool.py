@@ -35,6 +35,7 @@ from PyQt4.QtCore import (Qt,
                           QCoreApplication)
 from PyQt4.QtGui import QColor
 from ..core.finder import Finder
+from ..core.move_throttle import MoveThrottle
 from ..core.geometry_v2 import GeometryV2
 from ..ui.extrapolate_confirm_dialog import ExtrapolateConfirmDialog
 
@@ -49,6 +50,7 @@ class ExtrapolateTool(QgsMapTool):
         QgsMapTool.__init__(self, iface.mapCanvas())
         self.__iface = iface
         self.__canvas = iface.mapCanvas()
+        self.__moveThrottle = MoveThrottle(self.__canvas, self.__moved)
         self.__icon_path = ':/plugins/VDLTools/icons/extrapolate_icon.png'
         self.__text = QCoreApplication.translate("VDLTools",
                                                  "Extrapolate the elevation of a vertex and a "
@@ -59,7 +61,6 @@ class ExtrapolateTool(QgsMapTool):
         self.__isEditing = False
         self.__lastFeatureId = None
         self.__rubber = None
-        self.__counter = 0
         self.__confDlg = None
         self.__selectedVertex = None
         self.__elevation = None
@@ -106,6 +107,7 @@ class ExtrapolateTool(QgsMapTool):
         """
         When the action is deselected
         """
+        self.__moveThrottle.cancel()
         self.__rubber.reset()
         self.__canvas.layersChanged.disconnect(self.__updateList)
         QgsProject.instance().snapSettingsChanged.disconnect(self.__updateList)
@@ -191,24 +193,26 @@ class ExtrapolateTool(QgsMapTool):
         When the mouse is moved
         :param event: mouse event
         """
+        self.__moveThrottle.push(event)
+
+    def __moved(self, mapPoint):
+        """
+        When the mouse has moved, at most at the throttle rate
+        :param mapPoint: map position of the mouse
+        """
         if not self.__isEditing:
-            f = Finder.findClosestFeatureAt(event.mapPoint(), self.__layerConfig, self)
+            f = Finder.findClosestFeatureAt(mapPoint, self.__layerConfig, self)
 
             if f is not None and self.__lastFeatureId != f.id():
                 self.__lastFeatureId = f.id()
                 self.__layer.setSelectedFeatures([f.id()])
-                if self.__counter > 2:
-                    self.__rubber.reset()
-                    geom = f.geometry()
-                    index = geom.closestVertex(event.mapPoint())[1]
-                    line_v2, curved = GeometryV2.asLineV2(geom)
-                    num_p = line_v2.numPoints()
-                    if num_p > 2 and (index == 0 or index == (num_p-1)):
-                        self.__rubber.setIcon(4)
-                        self.__rubber.setToGeometry(QgsGeometry(line_v2.pointN(index)), None)
-                        self.__counter = 0
-                else:
-                    self.__counter += 1
+                self.__rubber.reset()
+                geom = f.geometry()
+                vertex, index = geom.closestVertex(mapPoint)[:2]
+                num_p = len(geom.asPolyline())
+                if num_p > 2 and (index == 0 or index == (num_p-1)):
+                    self.__rubber.setIcon(4)
+                    self.__rubber.setToGeometry(QgsGeometry.fromPoint(vertex), None)
             if f is None:
                 self.__layer.removeSelection()
                 self.__rubber.reset()
@@ -219,6 +223,7 @@ class ExtrapolateTool(QgsMapTool):
         When the mouse is clicked
         :param event: mouse event
         """
+        self.__moveThrottle.flush()
         found_features = self.__layer.selectedFeatures()
         if len(found_features) > 0:
             if len(found_features) < 1:
@@ -22,10 +22,12 @@
 """
 
 from qgis.gui import QgsMessageBar
-from qgis.core import QgsDataSourceURI
-from ..core.db_connector import DBConnector
+from qgis.core import (QgsDataSourceURI,
+                       QgsMapLayer)
+from ..core.measures_worker import MeasuresWorker
 from ..ui.import_jobs_dialog import ImportJobsDialog
-from PyQt4.QtCore import QCoreApplication
+from PyQt4.QtCore import (QThread,
+                          QCoreApplication)
 
 
 class ImportMeasures:
@@ -39,10 +41,12 @@ class ImportMeasures:
         self.__icon_path = ':/plugins/VDLTools/icons/import_icon.png'
         self.__text = QCoreApplication.translate("VDLTools","Import Measures")
         self.__ownSettings = None
-        self.__configTable = None
-        self.__db = None
         self.__jobsDlg = None
-        self.__sourceTable = ""
+        self.__dbName = None
+        self.__configTable = None
+        self.__thread = None
+        self.__worker = None
+        self.__importing = False
 
     def icon_path(self):
         """
@@ -79,55 +83,151 @@ class ImportMeasures:
                                                   QCoreApplication.translate("VDLTools","No config table given !!"),
                                                   level=QgsMessageBar.CRITICAL)
             return
+        layer = self.__iface.activeLayer()
+        if layer is None or layer.type() != QgsMapLayer.VectorLayer or layer.providerType() != "postgres":
+            self.__iface.messageBar().pushMessage(
+                QCoreApplication.translate("VDLTools","Error"),
+                QCoreApplication.translate("VDLTools","No PostgreSQL layer selected !!"),
+                level=QgsMessageBar.CRITICAL)
+            return
+        if self.__jobsDlg is not None:
+            self.__jobsDlg.raise_()
+            return
+
+        self.__startWorker()
+        self.__jobsDlg = ImportJobsDialog()
+        self.__jobsDlg.okButton().clicked.connect(self.__onOk)
+        self.__jobsDlg.cancelButton().clicked.connect(self.__onCancel)
+        self.__jobsDlg.refreshButton().clicked.connect(self.__onRefresh)
+        self.__jobsDlg.rejected.connect(self.__onCancel)
+        self.__jobsDlg.show()
+        self.__dbName = QgsDataSourceURI(layer.source()).database()
         self.__configTable = self.__ownSettings.configTable()
+        self.__worker.requestJobs(self.__dbName, self.__configTable)
 
-        dataSource = QgsDataSourceURI(self.__layer.source())
-        self.__db = DBConnector.setConnection(dataSource.database(), self.__iface)
-        if self.__db:
-            query = self.__db.exec_("""SELECT DISTINCT source FROM """ + self.__configTable +
-                                    """ WHERE source NOT NULL""")
-            while query.next():
-                if self.__sourceTable == "":
-                    self.__sourceTable = query.value(0)
-                elif self.__sourceTable != query.value(0):
-                    self.__iface.messageBar().pushMessage(
-                        QCoreApplication.translate("VDLTools","Error"),
-                        QCoreApplication.translate("VDLTools","different sources in config table ?!?"),
-                        level=QgsMessageBar.WARNING)
-            query = self.__db.exec_("""SELECT DISTINCT job FROM """ + self.__sourceTable + """ WHERE
-                traitement = 'non-traité'""")
-            jobs = []
-            while query.next():
-                jobs.append(query.value(0))
-
-            self.__jobsDlg = ImportJobsDialog(jobs)
-            self.__jobsDlg.okButton().clicked.connect(self.__onOk)
-            self.__jobsDlg.cancelButton().clicked.connect(self.__onCancel)
-            self.__jobsDlg.show()
+    def release(self):
+        """
+        To stop the worker thread, when the plugin is unloaded
+        """
+        if self.__jobsDlg is not None:
+            self.__closeDialog()
+        if self.__thread is not None:
+            self.__worker.jobsListed.disconnect(self.__onJobsListed)
+            self.__worker.progressed.disconnect(self.__onProgress)
+            self.__worker.imported.disconnect(self.__onImported)
+            self.__worker.cancelled.disconnect(self.__onCancelled)
+            self.__worker.failed.disconnect(self.__onFailed)
+            self.__worker.cancel()
+            self.__worker.requestShutdown()
+            self.__thread.wait()
+            self.__worker = None
+            self.__thread = None
+
+    def __startWorker(self):
+        """
+        To create the worker and its thread, kept for the next imports with its database connection
+        """
+        if self.__thread is not None:
+            return
+        self.__thread = QThread()
+        self.__worker = MeasuresWorker()
+        self.__worker.moveToThread(self.__thread)
+        self.__worker.jobsListed.connect(self.__onJobsListed)
+        self.__worker.progressed.connect(self.__onProgress)
+        self.__worker.imported.connect(self.__onImported)
+        self.__worker.cancelled.connect(self.__onCancelled)
+        self.__worker.failed.connect(self.__onFailed)
+        self.__thread.start()
+
+    def __onJobsListed(self, jobs, several):
+        """
+        When the jobs to be imported have been listed by the worker
+        :param jobs: the jobs
+        :param several: if there are different sources in the config table
+        """
+        if several:
+            self.__iface.messageBar().pushMessage(
+                QCoreApplication.translate("VDLTools","Error"),
+                QCoreApplication.translate("VDLTools","different sources in config table ?!?"),
+                level=QgsMessageBar.WARNING)
+        if self.__jobsDlg is not None:
+            self.__jobsDlg.setJobs(jobs)
+
+    def __onRefresh(self):
+        """
+        When the Refresh button in Import Jobs Dialog is pushed, to read again the whole measures table
+        """
+        self.__jobsDlg.setLoading()
+        self.__worker.requestJobs(self.__dbName, self.__configTable, True)
 
     def __onOk(self):
         """
         When the Ok button in Import Jobs Dialog is pushed
         """
         job = self.__jobsDlg.job()
-        self.__jobsDlg.close()
-        self.__jobsDlg.okButton().clicked.disconnect(self.__onOk)
-        self.__jobsDlg.cancelButton().clicked.disconnect(self.__onCancel)
-        query = self.__db.exec_("""SELECT 1,2,3 FROM """ + self.__sourceTable + """ WHERE job = '""" + job + """'""")
-        while query.next():
-            pass # then traiter les records du job...
-
+        if job is None:
+            self.__closeDialog()
+            return
+        self.__importing = True
+        self.__jobsDlg.setProgress(0, 0)
+        self.__worker.requestImport(job)
 
+    def __onProgress(self, done, total):
+        """
+        When a batch of measures has been imported by the worker
+        :param done: number of processed measures
+        :param total: total number of measures
+        """
+        if self.__jobsDlg is not None:
+            self.__jobsDlg.setProgress(done, total)
 
-    def __onCancel(self):
+    def __onImported(self, inserted):
         """
-        When the Cancel button in Import Jobs Dialog is pushed
+        When the job has been imported by the worker
+        :param inserted: dict of inserted measures by target table
         """
-        self.__jobsDlg.close()
-        self.__jobsDlg.okButton().clicked.disconnect(self.__onOk)
-        self.__jobsDlg.cancelButton().clicked.disconnect(self.__onCancel)
-        self.__db.close()
+        self.__importing = False
+        self.__closeDialog()
+        self.__iface.messageBar().pushMessage(
+            QCoreApplication.translate("VDLTools","Imported measures : ") + str(sum(inserted.values())),
+            level=QgsMessageBar.INFO)
 
+    def __onCancelled(self):
+        """
+        When the job import has been cancelled by the user, and rolled back by the worker
+        """
+        self.__importing = False
+        self.__closeDialog()
+        self.__iface.messageBar().pushMessage(
+            QCoreApplication.translate("VDLTools","Import cancelled"), level=QgsMessageBar.INFO)
 
+    def __onFailed(self, error):
+        """
+        When the worker could not list the jobs or import the job
+        :param error: error text
+        """
+        self.__importing = False
+        self.__closeDialog()
+        self.__iface.messageBar().pushMessage(error, level=QgsMessageBar.CRITICAL)
 
+    def __onCancel(self):
+        """
+        When the Cancel button in Import Jobs Dialog is pushed, or the dialog closed
+        """
+        if self.__importing:
+            self.__worker.cancel()
+        else:
+            self.__closeDialog()
 
+    def __closeDialog(self):
+        """
+        To close the Import Jobs Dialog
+        """
+        if self.__jobsDlg is None:
+            return
+        self.__jobsDlg.okButton().clicked.disconnect(self.__onOk)
+        self.__jobsDlg.cancelButton().clicked.disconnect(self.__onCancel)
+        self.__jobsDlg.refreshButton().clicked.disconnect(self.__onRefresh)
+        self.__jobsDlg.rejected.disconnect(self.__onCancel)
+        self.__jobsDlg.close()
+        self.__jobsDlg = None
@@ -39,6 +39,7 @@ from PyQt4.QtCore import (Qt,
                           QCoreApplication)
 from PyQt4.QtGui import QColor
 from ..core.finder import Finder
+from ..core.move_throttle import MoveThrottle
 from ..core.geometry_v2 import GeometryV2
 from ..ui.interpolate_confirm_dialog import InterpolateConfirmDialog
 
@@ -53,6 +54,7 @@ class InterpolateTool(QgsMapTool):
         QgsMapTool.__init__(self, iface.mapCanvas())
         self.__iface = iface
         self.__canvas = iface.mapCanvas()
+        self.__moveThrottle = MoveThrottle(self.__canvas, self.__moved)
         self.__icon_path = ':/plugins/VDLTools/icons/interpolate_icon.png'
         self.__text = QCoreApplication.translate(
             "VDLTools","Interpolate the elevation of a vertex and a point in the middle of a line")
@@ -68,6 +70,7 @@ class InterpolateTool(QgsMapTool):
         self.__rubber = None
         self.__counter = 0
         self.__ownSettings = None
+        self.__snappingContext = None
         self.__selectedFeature = None
         self.__linesConfig = None
         self.__findVertex = 0
@@ -100,6 +103,13 @@ class InterpolateTool(QgsMapTool):
         """
         self.__ownSettings = settings
 
+    def setSnappingContext(self, snappingContext):
+        """
+        To set the snapping context
+        :param snappingContext: the plugin snapping context
+        """
+        self.__snappingContext = snappingContext
+
     def activate(self):
         """
         When the action is selected
@@ -120,6 +130,7 @@ class InterpolateTool(QgsMapTool):
         """
         When the action is deselected
         """
+        self.__moveThrottle.cancel()
         self.__rubber.reset()
         if self.__lastLayer is not None:
             self.__lastLayer.removeSelection()
@@ -216,8 +227,15 @@ class InterpolateTool(QgsMapTool):
         When the mouse is moved
         :param event: mouse event
         """
+        self.__moveThrottle.push(event)
+
+    def __moved(self, mapPoint):
+        """
+        When the mouse has moved, at most at the throttle rate
+        :param mapPoint: map position of the mouse
+        """
         if not self.__isEditing and not self.__findVertex and self.__layerList is not None:
-            f_l = Finder.findClosestFeatureLayersAt(event.mapPoint(), self.__layerList, self)
+            f_l = Finder.findClosestFeatureLayersAt(mapPoint, self.__layerList, self)
 
             if f_l is not None and self.__lastFeatureId != f_l[0].id():
                 f = f_l[0]
@@ -232,7 +250,7 @@ class InterpolateTool(QgsMapTool):
                 self.__lastFeatureId = None
         elif self.__findVertex:
             self.__rubber.reset()
-            match = Finder.snap(event.mapPoint(), self.__canvas, True)
+            match = Finder.snap(mapPoint, self.__snappingContext, True)
             if match.hasVertex() or match.hasEdge():
                 point = match.point()
                 if match.hasVertex():
@@ -240,13 +258,13 @@ class InterpolateTool(QgsMapTool):
                         self.__rubber.setIcon(4)
                         self.__rubber.setToGeometry(QgsGeometry().fromPoint(point), None)
                     else:
-                        intersection = Finder.snapCurvedIntersections(match.point(), self.__canvas, self, True,
+                        intersection = Finder.snapCurvedIntersections(match.point(), self.__snappingContext, self, True,
                                                                       self.__selectedFeature.id())
                         if intersection:
                             self.__rubber.setIcon(1)
                             self.__rubber.setToGeometry(QgsGeometry().fromPoint(intersection), None)
                 if match.hasEdge():
-                    intersection = Finder.snapCurvedIntersections(match.point(), self.__canvas, self, True,
+                    intersection = Finder.snapCurvedIntersections(match.point(), self.__snappingContext, self, True,
                                                                   self.__selectedFeature.id())
                     if intersection:
                         self.__rubber.setIcon(1)
@@ -260,6 +278,7 @@ class InterpolateTool(QgsMapTool):
         When the mouse is clicked
         :param event: mouse event
         """
+        self.__moveThrottle.flush()
         if self.__lastLayer is not None and not self.__findVertex:
             found_features = self.__lastLayer.selectedFeatures()
             if len(found_features) > 0:
@@ -271,7 +290,7 @@ class InterpolateTool(QgsMapTool):
                 self.__findVertex = 1
         elif self.__findVertex:
             self.__rubber.reset()
-            match = Finder.snap(event.mapPoint(), self.__canvas, True)
+            match = Finder.snap(event.mapPoint(), self.__snappingContext, True)
             if match.hasVertex() or match.hasEdge():
                 point = match.point()
                 ok = False
@@ -279,13 +298,13 @@ class InterpolateTool(QgsMapTool):
                     if match.layer() and self.__selectedFeature.id() == match.featureId():
                         ok = True
                     else:
-                        intersection = Finder.snapCurvedIntersections(match.point(), self.__canvas, self, True,
+                        intersection = Finder.snapCurvedIntersections(match.point(), self.__snappingContext, self, True,
                                                                       self.__selectedFeature.id())
                         if intersection:
                             point = intersection
                             ok = True
                 if match.hasEdge():
-                    intersection = Finder.snapCurvedIntersections(match.point(), self.__canvas, self, True,
+                    intersection = Finder.snapCurvedIntersections(match.point(), self.__snappingContext, self, True,
                                                                   self.__selectedFeature.id())
                     if intersection:
                         point = intersection
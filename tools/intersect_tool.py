@@ -37,6 +37,7 @@ from qgis.gui import (QgsMapTool,
                       QgsRubberBand)
 from ..ui.intersect_distance_dialog import IntersectDistanceDialog
 from ..core.finder import Finder
+from ..core.move_throttle import MoveThrottle
 
 
 class IntersectTool(QgsMapTool):
@@ -49,6 +50,7 @@ class IntersectTool(QgsMapTool):
         QgsMapTool.__init__(self, iface.mapCanvas())
         self.__iface = iface
         self.__canvas = iface.mapCanvas()
+        self.__moveThrottle = MoveThrottle(self.__canvas, self.__moved)
         self.__icon_path = ':/plugins/VDLTools/icons/intersect_icon.png'
         self.__text = QCoreApplication.translate("VDLTools","From intersection")
         self.setCursor(Qt.ArrowCursor)
@@ -57,6 +59,7 @@ class IntersectTool(QgsMapTool):
         self.__counter = 0
         self.__rubber = None
         self.__ownSettings = None
+        self.__snappingContext = None
         self.__isEditing = 0
 
     def icon_path(self):
@@ -86,6 +89,13 @@ class IntersectTool(QgsMapTool):
         """
         self.__ownSettings = settings
 
+    def setSnappingContext(self, snappingContext):
+        """
+        To set the snapping context
+        :param snappingContext: the plugin snapping context
+        """
+        self.__snappingContext = snappingContext
+
     def __setDistanceDialog(self, mapPoint):
         """
         To create an Intersect Distance Dialog
@@ -173,6 +183,7 @@ class IntersectTool(QgsMapTool):
         """
         When the action is deselected
         """
+        self.__moveThrottle.cancel()
         self.__rubber.reset()
         # self.__canvas.layersChanged.disconnect(self.__updateSnapperList)
         # self.__canvas.scaleChanged.disconnect(self.__updateSnapperList)
@@ -184,9 +195,16 @@ class IntersectTool(QgsMapTool):
         When the mouse is moved
         :param event: mouse event
         """
+        self.__moveThrottle.push(mouseEvent)
+
+    def __moved(self, mapPoint):
+        """
+        When the mouse has moved, at most at the throttle rate
+        :param mapPoint: map position of the mouse
+        """
         if not self.__isEditing:
             self.__rubber.reset()
-            match = Finder.snap(mouseEvent.mapPoint(), self.__canvas, True)
+            match = Finder.snap(mapPoint, self.__snappingContext, True)
             if match.hasVertex() or match.hasEdge():
                 point = match.point()
                 if match.hasVertex():
@@ -195,7 +213,7 @@ class IntersectTool(QgsMapTool):
                     else:
                         self.__rubber.setIcon(1)
                 if match.hasEdge():
-                    intersection = Finder.snapCurvedIntersections(match.point(), self.__canvas, self)
+                    intersection = Finder.snapCurvedIntersections(match.point(), self.__snappingContext, self)
                     if intersection:
                         self.__rubber.setIcon(1)
                         point = intersection
@@ -206,9 +224,9 @@ class IntersectTool(QgsMapTool):
 
             # if self.__counter > 5:
             #     self.__rubber.reset()
-            #     snappedIntersection = Finder.snapToIntersection(mouseEvent.mapPoint(), self, self.__layerList)
+            #     snappedIntersection = Finder.snapToIntersection(mapPoint, self, self.__layerList)
             #     if snappedIntersection is None:
-            #         snappedPoint = Finder.snapToLayers(mouseEvent.mapPoint(), self.__snapperList)
+            #         snappedPoint = Finder.snapToLayers(mapPoint, self.__snapperList)
             #         if snappedPoint is not None:
             #             self.__rubber.setIcon(4)
             #             self.__rubber.setToGeometry(QgsGeometry().fromPoint(snappedPoint), None)
@@ -224,12 +242,13 @@ class IntersectTool(QgsMapTool):
         When the mouse is clicked
         :param event: mouse event
         """
+        self.__moveThrottle.flush()
         if mouseEvent.button() != Qt.LeftButton:
             return
-        match = Finder.snap(mouseEvent.mapPoint(), self.__canvas, True)
+        match = Finder.snap(mouseEvent.mapPoint(), self.__snappingContext, True)
         if match.hasVertex() or match.hasEdge():
             point = match.point()
-            intersection = Finder.snapCurvedIntersections(match.point(), self.__canvas, self)
+            intersection = Finder.snapCurvedIntersections(match.point(), self.__snappingContext, self)
             if intersection:
                 point = intersection
             self.__isEditing = True
@@ -23,18 +23,12 @@
 from PyQt4.QtCore import (Qt,
                           QCoreApplication)
 from PyQt4.QtGui import QColor
-from qgis.core import (QgsPointV2,
-                       QgsEditFormConfig,
+from qgis.core import (QgsEditFormConfig,
                        QgsPointLocator,
                        QgsSnappingUtils,
-                       QgsLineStringV2,
-                       QgsCircularStringV2,
-                       QgsCompoundCurveV2,
                        QgsDataSourceURI,
-                       QgsVertexId,
                        QgsProject,
                        QgsFeature,
-                       QgsCurvePolygonV2,
                        QGis,
                        QgsGeometry,
                        QgsVectorLayer)
@@ -43,6 +37,7 @@ from qgis.gui import (QgsMapTool,
                       QgsMessageBar)
 from ..ui.move_confirm_dialog import MoveConfirmDialog
 from ..core.finder import Finder
+from ..core.move_throttle import MoveThrottle
 from ..core.geometry_v2 import GeometryV2
 
 
@@ -56,6 +51,7 @@ class MoveTool(QgsMapTool):
         QgsMapTool.__init__(self, iface.mapCanvas())
         self.__iface = iface
         self.__canvas = iface.mapCanvas()
+        self.__moveThrottle = MoveThrottle(self.__canvas, self.__moved)
         self.__icon_path = ':/plugins/VDLTools/icons/move_icon.png'
         self.__text = QCoreApplication.translate("VDLTools","Move/Copy a feature")
         self.setCursor(Qt.ArrowCursor)
@@ -70,8 +66,13 @@ class MoveTool(QgsMapTool):
         self.__rubberBand = None
         self.__rubberSnap = None
         self.__newFeature = None
+        self.__coordinates = None
+        self.__anchor = None
+        self.__vector = None
+        self.__batchFeatures = None
         self.__selectedVertex = None
         self.__layerConfig = None
+        self.__snappingContext = None
 
     def icon_path(self):
         """
@@ -87,6 +88,13 @@ class MoveTool(QgsMapTool):
         """
         return self.__text
 
+    def setSnappingContext(self, snappingContext):
+        """
+        To set the snapping context
+        :param snappingContext: the plugin snapping context
+        """
+        self.__snappingContext = snappingContext
+
     def toolName(self):
         """
         To get the tool name
@@ -107,6 +115,7 @@ class MoveTool(QgsMapTool):
         """
         When the action is deselected
         """
+        self.__moveThrottle.cancel()
         self.__canvas.layersChanged.disconnect(self.__updateList)
         QgsProject.instance().snapSettingsChanged.disconnect(self.__updateList)
         QgsMapTool.deactivate(self)
@@ -175,115 +184,108 @@ class MoveTool(QgsMapTool):
         self.action().setEnabled(False)
         self.removeLayer()
 
-    def __pointPreview(self, point):
+    def __startMove(self, anchor=None):
         """
-        To create a point geometry preview (rubberBand)
-        :param point: new position as mapPoint
+        To decode the feature(s) to move once and create their preview (rubberBand), only translated afterwards
+        :param anchor: translation origin as mapPoint, when moving a selection
         """
-        point_v2 = GeometryV2.asPointV2(self.__selectedFeature.geometry())
-        self.__newFeature = QgsPointV2(point.x(), point.y())
-        self.__newFeature.addZValue(point_v2.z())
-        self.__rubberBand = QgsRubberBand(self.__canvas, QGis.Point)
-        self.__rubberBand.setToGeometry(QgsGeometry(self.__newFeature.clone()), None)
+        if self.__batchFeatures is None:
+            geometry = self.__selectedFeature.geometry()
+            self.__coordinates = GeometryV2.asCoordinates(geometry)
+            if self.__layer.geometryType() == QGis.Point:
+                self.__anchor = geometry.asPoint()
+            else:
+                self.__anchor = geometry.vertexAt(self.__selectedVertex)
+            features = [self.__selectedFeature]
+        else:
+            self.__anchor = anchor
+            features = self.__batchFeatures
+        if self.__rubberBand:
+            self.__canvas.scene().removeItem(self.__rubberBand)
+        color = QColor("red")
+        color.setAlphaF(0.78)
+        if self.__layer.geometryType() == QGis.Point:
+            self.__rubberBand = QgsRubberBand(self.__canvas, QGis.Point)
+            for feature in features:
+                self.__rubberBand.addGeometry(QgsGeometry(feature.geometry()), None)
+            self.__rubberBand.setIcon(4)
+            self.__rubberBand.setIconSize(20)
+        else:
+            self.__rubberBand = QgsRubberBand(self.__canvas, QGis.Line)
+            for feature in features:
+                if self.__batchFeatures is None:
+                    coordinates = self.__coordinates
+                else:
+                    coordinates = GeometryV2.asCoordinates(feature.geometry())
+                if coordinates is None:
+                    self.__rubberBand.addGeometry(QgsGeometry(feature.geometry()), None)
+                    continue
+                for pos in xrange(coordinates.numParts()):
+                    self.__rubberBand.addGeometry(QgsGeometry(coordinates.curveV2(pos).curveToLine()), None)
+            self.__rubberBand.setWidth(2)
+            self.__rubberBand.setLineStyle(Qt.DotLine)
+        self.__rubberBand.setColor(color)
 
-    def __linePreview(self, point):
+    def __movePreview(self, point):
         """
-        To create a line geometry preview (rubberBand)
+        To translate the geometry preview (rubberBand)
         :param point: new position as mapPoint
         """
-        line_v2, curved = GeometryV2.asLineV2(self.__selectedFeature.geometry())
-        print(self.__selectedVertex)
-        vertex = QgsPointV2()
-        line_v2.pointAt(self.__selectedVertex, vertex)
-        self.__rubberBand = QgsRubberBand(self.__canvas, QGis.Line)
-        dx = vertex.x() - point.x()
-        dy = vertex.y() - point.y()
-        if isinstance(curved, (list, tuple)):
-            self.__newFeature = QgsCompoundCurveV2()
-            for pos in xrange(line_v2.nCurves()):
-                curve_v2 = self.__newCurve(curved[pos], line_v2.curveAt(pos), dx, dy)
-                self.__newFeature.addCurve(curve_v2)
-                if pos == 0:
-                    self.__rubberBand.setToGeometry(QgsGeometry(curve_v2.curveToLine()), None)
-                else:
-                    self.__rubberBand.addGeometry(QgsGeometry(curve_v2.curveToLine()), None)
-        else:
-            self.__newFeature = self.__newCurve(curved, line_v2, dx, dy)
-            self.__rubberBand.setToGeometry(QgsGeometry(self.__newFeature.curveToLine()), None)
-
-    def __newCurve(self, curved, line_v2, dx, dy):
-        if curved:
-            newCurve = QgsCircularStringV2()
-        else:
-            newCurve = QgsLineStringV2()
-        points = []
-        for pos in xrange(line_v2.numPoints()):
-            x = line_v2.pointN(pos).x() - dx
-            y = line_v2.pointN(pos).y() - dy
-            pt = QgsPointV2(x, y)
-            pt.addZValue(line_v2.pointN(pos).z())
-            points.append(pt)
-        newCurve.setPoints(points)
-        return newCurve
+        self.__rubberBand.setTranslationOffset(point.x() - self.__anchor.x(), point.y() - self.__anchor.y())
 
-    def __polygonPreview(self, point):
+    def __moveFeature(self, point):
         """
-        To create a polygon geometry preview (rubberBand)
+        To set the translation vector, and create the moved geometry for a single feature
         :param point: new position as mapPoint
         """
-        polygon_v2, curved = GeometryV2.asPolygonV2(self.__selectedFeature.geometry())
-        vertex = polygon_v2.vertexAt(self.__polygonVertexId(polygon_v2))
-        dx = vertex.x() - point.x()
-        dy = vertex.y() - point.y()
-        self.__newFeature = QgsCurvePolygonV2()
-        self.__rubberBand = QgsRubberBand(self.__canvas, QGis.Line)
-        line_v2 = self.__newLine(polygon_v2.exteriorRing(), dx, dy, curved[0])
-        self.__newFeature.setExteriorRing(line_v2)
-        self.__rubberBand.setToGeometry(QgsGeometry(line_v2.curveToLine()), None)
-        for num in xrange(polygon_v2.numInteriorRings()):
-            line_v2 = self.__newLine(polygon_v2.interiorRing(num), dx, dy, curved[num+1])
-            self.__newFeature.addInteriorRing(line_v2)
-            self.__rubberBand.addGeometry(QgsGeometry(line_v2.curveToLine()), None)
+        self.__vector = [point.x() - self.__anchor.x(), point.y() - self.__anchor.y()]
+        if self.__batchFeatures is None:
+            coordinates = self.__coordinates.clone()
+            coordinates.translate(self.__vector[0], self.__vector[1])
+            self.__newFeature = coordinates.toGeometryV2()
 
-    def __polygonVertexId(self, polygon_v2):
+    def __snappedPoint(self, mapPoint):
         """
-        To get the id of the selected vertex from a polygon
-        :param polygon_v2: the polygon as polygonV2
-        :return: id as QgsVertexId
+        To snap a position on the snapping layers, with intersections
+        :param mapPoint: position as mapPoint
+        :return: snapped position if any, the same position otherwise
         """
-        eR = polygon_v2.exteriorRing()
-        if self.__selectedVertex < eR.numPoints():
-            return QgsVertexId(0, 0, self.__selectedVertex, 1)
-        else:
-            sel = self.__selectedVertex - eR.numPoints()
-            for num in xrange(polygon_v2.numInteriorRings()):
-                iR = polygon_v2.interiorRing(num)
-                if sel < iR.numPoints():
-                    return QgsVertexId(0, num+1, sel, 1)
-                sel -= iR.numPoints()
+        match = Finder.snap(mapPoint, self.__snappingContext, True)
+        if match.hasVertex() or match.hasEdge():
+            return match.point()
+        return mapPoint
 
-    def __newLine(self, curve_v2, dx, dy, curved):
+    def __moveSelection(self):
         """
-        To create a new moved line for a part of a polygon
-        :param curve_v2: the original line
-        :param dx: x translation
-        :param dy: y translation
-        :return: the line as lineV2
+        To move all the selected features by the translation vector, as one undoable command
         """
-        if curved:
-            new_line_v2 = QgsCircularStringV2()
-        else:
-            new_line_v2 = QgsLineStringV2()
-        points = []
+        self.__layer.beginEditCommand(QCoreApplication.translate("VDLTools","Move features"))
+        for feature in self.__batchFeatures:
+            geometry = QgsGeometry(feature.geometry())
+            geometry.translate(self.__vector[0], self.__vector[1])
+            self.__layer.changeGeometry(feature.id(), geometry)
+        self.__layer.endEditCommand()
 
-        for pos in xrange(curve_v2.numPoints()):
-            x = curve_v2.pointN(pos).x() - dx
-            y = curve_v2.pointN(pos).y() - dy
-            pt = QgsPointV2(x, y)
-            pt.addZValue(curve_v2.pointN(pos).z())
-            points.append(pt)
-        new_line_v2.setPoints(points)
-        return new_line_v2
+    def __copySelection(self):
+        """
+        To copy all the selected features at the translation vector, as one undoable command
+        """
+        fields = self.__layer.pendingFields()
+        keyIndex = fields.fieldNameIndex(QgsDataSourceURI(self.__layer.source()).keyColumn())
+        features = []
+        for feature in self.__batchFeatures:
+            geometry = QgsGeometry(feature.geometry())
+            geometry.translate(self.__vector[0], self.__vector[1])
+            copy = QgsFeature(fields)
+            copy.setGeometry(geometry)
+            attributes = feature.attributes()
+            if keyIndex > -1:
+                attributes[keyIndex] = None
+            copy.setAttributes(attributes)
+            features.append(copy)
+        self.__layer.beginEditCommand(QCoreApplication.translate("VDLTools","Copy features"))
+        self.__layer.addFeatures(features, False)
+        self.__layer.endEditCommand()
 
     def __onConfirmClose(self):
         """
@@ -291,13 +293,18 @@ class MoveTool(QgsMapTool):
         """
         self.__confDlg.close()
         self.__rubberBand.reset()
-        self.__rubberSnap.reset()
+        if self.__rubberSnap:
+            self.__rubberSnap.reset()
         self.__isEditing = 0
         self.__lastFeatureId = None
         self.__selectedFeature = None
         self.__rubberBand = None
         self.__rubberSnap = None
         self.__newFeature = None
+        self.__coordinates = None
+        self.__anchor = None
+        self.__vector = None
+        self.__batchFeatures = None
         self.__selectedVertex = None
         self.__layer.removeSelection()
 
@@ -305,12 +312,15 @@ class MoveTool(QgsMapTool):
         """
         When the Move button in Move Confirm Dialog is pushed
         """
-        geometry = QgsGeometry(self.__newFeature)
-        if not geometry.isGeosValid():
-            self.__iface.messageBar().pushMessage(
-                QCoreApplication.translate("VDLTools","Error"),
-                QCoreApplication.translate("VDLTools","Geos geometry problem"), level=QgsMessageBar.CRITICAL)
-        self.__layer.changeGeometry(self.__selectedFeature.id(), geometry)
+        if self.__batchFeatures is not None:
+            self.__moveSelection()
+        else:
+            geometry = QgsGeometry(self.__newFeature)
+            if not geometry.isGeosValid():
+                self.__iface.messageBar().pushMessage(
+                    QCoreApplication.translate("VDLTools","Error"),
+                    QCoreApplication.translate("VDLTools","Geos geometry problem"), level=QgsMessageBar.CRITICAL)
+            self.__layer.changeGeometry(self.__selectedFeature.id(), geometry)
         self.__layer.updateExtents()
         self.__onConfirmClose()
 
@@ -318,6 +328,11 @@ class MoveTool(QgsMapTool):
         """
         When the Copy button in Move Confirm Dialog is pushed
         """
+        if self.__batchFeatures is not None:
+            self.__copySelection()
+            self.__layer.updateExtents()
+            self.__onConfirmClose()
+            return
         geometry = QgsGeometry(self.__newFeature)
         if not geometry.isGeosValid():
             self.__iface.messageBar().pushMessage(
@@ -355,8 +370,17 @@ class MoveTool(QgsMapTool):
         When the mouse is moved
         :param event: mouse event
         """
+        self.__moveThrottle.push(event)
+
+    def __moved(self, mapPoint):
+        """
+        When the mouse has moved, at most at the throttle rate
+        :param mapPoint: map position of the mouse
+        """
         if not self.__isEditing and not self.__findVertex and not self.__onMove:
-            f = Finder.findClosestFeatureAt(event.mapPoint(), self.__layerConfig, self)
+            if self.__layer.selectedFeatureCount() > 1:
+                return
+            f = Finder.findClosestFeatureAt(mapPoint, self.__layerConfig, self)
             if f is not None and self.__lastFeatureId != f.id():
                 self.__lastFeatureId = f.id()
                 self.__layer.setSelectedFeatures([f.id()])
@@ -365,7 +389,7 @@ class MoveTool(QgsMapTool):
                 self.__lastFeatureId = None
         elif self.__findVertex:
             self.__rubberBand.reset()
-            closest = self.__selectedFeature.geometry().closestVertex(event.mapPoint())
+            closest = self.__selectedFeature.geometry().closestVertex(mapPoint)
             color = QColor("red")
             color.setAlphaF(0.78)
             self.__rubberBand.setColor(color)
@@ -373,23 +397,9 @@ class MoveTool(QgsMapTool):
             self.__rubberBand.setIconSize(20)
             self.__rubberBand.setToGeometry(QgsGeometry().fromPoint(closest[0]), None)
         elif self.__onMove:
-            if self.__rubberBand:
-                self.__rubberBand.reset()
-            if self.__layer.geometryType() == QGis.Polygon:
-                self.__polygonPreview(event.mapPoint())
-            elif self.__layer.geometryType() == QGis.Line:
-                self.__linePreview(event.mapPoint())
-            else:
-                self.__pointPreview(event.mapPoint())
+            self.__movePreview(mapPoint)
             color = QColor("red")
             color.setAlphaF(0.78)
-            self.__rubberBand.setColor(color)
-            self.__rubberBand.setWidth(2)
-            if self.__layer.geometryType() != QGis.Point:
-                self.__rubberBand.setLineStyle(Qt.DotLine)
-            else:
-                self.__rubberBand.setIcon(4)
-                self.__rubberBand.setIconSize(20)
             if self.__rubberSnap:
                 self.__rubberSnap.reset()
             else:
@@ -397,7 +407,7 @@ class MoveTool(QgsMapTool):
             self.__rubberSnap.setColor(color)
             self.__rubberSnap.setWidth(2)
             self.__rubberSnap.setIconSize(20)
-            match = Finder.snap(event.mapPoint(), self.__canvas, True)
+            match = Finder.snap(mapPoint, self.__snappingContext, True)
             if match.hasVertex():
                 if match.layer():
                     self.__rubberSnap.setIcon(4)
@@ -417,9 +427,9 @@ class MoveTool(QgsMapTool):
             #     self.__rubberSnap.setColor(color)
             #     self.__rubberSnap.setWidth(2)
             #     self.__rubberSnap.setIconSize(20)
-            #     snappedIntersection = Finder.snapToIntersection(event.mapPoint(), self, self.__layerList)
+            #     snappedIntersection = Finder.snapToIntersection(mapPoint, self, self.__layerList)
             #     if snappedIntersection is None:
-            #         snappedPoint = Finder.snapToLayers(event.mapPoint(), self.__snapperList)
+            #         snappedPoint = Finder.snapToLayers(mapPoint, self.__snapperList)
             #         if snappedPoint is not None:
             #             self.__rubberSnap.setIcon(4)
             #             self.__rubberSnap.setToGeometry(QgsGeometry().fromPoint(snappedPoint), None)
@@ -435,32 +445,32 @@ class MoveTool(QgsMapTool):
         When the mouse is clicked
         :param event: mouse event
         """
+        self.__moveThrottle.flush()
         if not self.__isEditing and not self.__findVertex and not self.__onMove:
             found_features = self.__layer.selectedFeatures()
-            if len(found_features) > 0:
-                if len(found_features) < 1:
-                    self.__iface.messageBar().pushMessage(
-                        QCoreApplication.translate("VDLTools","One feature at a time"), level=QgsMessageBar.INFO)
-                    return
+            if len(found_features) > 1:
+                self.__batchFeatures = found_features
+                self.__onMove = 1
+                self.__startMove(self.__snappedPoint(event.mapPoint()))
+            elif len(found_features) > 0:
                 self.__selectedFeature = found_features[0]
                 if self.__layer.geometryType() != QGis.Point:
                     self.__findVertex = 1
                     self.__rubberBand = QgsRubberBand(self.__canvas, QGis.Point)
                 else:
                     self.__onMove = 1
+                    self.__startMove()
                     # self.__snapperList, self.__layerList = Finder.updateSnapperList(self.__iface)
         elif self.__findVertex:
             self.__findVertex = 0
             closest = self.__selectedFeature.geometry().closestVertex(event.mapPoint())
             self.__selectedVertex = closest[1]
             self.__onMove = 1
+            self.__startMove()
             # self.__snapperList, self.__layerList = Finder.updateSnapperList(self.__iface)
         elif self.__onMove:
             self.__onMove = 0
-            mapPoint = event.mapPoint()
-            match = Finder.snap(event.mapPoint(), self.__canvas, True)
-            if match.hasVertex() or match.hasEdge():
-                mapPoint = match.point()
+            mapPoint = self.__snappedPoint(event.mapPoint())
             # snappedIntersection = Finder.snapToIntersection(event.mapPoint(), self, self.__layerList)
             # if snappedIntersection is None:
             #     snappedPoint = Finder.snapToLayers(event.mapPoint(), self.__snapperList)
@@ -469,24 +479,12 @@ class MoveTool(QgsMapTool):
             # else:
             #     mapPoint = snappedIntersection
             self.__isEditing = 1
-            if self.__rubberBand:
-                self.__rubberBand.reset()
-            if self.__layer.geometryType() == QGis.Polygon:
-                self.__polygonPreview(mapPoint)
-            elif self.__layer.geometryType() == QGis.Line:
-                self.__linePreview(mapPoint)
-            else:
-                self.__pointPreview(mapPoint)
-            color = QColor("red")
-            color.setAlphaF(0.78)
-            self.__rubberBand.setColor(color)
-            if self.__layer.geometryType() != QGis.Point:
-                self.__rubberBand.setWidth(2)
-                self.__rubberBand.setLineStyle(Qt.DotLine)
+            self.__movePreview(mapPoint)
+            self.__moveFeature(mapPoint)
+            if self.__batchFeatures is not None:
+                self.__confDlg = MoveConfirmDialog(len(self.__batchFeatures))
             else:
-                self.__rubberBand.setIcon(4)
-                self.__rubberBand.setIconSize(20)
-            self.__confDlg = MoveConfirmDialog()
+                self.__confDlg = MoveConfirmDialog()
             self.__confDlg.moveButton().clicked.connect(self.__onConfirmMove)
             self.__confDlg.copyButton().clicked.connect(self.__onConfirmCopy)
             self.__confDlg.cancelButton().clicked.connect(self.__onConfirmClose)
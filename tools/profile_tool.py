@@ -20,12 +20,12 @@
  *                                                                         *
  ***************************************************************************/
 """
+from math import hypot
 from qgis.core import (QgsMapLayer,
                        QgsPointLocator,
                        QgsSnappingUtils,
                        QgsGeometry,
                        QGis,
-                       QgsTolerance,
                        QgsProject,
                        QgsPoint,
                        QgsWKBTypes)
@@ -37,7 +37,9 @@ from PyQt4.QtCore import (Qt,
 from PyQt4.QtGui import (QMessageBox,
                          QColor)
 from ..core.finder import Finder
+from ..core.move_throttle import MoveThrottle
 from ..core.geometry_v2 import GeometryV2
+from ..core.profile_builder import ProfileBuilder
 from ..ui.profile_layers_dialog import ProfileLayersDialog
 from ..ui.profile_dock_widget import ProfileDockWidget
 from ..ui.profile_message_dialog import ProfileMessageDialog
@@ -46,6 +48,9 @@ from ..ui.profile_confirm_dialog import ProfileConfirmDialog
 
 class ProfileTool(QgsMapTool):
 
+    # a connecting path is searched up to this ratio of the straight distance between the chain and the clicked line
+    PATH_DETOUR = 3.0
+
     def __init__(self, iface):
         """
         Constructor
@@ -54,6 +59,7 @@ class ProfileTool(QgsMapTool):
         QgsMapTool.__init__(self, iface.mapCanvas())
         self.__iface = iface
         self.__canvas = iface.mapCanvas()
+        self.__moveThrottle = MoveThrottle(self.__canvas, self.__moved)
         self.__icon_path = ':/plugins/VDLTools/icons/profile_icon.png'
         self.__text = QCoreApplication.translate("VDLTools","Profile of a line")
         # self.__oldTool = None
@@ -67,6 +73,7 @@ class ProfileTool(QgsMapTool):
         self.__msgDlg = None
         self.__confDlg = None
         self.__points = None
+        self.__builder = None
         self.__layers = None
         self.__features = None
         self.__inSelection = False
@@ -75,8 +82,12 @@ class ProfileTool(QgsMapTool):
         self.__selectedDirections = None
         self.__startVertex = None
         self.__endVertex = None
+        self.__lastPath = None
+        self.__lastPathId = None
+        self.__topologyCache = None
         self.__rubberSit = None
         self.__rubberDif = None
+        self.__layerConfig = None
 
     def icon_path(self):
         """
@@ -99,6 +110,13 @@ class ProfileTool(QgsMapTool):
         # self.__oldTool = self.__canvas.mapTool()
         self.__canvas.setMapTool(self)
 
+    def setTopologyCache(self, topologyCache):
+        """
+        To set the topology cache
+        :param topologyCache: the plugin topology cache
+        """
+        self.__topologyCache = topologyCache
+
     def activate(self):
         """
         When the action is selected
@@ -117,6 +135,9 @@ class ProfileTool(QgsMapTool):
         self.__rubberDif.setColor(color)
         self.__rubberDif.setIcon(2)
         self.__rubberDif.setIconSize(20)
+        self.__updateList()
+        self.__canvas.layersChanged.connect(self.__updateList)
+        QgsProject.instance().snapSettingsChanged.connect(self.__updateList)
 
     def closed(self):
         self.__lineLayer.removeSelection()
@@ -131,8 +152,11 @@ class ProfileTool(QgsMapTool):
         """
         When the action is deselected
         """
+        self.__moveThrottle.cancel()
         self.__rubberSit.reset()
         self.__rubberDif.reset()
+        self.__canvas.layersChanged.disconnect(self.__updateList)
+        QgsProject.instance().snapSettingsChanged.disconnect(self.__updateList)
         if self.__dockWdg is not None:
             self.__dockWdg.close()
         if QgsMapTool is not None:
@@ -146,6 +170,7 @@ class ProfileTool(QgsMapTool):
         if layer is not None and layer.type() == QgsMapLayer.VectorLayer and \
                         QGis.fromOldWkbType(layer.wkbType()) == QgsWKBTypes.LineStringZ:
             self.__lineLayer = layer
+            self.__updateList()
             self.action().setEnabled(True)
             return
         self.action().setEnabled(False)
@@ -155,6 +180,18 @@ class ProfileTool(QgsMapTool):
         if self.__dockWdg is not None:
             self.__dockWdg.close()
         self.__lineLayer = None
+        self.__layerConfig = None
+
+    def __updateList(self):
+        """
+        To update the snapping options of the line layer
+        """
+        if self.__lineLayer is None:
+            self.__layerConfig = None
+            return
+        noUse, enabled, snappingType, unitType, tolerance, avoidIntersection = \
+            QgsProject.instance().snapSettingsForLayer(self.__lineLayer.id())
+        self.__layerConfig = QgsSnappingUtils.LayerConfig(self.__lineLayer, QgsPointLocator.Vertex, tolerance, unitType)
 
     def __setLayerDialog(self):
         """
@@ -281,28 +318,35 @@ class ProfileTool(QgsMapTool):
                     str(s['point']))
                 return
         self.__msgDlg.close()
+        selectedFeatures = {}
+        for f in self.__lineLayer.selectedFeatures():
+            selectedFeatures[f.id()] = f
         lines = []
         for iden in self.__selectedIds:
-            for f in self.__lineLayer.selectedFeatures():
-                if f.id() == iden:
-                    line, curved = GeometryV2.asLineV2(f.geometry())
-                    lines.append(line)
-                    break
+            f = selectedFeatures.get(iden)
+            if f is None:
+                lines.append(None)
+            else:
+                line, curved = GeometryV2.asLineV2(f.geometry())
+                lines.append(line)
+        changed = set()
         for s in situations:
             z = self.__points[s['point']]['z'][s['layer']+num_lines-1]
             for i in xrange(num_lines):
-                if self.__points[s['point']]['z'][i] is not None:
+                if self.__points[s['point']]['z'][i] is not None and lines[i] is not None:
                     index = s['point']-self.__selectedStarts[i]
                     if self.__selectedDirections[i] is False:
                         index = lines[i].numPoints()-1-index
                     lines[i].setZAt(index, z)
+                    changed.add(i)
         if not self.__lineLayer.isEditable():
             self.__lineLayer.startEditing()
-        for i in xrange(len(lines)):
-            geom = QgsGeometry(lines[i].clone())
-            self.__lineLayer.changeGeometry(self.__selectedIds[i], geom)
-            self.__lineLayer.updateExtents()
-            #  self.__lineLayer.commitChanges()
+        self.__lineLayer.beginEditCommand(QCoreApplication.translate("VDLTools","Change lines elevations"))
+        for i in sorted(changed):
+            self.__lineLayer.changeGeometry(self.__selectedIds[i], QgsGeometry(lines[i].clone()))
+        self.__lineLayer.endEditCommand()
+        self.__lineLayer.updateExtents()
+        #  self.__lineLayer.commitChanges()
         self.__dockWdg.clearData()
         self.__lineLayer.removeSelection()
         self.__selectedIds = None
@@ -325,8 +369,8 @@ class ProfileTool(QgsMapTool):
         self.__msgDlg.close()
         situations = self.__msgDlg.getSituations()
         num_lines = len(self.__selectedIds)
+        changes = {}
         for s in situations:
-            layer = self.__layers[s['layer']-1]
             point = self.__features[s['point']][s['layer']-1]
             point_v2 = GeometryV2.asPointV2(point.geometry())
             newZ = point_v2.z()
@@ -335,9 +379,15 @@ class ProfileTool(QgsMapTool):
                     newZ = self.__points[s['point']]['z'][i]
                     break
             point_v2.setZ(newZ)
+            changes.setdefault(s['layer']-1, {})[point.id()] = QgsGeometry(point_v2)
+        for order, geometries in changes.iteritems():
+            layer = self.__layers[order]
             if not layer.isEditable():
                 layer.startEditing()
-            layer.changeGeometry(point.id(), QgsGeometry(point_v2))
+            layer.beginEditCommand(QCoreApplication.translate("VDLTools","Change points elevations"))
+            for fid, geometry in geometries.iteritems():
+                layer.changeGeometry(fid, geometry)
+            layer.endEditCommand()
             layer.updateExtents()
             #  layer.commitChanges()
         self.__dockWdg.clearData()
@@ -361,56 +411,25 @@ class ProfileTool(QgsMapTool):
         self.__inSelection = False
 
     def __lineVertices(self):
-        availableLayers = self.__getPointLayers()
-        pointLayers = []
-        self.__points = []
-        self.__selectedStarts = []
-        num = 0
-        num_lines = len(self.__selectedIds)
+        """
+        To merge the vertices of the selected lines, and find the points layers having points on them
+        :return: points layers list
+        """
+        selectedFeatures = {}
+        for f in self.__lineLayer.selectedFeatures():
+            selectedFeatures[f.id()] = f
+        features = []
         for iden in self.__selectedIds:
-            self.__selectedStarts.append(max(0,len(self.__points)-1))
-            direction = self.__selectedDirections[num]
-            selected = None
-            for f in self.__lineLayer.selectedFeatures():
-                if f.id() == iden:
-                    selected = f
-                    break
+            selected = selectedFeatures.get(iden)
             if selected is None:
                 self.__iface.messageBar().pushMessage(
                     QCoreApplication.translate("VDLTools","Error"),
                     QCoreApplication.translate("VDLTools","error on selected"), level=QgsMessageBar.CRITICAL)
-                continue
-            line_v2, curved = GeometryV2.asLineV2(selected.geometry())
-            if direction:
-                rg = xrange(line_v2.numPoints())
-            else:
-                rg = xrange(line_v2.numPoints()-1, -1, -1)
-            for i in rg:
-                pt_v2 = line_v2.pointN(i)
-                x = pt_v2.x()
-                y = pt_v2.y()
-                doublon = False
-                for item in self.__points:
-                    if item['x'] == x and item['y'] == y:
-                        item['z'][num] = pt_v2.z()
-                        doublon = True
-                        break
-                if not doublon:
-                    z = []
-                    for j in xrange(num_lines):
-                        if j == num:
-                            z.append(pt_v2.z())
-                        else:
-                            z.append(None)
-                    self.__points.append({'x': x, 'y': y, 'z': z})
-                    for layer in availableLayers:
-                        laySettings = QgsSnappingUtils.LayerConfig(layer, QgsPointLocator.Vertex, 0.03, QgsTolerance.LayerUnits)
-                        point = Finder.findClosestFeatureAt(self.toMapCoordinates(layer, QgsPoint(x, y)), laySettings, self)
-                        if point is not None:
-                            if layer not in pointLayers:
-                                pointLayers.append(layer)
-            num += 1
-        return pointLayers
+            features.append(selected)
+        self.__builder = ProfileBuilder(features, self.__selectedDirections)
+        self.__points = self.__builder.points()
+        self.__selectedStarts = self.__builder.starts()
+        return self.__builder.pointLayers(self.__getPointLayers())
 
     def __onLayOk(self):
         """
@@ -421,27 +440,10 @@ class ProfileTool(QgsMapTool):
         self.__layOk()
 
     def __layOk(self):
-        self.__features = []
-
-        for points in self.__points:
-            feat = []
-            x = points['x']
-            y = points['y']
-            z = points['z']
-            for layer in self.__layers:
-                laySettings = QgsSnappingUtils.LayerConfig(layer, QgsPointLocator.Vertex, 0.03, QgsTolerance.LayerUnits)
-                point = Finder.findClosestFeatureAt(self.toMapCoordinates(layer, QgsPoint(x, y)), laySettings, self)
-                feat.append(point)
-                if point is None:
-                    z.append(None)
-                else:
-                    point_v2 = GeometryV2.asPointV2(point.geometry())
-                    zp = point_v2.z()
-                    if zp is None or zp != zp:
-                        z.append(0)
-                    else:
-                        z.append(zp)
-            self.__features.append(feat)
+        """
+        To match the points of the chosen layers to the profile vertices, and add their elevations
+        """
+        self.__features = self.__builder.setLayers(self.__layers)
 
         # points = []
         # for key, p in pointz.items():
@@ -461,34 +463,67 @@ class ProfileTool(QgsMapTool):
         self.__calculateProfile(names)
         self.__isChoosed = 0
 
-    @staticmethod
-    def contains(line, point):
-        """
-        To check if a position is a line vertex
-        :param line: the line
-        :param point: the position
-        :return: the vertex id in the line, or -1
-        """
-        pos = 0
-        if point is None:
-            return -1
-        for pt in line:
-            if pt.x() == point.x() and pt.y() == point.y():
-                return pos
-            pos += 1
-        return -1
+    def __adjacentPath(self, fid):
+        """
+        To check if a line is connected to one end of the selected chain, quick enough to be done on each hover
+        :param fid: the line feature id
+        :return: true if the line is before the chain start, the line as [(feature id, direction)], and the new chain
+        end node, or none
+        """
+        topology = self.__topologyCache.layerTopology(self.__lineLayer)
+        endpoints = topology.endpoints(fid)
+        if endpoints is None:
+            return None
+        if fid in topology.linesAt(self.__endVertex):
+            if endpoints[0] == self.__endVertex:
+                return False, [(fid, True)], endpoints[1]
+            return False, [(fid, False)], endpoints[0]
+        if fid in topology.linesAt(self.__startVertex):
+            if endpoints[1] == self.__startVertex:
+                return True, [(fid, True)], endpoints[0]
+            return True, [(fid, False)], endpoints[1]
+        return None
+
+    def __chainPath(self, fid):
+        """
+        To find the shortest lines path connecting a line to one end of the selected chain, only done on click as
+        the search is bounded by PATH_DETOUR but may still read many lines
+        :param fid: the line feature id
+        :return: true if the path is before the chain start, the path as list of (feature id, direction) in chain
+        order, and the new chain end node, or none
+        """
+        topology = self.__topologyCache.layerTopology(self.__lineLayer)
+        endpoints = topology.endpoints(fid)
+        if endpoints is None:
+            return None
+        found = None
+        for atStart, node in [(False, self.__endVertex), (True, self.__startVertex)]:
+            straight = min(hypot(node[0] - end[0], node[1] - end[1]) for end in endpoints)
+            path = topology.path(node, fid, self.__selectedIds, self.PATH_DETOUR * straight)
+            if path is not None and (found is None or path[2] < found[2]):
+                found = path + (atStart,)
+        if found is None:
+            return None
+        edges, node, length, atStart = found
+        if atStart:
+            edges = [(iden, not direction) for iden, direction in reversed(edges)]
+        return atStart, edges, node
 
     def canvasMoveEvent(self, event):
         """
         When the mouse is moved
         :param event: mouse event
         """
+        self.__moveThrottle.push(event)
+
+    def __moved(self, mapPoint):
+        """
+        When the mouse has moved, at most at the throttle rate
+        :param mapPoint: map position of the mouse
+        """
         if not self.__isChoosed:
             if self.__lineLayer is not None:
-                noUse, enabled, snappingType, unitType, tolerance, avoidIntersection = \
-                    QgsProject.instance().snapSettingsForLayer(self.__lineLayer.id())
-                layerConfig = QgsSnappingUtils.LayerConfig(self.__lineLayer, QgsPointLocator.Vertex, tolerance, unitType)
-                f = Finder.findClosestFeatureAt(event.mapPoint(), layerConfig, self)
+                f = Finder.findClosestFeatureAt(mapPoint, self.__layerConfig, self)
                 if not self.__inSelection:
                     if f is not None and self.__lastFeatureId != f.id():
                         self.__lastFeature = f
@@ -503,23 +538,16 @@ class ProfileTool(QgsMapTool):
                         self.__endVertex = None
                 else:
                     if f is not None and (not self.__selectedIds or f.id() not in self.__selectedIds):
-                        line = f.geometry().asPolyline()
-                        if self.contains(line, self.__endVertex) > -1:
-                            self.__lastFeature = f
-                            self.__lastFeatureId = f.id()
-                            features = self.__selectedIds + [f.id()]
-                            self.__lineLayer.setSelectedFeatures(features)
-
-                        elif self.contains(line, self.__startVertex) > -1:
-                            self.__lastFeature = f
-                            self.__lastFeatureId = f.id()
-                            features = self.__selectedIds + [f.id()]
-                            self.__lineLayer.setSelectedFeatures(features)
-
+                        if self.__lastPathId != f.id():
+                            self.__lastPathId = f.id()
+                            self.__lastPath = self.__adjacentPath(f.id())
+                        # a line not connected to the chain can still be clicked, the path is then searched
+                        self.__lastFeature = f
+                        self.__lastFeatureId = f.id()
+                        if self.__lastPath is not None:
+                            self.__lineLayer.setSelectedFeatures(self.__selectedIds + [f.id()])
                         else:
                             self.__lineLayer.setSelectedFeatures(self.__selectedIds)
-                            self.__lastFeatureId = None
-                            self.__lastFeature = None
 
                     if f is None and self.__selectedIds is not None:
                         self.__lineLayer.setSelectedFeatures(self.__selectedIds)
@@ -531,43 +559,44 @@ class ProfileTool(QgsMapTool):
         When the mouse is clicked
         :param event: mouse event
         """
+        self.__moveThrottle.flush()
         if event.button() == Qt.RightButton:
             if self.__lineLayer.selectedFeatures() and self.__selectedIds:
                 self.__isChoosed = 1
                 self.__setLayerDialog()
         elif event.button() == Qt.LeftButton:
             if self.__lastFeature and (not self.__selectedIds or self.__lastFeature.id() not in self.__selectedIds):
-                self.__inSelection = True
-                line = self.__lastFeature.geometry().asPolyline()
                 if self.__selectedIds is None:
-                    self.__selectedIds = []
-                    self.__startVertex = line[0]
-                    self.__endVertex = line[-1]
-                    self.__selectedDirections = []
-                    self.__selectedDirections.append(True)  # direction du premier prime
-                    self.__selectedIds.append(self.__lastFeatureId)
+                    endpoints = self.__topologyCache.layerTopology(self.__lineLayer).endpoints(self.__lastFeatureId)
+                    if endpoints is None:
+                        return
+                    self.__inSelection = True
+                    self.__selectedIds = [self.__lastFeatureId]
+                    self.__selectedDirections = [True]  # direction du premier prime
+                    self.__startVertex, self.__endVertex = endpoints
                 else:
-                    pos = self.contains(line, self.__startVertex)
-                    if pos > -1:
-                        self.__selectedIds = [self.__lastFeatureId] + self.__selectedIds
-                        if pos == 0:
-                            direction = False
-                            self.__startVertex = line[-1]
-                        else:
-                            direction = True
-                            self.__startVertex = line[0]
-                        self.__selectedDirections = [direction] + self.__selectedDirections
+                    path = self.__lastPath
+                    if path is None:
+                        path = self.__chainPath(self.__lastFeatureId)
+                    if path is None:
+                        self.__iface.messageBar().pushMessage(
+                            QCoreApplication.translate("VDLTools","No connected lines path to this line"),
+                            level=QgsMessageBar.INFO)
+                        return
+                    atStart, edges, node = path
+                    ids = [iden for iden, direction in edges]
+                    directions = [direction for iden, direction in edges]
+                    if atStart:
+                        self.__selectedIds = ids + self.__selectedIds
+                        self.__selectedDirections = directions + self.__selectedDirections
+                        self.__startVertex = node
                     else:
-                        pos = self.contains(line, self.__endVertex)
-                        self.__selectedIds.append(self.__lastFeatureId)
-                        if pos == 0:
-                            direction = True
-                            self.__endVertex = line[-1]
-                        else:
-                            direction = False
-                            self.__endVertex = line[0]
-                        self.__selectedDirections.append(direction)
+                        self.__selectedIds = self.__selectedIds + ids
+                        self.__selectedDirections = self.__selectedDirections + directions
+                        self.__endVertex = node
                     self.__lineLayer.setSelectedFeatures(self.__selectedIds)
+                self.__lastPath = None
+                self.__lastPathId = None
 
     def __calculateProfile(self, names):
         """
@@ -579,46 +608,20 @@ class ProfileTool(QgsMapTool):
         self.__dockWdg.clearData()
         if len(self.__points) == 0:
             return
-        self.__dockWdg.setProfiles(self.__points, len(self.__selectedIds))
-        self.__dockWdg.drawVertLine()
+        profile = self.__builder.profile()
+        self.__dockWdg.setProfiles(profile)
         self.__dockWdg.attachCurves(names)
 
-        situations = []
-        differences = []
-        for p in xrange(len(self.__points)):
-            pt = self.__points[p]
-            num_lines = len(self.__selectedIds)
-            zz = []
-            for i in xrange(num_lines):
-                if pt['z'][i] is not None:
-                    zz.append(i)
-            if len(zz) == 0:
-                self.__iface.messageBar().pushMessage(
-                    QCoreApplication.translate("VDLTools","Warning"),
-                    QCoreApplication.translate("VDLTools","no line z ?!?"), level=QgsMessageBar.WARNING)
-            elif len(zz) == 1:
-                z0 = pt['z'][zz[0]]
-                tol = 0.01 * z0
-                for i in xrange(num_lines, len(pt['z'])):
-                    if pt['z'][i] is None:
-                        continue
-                    if abs(pt['z'][i]-z0) > tol:
-                        situations.append({'point': p, 'layer': (i-num_lines+1), 'vertex': z0})
-            elif len(zz) == 2:
-                z0 = pt['z'][zz[0]]
-                tol = 0.01 * z0
-                if abs(pt['z'][zz[1]] - z0) > tol:
-                    differences.append({'point': p, 'v1': z0, 'v2': pt['z'][zz[1]]})
-                else:
-                    for i in xrange(num_lines, len(pt['z'])):
-                        if pt['z'][i] is None:
-                            continue
-                        if abs(pt['z'][i]-z0) > tol:
-                            situations.append({'point': p, 'layer': (i-num_lines+1), 'vertex': z0})
-            else:
-                self.__iface.messageBar().pushMessage(
-                    QCoreApplication.translate("VDLTools","Warning"),
-                    QCoreApplication.translate("VDLTools","more than 2 lines z ?!?"), level=QgsMessageBar.WARNING)
+        counts = profile.lineCounts()
+        if (counts == 0).any():
+            self.__iface.messageBar().pushMessage(
+                QCoreApplication.translate("VDLTools","Warning"),
+                QCoreApplication.translate("VDLTools","no line z ?!?"), level=QgsMessageBar.WARNING)
+        if (counts > 2).any():
+            self.__iface.messageBar().pushMessage(
+                QCoreApplication.translate("VDLTools","Warning"),
+                QCoreApplication.translate("VDLTools","more than 2 lines z ?!?"), level=QgsMessageBar.WARNING)
+        situations, differences = profile.checks()
 
         if (len(situations) > 0) or (len(differences) > 0):
             self.__setMessageDialog(situations, differences, names)
@@ -25,32 +25,39 @@ from PyQt4.QtGui import (QDialog,
                          QGridLayout,
                          QPushButton,
                          QLabel,
-                         QComboBox)
+                         QComboBox,
+                         QProgressBar)
 from PyQt4.QtCore import QCoreApplication
 
 
 class ImportJobsDialog(QDialog):
 
-    def __init__(self, jobs):
+    def __init__(self):
         """
-        Constructor
-        :param jobs: all the jobs available for import
+        Constructor, the jobs available for import being given later, once listed
         """
         QDialog.__init__(self)
-        self.__jobs = jobs
+        self.__jobs = []
         self.setWindowTitle(QCoreApplication.translate("VDLTools","Choose job"))
         self.resize(300, 100)
         self.__layout = QGridLayout()
         self.__okButton = QPushButton(QCoreApplication.translate("VDLTools","OK"))
         self.__okButton.setMinimumHeight(20)
         self.__okButton.setMinimumWidth(100)
+        self.__okButton.setEnabled(False)
 
         self.__cancelButton = QPushButton(QCoreApplication.translate("VDLTools","Cancel"))
         self.__cancelButton.setMinimumHeight(20)
         self.__cancelButton.setMinimumWidth(100)
 
+        self.__refreshButton = QPushButton(QCoreApplication.translate("VDLTools","Refresh"))
+        self.__refreshButton.setMinimumHeight(20)
+        self.__refreshButton.setMinimumWidth(100)
+        self.__refreshButton.setEnabled(False)
+
         self.__layout.addWidget(self.__okButton, 100, 1)
         self.__layout.addWidget(self.__cancelButton, 100, 2)
+        self.__layout.addWidget(self.__refreshButton, 100, 3)
 
         label = QLabel(QCoreApplication.translate("VDLTools","Job : "))
         label.setMinimumHeight(20)
@@ -60,20 +67,65 @@ class ImportJobsDialog(QDialog):
         self.__jobCombo = QComboBox()
         self.__jobCombo.setMinimumHeight(20)
         self.__jobCombo.setMinimumWidth(50)
+        self.__layout.addWidget(self.__jobCombo, 0, 2, 1, 2)
+        self.__jobCombo.currentIndexChanged.connect(self.__jobComboChanged)
+        self.setLoading()
+
+        self.__progressBar = QProgressBar()
+        self.__progressBar.setMinimumHeight(20)
+        self.__progressBar.setVisible(False)
+        self.__layout.addWidget(self.__progressBar, 1, 1, 1, 3)
+
+        self.setLayout(self.__layout)
+
+    def setLoading(self):
+        """
+        To empty the combo while the jobs are listed
+        """
+        self.__jobs = []
+        self.__jobCombo.blockSignals(True)
+        self.__jobCombo.clear()
+        self.__jobCombo.addItem(QCoreApplication.translate("VDLTools","Loading jobs..."))
+        self.__jobCombo.blockSignals(False)
+        self.__jobCombo.setEnabled(False)
+        self.__okButton.setEnabled(False)
+        self.__refreshButton.setEnabled(False)
+
+    def setJobs(self, jobs):
+        """
+        To fill the combo with the listed jobs
+        :param jobs: all the jobs available for import
+        """
+        self.__jobs = jobs
+        self.__jobCombo.blockSignals(True)
+        self.__jobCombo.clear()
         self.__jobCombo.addItem("")
         for job in self.__jobs:
             self.__jobCombo.addItem(job)
-        self.__layout.addWidget(self.__jobCombo, 0, 2)
-        self.__jobCombo.currentIndexChanged.connect(self.__jobComboChanged)
+        self.__jobCombo.blockSignals(False)
+        self.__jobCombo.setEnabled(True)
+        self.__okButton.setEnabled(True)
+        self.__refreshButton.setEnabled(True)
 
-        self.setLayout(self.__layout)
+    def setProgress(self, done, total):
+        """
+        To show the progress of the running import, the job can't be changed anymore
+        :param done: number of processed measures
+        :param total: total number of measures, or 0 if not yet known
+        """
+        self.__jobCombo.setEnabled(False)
+        self.__okButton.setEnabled(False)
+        self.__refreshButton.setEnabled(False)
+        self.__progressBar.setVisible(True)
+        self.__progressBar.setMaximum(total)
+        self.__progressBar.setValue(done)
 
     def __jobComboChanged(self):
         """
         When the selected job has changed
         """
-        if self.__pointCombo.itemText(0) == "":
-            self.__pointCombo.removeItem(0)
+        if self.__jobCombo.itemText(0) == "":
+            self.__jobCombo.removeItem(0)
 
     def okButton(self):
         """
@@ -82,6 +134,13 @@ class ImportJobsDialog(QDialog):
         """
         return self.__okButton
 
+    def refreshButton(self):
+        """
+        To get the refresh button instance
+        :return: refresh button instance
+        """
+        return self.__refreshButton
+
     def cancelButton(self):
         """
         To get the cancel button instance
@@ -30,16 +30,23 @@ from PyQt4.QtCore import QCoreApplication
 
 class MoveConfirmDialog(QDialog):
 
-    def __init__(self):
+    def __init__(self, number=1):
         """
         Constructor
+        :param number: number of features to move or to copy
         """
         QDialog.__init__(self)
         self.setWindowTitle(QCoreApplication.translate("VDLTools","Move/Copy Confirmation"))
         self.resize(300, 100)
         self.__layout = QGridLayout()
 
-        self.__confirmLabel = QLabel(QCoreApplication.translate("VDLTools","Would you like to move or to copy this feature ?"))
+        if number > 1:
+            self.__confirmLabel = QLabel(
+                QCoreApplication.translate("VDLTools","Would you like to move or to copy these features ?") +
+                " (" + str(number) + ")")
+        else:
+            self.__confirmLabel = QLabel(
+                QCoreApplication.translate("VDLTools","Would you like to move or to copy this feature ?"))
 
         self.__layout.addWidget(self.__confirmLabel, 0, 0, 1, 3)
 
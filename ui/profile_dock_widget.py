@@ -43,6 +43,7 @@ from PyQt4.QtGui import (QDockWidget,
                          QPrinter)
 from PyQt4.QtCore import (QSize,
                           QRectF,
+                          QEvent,
                           QCoreApplication,
                           Qt,
                           pyqtSignal)
@@ -56,10 +57,10 @@ from PyQt4.Qwt5.Qwt import (QwtPlot,
                         QwtPlotMarker,
                         QwtSymbol,
                         QwtPlotCurve)
-import itertools
 import traceback
 import sys
-from math import sqrt
+import numpy
+from math import ceil
 from matplotlib import rc
 from matplotlib.figure import Figure, SubplotParams
 from matplotlib.backends.backend_qt4agg import FigureCanvasQTAgg  # , NavigationToolbar2QTAgg
@@ -68,6 +69,7 @@ from matplotlib.backends.backend_qt4agg import FigureCanvasQTAgg  # , Navigation
 class ProfileDockWidget(QDockWidget):
 
     closeSignal = pyqtSignal()
+    MAX_LABELS = 50
 
     def __init__(self, iface):
         """
@@ -86,12 +88,15 @@ class ProfileDockWidget(QDockWidget):
 
         self.__doTracking = False
         self.__vline = None
+        self.__background = None
+        self.cid = None
+        self.__drawCid = None
 
-        self.__profiles = None
-        self.__numLines = None
+        self.__profile = None
+        self.__vertLines = []
+        self.__labels = []
 
         self.__marker = None
-        self.__tabmouseevent = None
 
         self.__contentWidget = QWidget()
         self.setWidget(self.__contentWidget)
@@ -164,6 +169,8 @@ class ProfileDockWidget(QDockWidget):
             child = self.__frameLayout.takeAt(0)
             child.widget().deleteLater()
         self.__plotWdg = None
+        self.__vertLines = []
+        self.__labels = []
 
         if self.__lib == 'Qwt5':
             self.__plotWdg = QwtPlot(self.__plotFrame)
@@ -187,6 +194,7 @@ class ProfileDockWidget(QDockWidget):
             self.__zoomer = QwtPlotZoomer(QwtPlot.xBottom, QwtPlot.yLeft, QwtPicker.DragSelection, QwtPicker.AlwaysOff,
                                    self.__plotWdg.canvas())
             self.__zoomer.setRubberBandPen(QPen(Qt.blue))
+            self.__zoomer.zoomed.connect(self.__onZoomed)
             # self.__plotWdg.insertLegend(QwtLegend())
             grid = QwtPlotGrid()
             grid.setPen(QPen(QColor('grey'), 0, Qt.DotLine))
@@ -221,114 +229,56 @@ class ProfileDockWidget(QDockWidget):
             # mpltoolbar.removeAction(lstActions[7])
             # mpltoolbar.removeAction(lstActions[8])
 
-    def setProfiles(self, profiles, numLines):
+    def setProfiles(self, profile):
         """
         To set the profiles
-        :param profiles: profiles : positions with elevations (for line and points)
-        :param numLines: number of selected connected lines
+        :param profile: profile : positions with elevations (for lines and points), as Profile
         """
-        self.__numLines = numLines
-        self.__profiles = profiles
-        if self.__lib == 'Matplotlib':
-            self.__prepare_points()
-
-    def drawVertLine(self):
-        """
-        To draw vertical lines at positions on the profile
-        """
-        if (self.__profiles is None) or (len(self.__profiles) == 0):
-            return
-        profileLen = 0
-        self.__profiles[0]['l'] = profileLen
-        # self.label(0, 1, 0)
-        for i in range(0, len(self.__profiles)-1):
-            x1 = float(self.__profiles[i]['x'])
-            y1 = float(self.__profiles[i]['y'])
-            x2 = float(self.__profiles[i+1]['x'])
-            y2 = float(self.__profiles[i+1]['y'])
-            profileLen += sqrt(((x2-x1)*(x2-x1)) + ((y2-y1)*(y2-y1)))
-            self.__profiles[i+1]['l'] = profileLen
-
-            # zz = []
-            # for j in xrange(self.__numLines):
-            #     if self.__profiles[i+1]['z'][j] is not None:
-            #         zz.append(j)
-            # if len(zz) == 2:
-            #     width = 3
-            # else:
-            #     width = 1
-            # self.label(i+1,width, profileLen)
+        self.__profile = profile
 
     def attachCurves(self, names):
         """
         To attach the curves for the layers to the profile
         :param names: layers names
         """
-        if (self.__profiles is None) or (self.__profiles == 0):
+        if self.__profile is None or self.__profile.numPoints() == 0:
             return
+        numLines = self.__profile.numLines()
         colors = [Qt.red, Qt.green, Qt.blue, Qt.cyan, Qt.magenta, Qt.yellow]
-        for i in xrange(len(self.__profiles[0]['z'])):
-            if i < self.__numLines:
+        for i in xrange(self.__profile.numColumns()):
+            if i < numLines:
                 v = 0
             else:
-                v = i - self.__numLines + 1
+                v = i - numLines + 1
             name = names[v]
-            xx = []
-            yy = []
-            for prof in self.__profiles:
-                xx.append(prof['l'])
-                yy.append(prof['z'][i])
-
-            for j in range(len(yy)):
-                if yy[j] is None:
-                    xx[j] = None
-
-            if v < len(colors):
-                color = colors[v]
-            else:
-                d = v / len(colors)
-                color = colors[v - int(d * len(colors))]
+            color = colors[v % len(colors)]
 
-            if i == 0 or i > (self.__numLines-1):
+            if i == 0 or i > (numLines-1):
                 legend = QLabel("<font color='" + QColor(color).name() + "'>" + name + "</font>")
                 self.__legendLayout.addWidget(legend)
 
             if self.__lib == 'Qwt5':
-
-                # Split xx and yy into single lines at None values
-                xx = [list(g) for k, g in itertools.groupby(xx, lambda x: x is None) if not k]
-                yy = [list(g) for k, g in itertools.groupby(yy, lambda x: x is None) if not k]
-
                 # Create & attach one QwtPlotCurve per one single line
-                for j in range(len(xx)):
+                for xx, yy in self.__profile.segments(i):
                     curve = QwtPlotCurve(name)
-                    curve.setData(xx[j], yy[j])
+                    curve.setData(xx.tolist(), yy.tolist())
                     curve.setPen(QPen(color, 3))
-                    if i > (self.__numLines-1):
+                    if i > (numLines-1):
                         curve.setStyle(QwtPlotCurve.Dots)
                         curve.setPen(QPen(color, 8))
-                        # symbol = QwtSymbol()
-                        # symbol.setStyle(QwtSymbol.Ellipse)
-                        # symbol.setPen(QPen(color, 4))
-                        # curve.setSymbol(symbol)
                     curve.attach(self.__plotWdg)
 
             elif self.__lib == 'Matplotlib':
                 qcol = QColor(color)
-                if i < self.__numLines:
-                    self.__plotWdg.figure.get_axes()[0].plot(xx, yy, gid=name, linewidth=3)
+                rgba = (qcol.red() / 255.0, qcol.green() / 255.0, qcol.blue() / 255.0, qcol.alpha() / 255.0)
+                xx, yy = self.__profile.series(i)
+                if i < numLines:
+                    self.__plotWdg.figure.get_axes()[0].plot(xx, yy, gid=name, linewidth=3, color=rgba)
                 else:
                     self.__plotWdg.figure.get_axes()[0].plot(xx, yy, gid=name, linewidth=5, marker='o',
-                                                             linestyle='None')
-                tmp = self.__plotWdg.figure.get_axes()[0].get_lines()
-                for t in range(len(tmp)):
-                    if name == tmp[t].get_gid():
-                        tmp[i].set_color((qcol.red() / 255.0, qcol.green() / 255.0, qcol.blue() / 255.0,
-                                          qcol.alpha() / 255.0))
-                        self.__plotWdg.draw()
-                        break
-
-        # scaling this
+                                                             linestyle='None', color=rgba)
+
+        # scaling this, and drawing once
         try:
             self.__reScalePlot(None, True)
         except:
@@ -338,27 +288,19 @@ class ProfileDockWidget(QDockWidget):
                 level=QgsMessageBar.CRITICAL)
             print(
                 QCoreApplication.translate("VDLTools","rescale problem : "), sys.exc_info()[0], traceback.format_exc())
-        if self.__lib == 'Qwt5':
-            self.__plotWdg.replot()
-        elif self.__lib == 'Matplotlib':
-            # self.__plotWdg.figure.legend(self.__plotWdg.figure.get_axes()[0].get_lines(), names, 'center left')
-            self.__plotWdg.figure.get_axes()[0].redraw_in_frame()
-            self.__plotWdg.draw()
-            self.__activateMouseTracking(True)
-            self.__marker.show()
+            self.__redraw()
+        # self.__plotWdg.figure.legend(self.__plotWdg.figure.get_axes()[0].get_lines(), names, 'center left')
+        self.__activateMouseTracking(True)
 
     def __reScalePlot(self, value=None, auto=False):
         """
         To rescale the profile plot depending to the bounds
         """
-        if (self.__profiles is None) or (self.__profiles == 0):
-            self.__plotWdg.replot()
+        if self.__profile is None or self.__profile.numPoints() == 0:
+            self.__redraw()
             return
 
-        maxi = 0
-        for i in range(len(self.__profiles)):
-            if (int(self.__profiles[i]['l'])) > maxi:
-                maxi = int(self.__profiles[i]['l']) + 1
+        maxi = int(self.__profile.length()) + 1
         if self.__lib == 'Qwt5':
             self.__plotWdg.setAxisScale(2, 0, maxi, 0)
         elif self.__lib == 'Matplotlib':
@@ -367,18 +309,10 @@ class ProfileDockWidget(QDockWidget):
         minimumValue = self.__minSpin.value()
         maximumValue = self.__maxSpin.value()
 
-        if auto:
-            minimumValue = 1000000000
-            maximumValue = -1000000000
-            for i in range(len(self.__profiles)):
-                mini = self.__minTab(self.__profiles[i]['z'])
-                if int(mini) < minimumValue:
-                    minimumValue = int(mini) - 1
-                maxi = self.__maxTab(self.__profiles[i]['z'])
-                if int(maxi) > maximumValue:
-                    maximumValue = int(maxi) + 1
-        self.__maxSpin.setValue(maximumValue)
-        self.__minSpin.setValue(minimumValue)
+        if auto and self.__profile.minimum() is not None:
+            minimumValue = int(self.__profile.minimum()) - 1
+            maximumValue = int(self.__profile.maximum()) + 1
+        self.__setSpinValues(minimumValue, maximumValue)
         self.__maxSpin.setEnabled(True)
         self.__minSpin.setEnabled(True)
 
@@ -386,70 +320,114 @@ class ProfileDockWidget(QDockWidget):
             rect = QRectF(0, minimumValue,maxi, maximumValue-minimumValue)
             self.__zoomer.setZoomBase(rect)
 
-        for i in xrange(len(self.__profiles)):
-            zz = []
-            for j in xrange(self.__numLines):
-                if self.__profiles[i]['z'][j] is not None:
-                    zz.append(j)
-            if len(zz) == 2:
-                width = 3
-            else:
-                width = 1
-
-            if self.__lib == 'Qwt5':
-                vertLine = QwtPlotMarker()
-                vertLine.setLineStyle(QwtPlotMarker.VLine)
-                pen = vertLine.linePen()
-                pen.setWidth(width)
-                vertLine.setLinePen(pen)
-                vertLine.setXValue(self.__profiles[i]['l'])
-                label = vertLine.label()
-                label.setText(str(i))
-                vertLine.setLabel(label)
-                vertLine.setLabelAlignment(Qt.AlignLeft)
-                vertLine.attach(self.__plotWdg)
-            elif self.__lib == 'Matplotlib':
-                self.__plotWdg.figure.get_axes()[0].vlines(self.__profiles[i]['l'], minimumValue, maximumValue,
-                                                           linewidth=width)
-                self.__axes.text(self.__profiles[i]['l'], 375, i)
-                self.__plotWdg.figure.get_axes()[0].annotate('ann' + str(i), xy=(self.__profiles[i]['l'], 200))
+        self.__drawVertLines(minimumValue, maximumValue)
 
         if minimumValue < maximumValue:
             if self.__lib == 'Qwt5':
                 self.__plotWdg.setAxisScale(0, minimumValue, maximumValue, 0)
-                self.__plotWdg.replot()
             elif self.__lib == 'Matplotlib':
                 self.__plotWdg.figure.get_axes()[0].set_ybound(minimumValue,maximumValue)
-                self.__plotWdg.figure.get_axes()[0].redraw_in_frame()
-                self.__plotWdg.draw()
+        self.__drawLabels()
+        self.__redraw()
 
-    def __minTab(self, tab):
+    def __setSpinValues(self, minimumValue, maximumValue):
         """
-        To get the minimum value in a table
-        :param tab: table to scan
-        :return: minimum value
+        To set the bounds spins values without triggering a rescale for each of them
+        :param minimumValue: y min value
+        :param maximumValue: y max value
         """
-        mini = 1000000000
-        for t in tab:
-            if t is None:
-                continue
-            if t < mini:
-                mini = t
-        return mini
+        self.__maxSpin.blockSignals(True)
+        self.__minSpin.blockSignals(True)
+        self.__maxSpin.setValue(maximumValue)
+        self.__minSpin.setValue(minimumValue)
+        self.__maxSpin.blockSignals(False)
+        self.__minSpin.blockSignals(False)
 
-    def __maxTab(self, tab):
+    def __redraw(self):
         """
-        To get the maximum value in a table
-        :param tab: table to scan
-        :return: maximum value
+        To redraw the plot, once for all the changes
         """
-        maxi = -1000000000
-        for t in tab:
-            if t is None:
-                continue
-            if t > maxi:
-                maxi = t
-        return maxi
+        if self.__lib == 'Qwt5':
+            self.__plotWdg.replot()
+        elif self.__lib == 'Matplotlib':
+            self.__plotWdg.draw()
+
+    def __drawVertLines(self, minimumValue, maximumValue):
+        """
+        To draw the vertical lines at the profile vertices, as one plot item for each line width
+        (3 where 2 lines are connected, 1 otherwise)
+        :param minimumValue: lines bottom
+        :param maximumValue: lines top
+        """
+        for item in self.__vertLines:
+            if self.__lib == 'Qwt5':
+                item.detach()
+            else:
+                item.remove()
+        self.__vertLines = []
+        lengths = self.__profile.lengths()
+        widths = numpy.where(self.__profile.lineCounts() == 2, 3, 1)
+        if self.__lib == 'Qwt5':
+            for width in [1, 3]:
+                selected = lengths[widths == width]
+                if len(selected) == 0:
+                    continue
+                sticks = QwtPlotCurve()
+                sticks.setStyle(QwtPlotCurve.Sticks)
+                sticks.setBaseline(minimumValue)
+                sticks.setPen(QPen(Qt.black, width))
+                sticks.setData(selected.tolist(), [maximumValue] * len(selected))
+                sticks.attach(self.__plotWdg)
+                self.__vertLines.append(sticks)
+        elif self.__lib == 'Matplotlib':
+            self.__vertLines.append(self.__plotWdg.figure.get_axes()[0].vlines(lengths, minimumValue, maximumValue,
+                                                                               linewidths=widths))
+
+    def __drawLabels(self):
+        """
+        To label the vertices in the displayed distance range, keeping at most MAX_LABELS labels
+        """
+        for item in self.__labels:
+            if self.__lib == 'Qwt5':
+                item.detach()
+            else:
+                item.remove()
+        self.__labels = []
+        if self.__profile is None or self.__profile.numPoints() == 0:
+            return
+        if self.__lib == 'Qwt5':
+            scaleDiv = self.__plotWdg.axisScaleDiv(QwtPlot.xBottom)
+            xMin = scaleDiv.lowerBound()
+            xMax = scaleDiv.upperBound()
+        else:
+            xMin, xMax = self.__plotWdg.figure.get_axes()[0].get_xbound()
+        lengths = self.__profile.lengths()
+        first = int(numpy.searchsorted(lengths, xMin, 'left'))
+        last = int(numpy.searchsorted(lengths, xMax, 'right'))
+        step = max(1, int(ceil(float(last - first) / self.MAX_LABELS)))
+        for i in xrange(first, last, step):
+            if self.__lib == 'Qwt5':
+                vertLabel = QwtPlotMarker()
+                vertLabel.setLineStyle(QwtPlotMarker.VLine)
+                vertLabel.setLinePen(QPen(Qt.NoPen))
+                vertLabel.setXValue(lengths[i])
+                label = vertLabel.label()
+                label.setText(str(i))
+                vertLabel.setLabel(label)
+                vertLabel.setLabelAlignment(Qt.AlignLeft)
+                vertLabel.attach(self.__plotWdg)
+                self.__labels.append(vertLabel)
+            elif self.__lib == 'Matplotlib':
+                axes = self.__plotWdg.figure.get_axes()[0]
+                self.__labels.append(axes.text(lengths[i], 0.95, i, transform=axes.get_xaxis_transform()))
+
+    def __onZoomed(self, rect):
+        """
+        When the Qwt5 plot is zoomed, to decimate the labels again
+        :param rect: zoomed rectangle
+        """
+        self.__drawLabels()
+        self.__plotWdg.replot()
 
     def __setLib(self):
         """
@@ -549,11 +527,13 @@ class ProfileDockWidget(QDockWidget):
         """
         To clear the displayed data
         """
-        if self.__profiles is None:
+        if self.__profile is None:
             return
+        self.__profile = None
+        self.__vertLines = []
+        self.__labels = []
         if self.__lib == 'Qwt5':
             self.__plotWdg.clear()
-            self.__profiles = None
             temp1 = self.__plotWdg.itemList()
             for j in range(len(temp1)):
                 if temp1[j].rtti() == QwtPlotItem.Rtti_PlotCurve:
@@ -563,8 +543,7 @@ class ProfileDockWidget(QDockWidget):
             self.__manageMatplotlibAxe(self.__plotWdg.figure.get_axes()[0])
         self.__maxSpin.setEnabled(False)
         self.__minSpin.setEnabled(False)
-        self.__maxSpin.setValue(0)
-        self.__minSpin.setValue(0)
+        self.__setSpinValues(0, 0)
 
         # clear legend
         while self.__legendLayout.count():
@@ -585,50 +564,99 @@ class ProfileDockWidget(QDockWidget):
 
     def __activateMouseTracking(self, activate):
         """
-        To (de)activate the mouse tracking on the profile for matplotlib library
+        To (de)activate the mouse tracking on the profile, with its position on map
         :param activate: true to activate, false to deactivate
         """
-        if activate:
-            self.__doTracking = True
-            self.__loadRubber()
-            self.cid = self.__plotWdg.mpl_connect('motion_notify_event', self.__mouseevent_mpl)
-        elif self.__doTracking:
+        if self.__doTracking:
             self.__doTracking = False
-            self.__plotWdg.mpl_disconnect(self.cid)
+            if isinstance(self.__plotWdg, QwtPlot):
+                self.__plotWdg.canvas().removeEventFilter(self)
+                self.__plotWdg.canvas().setMouseTracking(False)
+            else:
+                self.__plotWdg.mpl_disconnect(self.cid)
+                self.__plotWdg.mpl_disconnect(self.__drawCid)
             if self.__marker:
                 self.__canvas.scene().removeItem(self.__marker)
+                self.__marker = None
             try:
                 if self.__vline is not None:
-                    self.__plotWdg.figure.get_axes()[0].lines.remove(self.__vline)
+                    self.__vline.remove()
                     self.__plotWdg.draw()
             except Exception, e:
                 print("Tracking exception : " + str(e))
+            self.__vline = None
+            self.__background = None
+        if activate:
+            self.__doTracking = True
+            self.__loadRubber()
+            if isinstance(self.__plotWdg, QwtPlot):
+                self.__plotWdg.canvas().setMouseTracking(True)
+                self.__plotWdg.canvas().installEventFilter(self)
+            else:
+                axes = self.__plotWdg.figure.get_axes()[0]
+                self.__vline = axes.axvline(0, linewidth=2, color='k', animated=True, visible=False)
+                self.__drawCid = self.__plotWdg.mpl_connect('draw_event', self.__drawevent_mpl)
+                self.cid = self.__plotWdg.mpl_connect('motion_notify_event', self.__mouseevent_mpl)
+                self.__plotWdg.draw()
+
+    def eventFilter(self, obj, event):
+        """
+        To manage Qwt5 mouse tracking event
+        :param obj: watched object
+        :param event: event
+        :return: false, to let the event be processed
+        """
+        if isinstance(self.__plotWdg, QwtPlot) and obj is self.__plotWdg.canvas() \
+                and event.type() == QEvent.MouseMove:
+            self.__trackPosition(self.__plotWdg.invTransform(QwtPlot.xBottom, event.pos().x()))
+        return QDockWidget.eventFilter(self, obj, event)
+
+    def __drawevent_mpl(self, event):
+        """
+        To cache the matplotlib plot background after each full draw, for blitting the tracking line
+        :param event: draw event
+        """
+        axes = self.__plotWdg.figure.get_axes()[0]
+        self.__background = self.__plotWdg.copy_from_bbox(axes.bbox)
+        if self.__vline is not None and self.__vline.get_visible():
+            axes.draw_artist(self.__vline)
 
     def __mouseevent_mpl(self, event):
         """
         To manage matplotlib mouse tracking event
         :param event: mouse tracking event
         """
-        if event.xdata:
-            try:
-                if self.__vline is not None:
-                    self.__plotWdg.figure.get_axes()[0].lines.remove(self.__vline)
-            except Exception, e:
-                print("Mouse event exception : " +str(e))
-            xdata = float(event.xdata)
-            self.__vline = self.__plotWdg.figure.get_axes()[0].axvline(xdata, linewidth=2, color='k')
-            self.__plotWdg.draw()
-            i = 1
-            while i < len(self.__tabmouseevent)-1 and xdata > self.__tabmouseevent[i][0]:
-                i += 1
-            i -= 1
-
-            x = self.__tabmouseevent[i][1] + (self.__tabmouseevent[i + 1][1] - self.__tabmouseevent[i][1]) / (
-            self.__tabmouseevent[i + 1][0] - self.__tabmouseevent[i][0]) * (xdata - self.__tabmouseevent[i][0])
-            y = self.__tabmouseevent[i][2] + (self.__tabmouseevent[i + 1][2] - self.__tabmouseevent[i][2]) / (
-            self.__tabmouseevent[i + 1][0] - self.__tabmouseevent[i][0]) * (xdata - self.__tabmouseevent[i][0])
-            self.__marker.show()
-            self.__marker.setCenter(QgsPoint(x, y))
+        if event.xdata is None or self.__vline is None or self.__background is None:
+            return
+        xdata = float(event.xdata)
+        axes = self.__plotWdg.figure.get_axes()[0]
+        self.__vline.set_xdata([xdata, xdata])
+        self.__vline.set_visible(True)
+        self.__plotWdg.restore_region(self.__background)
+        axes.draw_artist(self.__vline)
+        self.__plotWdg.blit(axes.bbox)
+        self.__trackPosition(xdata)
+
+    def __trackPosition(self, distance):
+        """
+        To show on map the position at a distance along the profile
+        :param distance: distance from the profile start
+        """
+        if self.__profile is None or self.__profile.numPoints() < 2 or self.__marker is None:
+            return
+        lengths = self.__profile.lengths()
+        xs = self.__profile.x()
+        ys = self.__profile.y()
+        i = min(max(int(numpy.searchsorted(lengths, distance)), 1), len(lengths) - 1) - 1
+        segment = lengths[i + 1] - lengths[i]
+        if segment > 0:
+            ratio = (distance - lengths[i]) / segment
+        else:
+            ratio = 0
+        x = xs[i] + (xs[i + 1] - xs[i]) * ratio
+        y = ys[i] + (ys[i + 1] - ys[i]) * ratio
+        self.__marker.show()
+        self.__marker.setCenter(QgsPoint(x, y))
 
     def __loadRubber(self):
         """
@@ -639,20 +667,6 @@ class ProfileDockWidget(QDockWidget):
         self.__marker.setIconType(QgsVertexMarker.ICON_BOX)  # or ICON_CROSS, ICON_X
         self.__marker.setPenWidth(3)
 
-    def __prepare_points(self):
-        """
-        To prepare the points on map for mouse tracking on profile
-        """
-        self.__tabmouseevent = []
-        length = 0
-        for i, point in enumerate(self.__profiles):
-            if i == 0:
-                self.__tabmouseevent.append([0, point['x'], point['y']])
-            else:
-                length += ((self.__profiles[i]['x'] - self.__profiles[i-1]['x']) ** 2 +
-                           (self.__profiles[i]['y'] - self.__profiles[i-1]['y']) ** 2) ** 0.5
-                self.__tabmouseevent.append([float(length), float(point['x']), float(point['y'])])
-
     def closeEvent(self, event):
         """
         When the dock widget is closed
@@ -35,6 +35,11 @@ from tools.extrapolate_tool import ExtrapolateTool
 from tools.move_tool import MoveTool
 from tools.show_settings import ShowSettings
 from tools.import_measures import ImportMeasures
+from tools.check_elevations import CheckElevations
+from core.finder import Finder
+from core.db_connector import DBConnector
+from core.snapping_context import SnappingContext
+from core.topology_cache import TopologyCache
 
 # Initialize Qt resources from file resources.py
 import resources
@@ -60,6 +65,9 @@ class VDLTools:
         self.moveTool = None
         self.showSettings = None
         self.importMeasures = None
+        self.checkElevations = None
+        self.snappingContext = None
+        self.topologyCache = None
 
         # initialize plugin directory
         self.plugin_dir = os.path.dirname(__file__)
@@ -132,6 +140,8 @@ class VDLTools:
         self.add_action(self.moveTool, self.iface.mainWindow(), False)
         self.importMeasures = ImportMeasures(self.iface)
         self.add_action(self.importMeasures, self.iface.mainWindow(), isMapTool=False)
+        self.checkElevations = CheckElevations(self.iface)
+        self.add_action(self.checkElevations, self.iface.mainWindow(), isMapTool=False, inToolBar=False)
 
         self.profileTool.setEnable(self.iface.activeLayer())
         self.iface.currentLayerChanged.connect(self.profileTool.setEnable)
@@ -148,6 +158,14 @@ class VDLTools:
         self.interpolateTool.setOwnSettings(self.showSettings)
         self.importMeasures.setOwnSettings(self.showSettings)
 
+        self.snappingContext = SnappingContext(self.mapCanvas)
+        self.intersectTool.setSnappingContext(self.snappingContext)
+        self.interpolateTool.setSnappingContext(self.snappingContext)
+        self.moveTool.setSnappingContext(self.snappingContext)
+
+        self.topologyCache = TopologyCache()
+        self.profileTool.setTopologyCache(self.topologyCache)
+
     def unload(self):
         """
         Removes the plugin menu item and icon from QGIS GUI
@@ -159,3 +177,13 @@ class VDLTools:
             self.iface.removeToolBarIcon(action)
         # remove the toolbar
         del self.toolbar
+        Finder.indexCache().clear()
+        if self.importMeasures is not None:
+            self.importMeasures.release()
+        DBConnector.closeAll()
+        if self.snappingContext is not None:
+            self.snappingContext.release()
+            self.snappingContext = None
+        if self.topologyCache is not None:
+            self.topologyCache.clear()
+            self.topologyCache = None